@@ -0,0 +1,371 @@
+import asyncio
+import json
+import os
+import secrets
+import threading
+from urllib.parse import urlsplit, parse_qs
+from PyQt5.QtCore import QObject, pyqtSignal, Qt
+import metrics
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MEDIA_TYPES = ("Videos", "Música", "Películas")
+
+# Máximo de eventos pendientes por cliente SSE antes de descartar los más viejos
+SSE_QUEUE_SIZE = 1000
+SSE_KEEPALIVE_SECONDS = 15
+
+# Token generado cuando no se define MEDIA_DOWNLOADER_API_TOKEN; solo lo lee el usuario
+TOKEN_FILE = os.path.join(os.path.expanduser("~"), ".media_downloader_cache", "api_token")
+LOCAL_ORIGINS = ("http://127.0.0.1", "http://localhost", "http://[::1]")
+
+HTTP_REASONS = {
+    200: "OK",
+    202: "Accepted",
+    204: "No Content",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    415: "Unsupported Media Type",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def load_or_create_token(path=TOKEN_FILE):
+    """Token guardado en ``path`` (permisos 0600); se crea uno aleatorio la primera vez"""
+    try:
+        with open(path, 'r') as f:
+            token = f.read().strip()
+        if token:
+            return token
+    except OSError:
+        pass
+    token = secrets.token_urlsafe(32)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(token)
+    except OSError as e:
+        print(f"No se pudo guardar el token de la API: {str(e)}")
+    return token
+
+
+class ControlAPIServer(QObject):
+    """API HTTP/JSON local para encolar y monitorear descargas.
+
+    El servidor corre en su propio hilo con un event loop de asyncio, de modo
+    que las consultas de estado no compiten con los hilos de descarga. Las
+    acciones que tocan la interfaz se reenvían al hilo principal mediante
+    señales de Qt.
+
+    Toda petición lleva el token en ``X-API-Token`` (o ``?token=`` para
+    EventSource); sin MEDIA_DOWNLOADER_API_TOKEN se usa el de ``TOKEN_FILE``.
+    Además se rechazan las peticiones con un ``Origin`` ajeno y los cuerpos
+    que no son ``application/json``, para que una página web no pueda
+    encolar descargas a través del navegador.
+    """
+    enqueue_requested = pyqtSignal(str, str)        # url, media_type
+    bulk_enqueue_requested = pyqtSignal(list, str)  # urls, media_type
+    cancel_requested = pyqtSignal(str)              # url
+
+    max_body_size = 4 * 1024 * 1024
+
+    def __init__(self, downloader, host=DEFAULT_HOST, port=DEFAULT_PORT, token=None):
+        super().__init__()
+        self.downloader = downloader
+        self.host = host
+        self.port = port
+        if token is None:
+            token = os.environ.get("MEDIA_DOWNLOADER_API_TOKEN") or load_or_create_token()
+        self.token = token
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._subscribers = set()
+
+        # Conexión directa: el slot corre en el hilo de la descarga y solo
+        # agenda el evento en el loop de asyncio, sin pasar por la UI
+        downloader.progress_signal.connect(self._on_progress, Qt.DirectConnection)
+        downloader.status_signal.connect(self._on_status, Qt.DirectConnection)
+        downloader.title_signal.connect(self._on_title, Qt.DirectConnection)
+        downloader.finished_signal.connect(self._on_finished, Qt.DirectConnection)
+        downloader.error_signal.connect(self._on_error, Qt.DirectConnection)
+
+    def start(self):
+        """Inicia el servidor en un hilo en segundo plano"""
+        if self._thread and self._thread.is_alive():
+            return
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(started,), name="api-server")
+        self._thread.daemon = True
+        self._thread.start()
+        started.wait(timeout=5)
+
+    def stop(self):
+        """Detiene el servidor y cierra las conexiones abiertas"""
+        loop = self._loop
+        if loop and loop.is_running():
+            loop.call_soon_threadsafe(loop.stop)
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self, started):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle_client, self.host, self.port)
+            )
+        except OSError as e:
+            print(f"Error iniciando la API local en {self.host}:{self.port}: {str(e)}")
+            self._loop.close()
+            self._loop = None
+            started.set()
+            return
+
+        print(f"API local escuchando en http://{self.host}:{self.port}"
+              + ("" if os.environ.get("MEDIA_DOWNLOADER_API_TOKEN") else f" (token en {TOKEN_FILE})"))
+        started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            # Cancelar las conexiones abiertas (clientes SSE) antes de cerrar el loop
+            pending = asyncio.all_tasks(self._loop)
+            for task in pending:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+            self._loop = None
+
+    # --- Eventos del downloader (llamados desde los hilos de descarga) ---
+
+    def _publish(self, event, data):
+        loop = self._loop
+        if loop is None or not self._subscribers:
+            return
+        try:
+            loop.call_soon_threadsafe(self._broadcast, event, data)
+        except RuntimeError:
+            # El loop se cerró mientras se emitía el evento
+            pass
+
+    def _broadcast(self, event, data):
+        message = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode()
+        for queue in self._subscribers:
+            if queue.full():
+                # Cliente lento: descartar el evento más viejo en lugar de crecer sin límite
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    def _on_progress(self, url, progress):
+        self._publish("progress", {"url": url, "progress": progress})
+
+    def _on_status(self, url, status):
+        self._publish("status", {"url": url, "status": status})
+
+    def _on_title(self, url, title):
+        self._publish("title", {"url": url, "title": title})
+
+    def _on_finished(self, url, filename):
+        self._publish("finished", {"url": url, "filename": filename})
+
+    def _on_error(self, url, error):
+        self._publish("error", {"url": url, "error": error})
+
+    # --- HTTP ---
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    # El cuerpo no se leyó: la conexión no se puede reutilizar
+                    await self._send_json(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, query, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                error = self._check_request(query, headers, body)
+                if error:
+                    await self._send_json(writer, error[0], {"error": error[1]}, keep_alive)
+                elif method == "GET" and path == "/api/events":
+                    await self._stream_events(writer)
+                    break
+                elif method == "GET" and path == "/metrics":
+                    await self._send(writer, 200, metrics.registry.to_prometheus().encode(),
+                                     "text/plain; version=0.0.4; charset=utf-8", keep_alive)
+                else:
+                    try:
+                        status, payload = self._dispatch(method, path, query, body)
+                    except Exception as e:
+                        print(f"Error en la API local ({method} {path}): {str(e)}")
+                        status, payload = 500, {"error": "Error interno"}
+                    await self._send_json(writer, status, payload, keep_alive)
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    def _check_request(self, query, headers, body):
+        """Devuelve (código, mensaje) si la petición se rechaza, o None"""
+        origin = headers.get("origin")
+        if origin and not any(origin == o or origin.startswith(o + ":") for o in LOCAL_ORIGINS):
+            return 403, "Origen no permitido"
+        given = headers.get("x-api-token") or query.get("token", "")
+        if self.token and not secrets.compare_digest(given.encode(), self.token.encode()):
+            return 401, "Token inválido"
+        if body and headers.get("content-type", "").split(";")[0].strip().lower() != "application/json":
+            return 415, "El cuerpo debe ser application/json"
+        return None
+
+    async def _read_request(self, reader):
+        """Lee una petición HTTP/1.1; devuelve None si el cliente cerró la conexión"""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return None
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        body = b""
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            raise HTTPError(400, "Content-Length inválido")
+        if length < 0:
+            raise HTTPError(400, "Content-Length inválido")
+        if length > self.max_body_size:
+            raise HTTPError(413, "Cuerpo demasiado grande")
+        if length:
+            body = await reader.readexactly(length)
+
+        parts = urlsplit(target)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        return method.upper(), parts.path.rstrip("/") or "/", query, headers, body
+
+    def _dispatch(self, method, path, query, body):
+        """Resuelve una petición JSON y devuelve (código, respuesta)"""
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            return 400, {"error": "JSON inválido"}
+        if not isinstance(data, dict):
+            return 400, {"error": "Se esperaba un objeto JSON"}
+
+        if path == "/api/jobs":
+            if method == "GET":
+                jobs = self.downloader.snapshot()
+                if "status" in query:
+                    jobs = [job for job in jobs if job["status"] == query["status"]]
+                return 200, {"jobs": jobs}
+            if method == "POST":
+                url = data.get("url")
+                media_type = data.get("media_type", MEDIA_TYPES[0])
+                if not isinstance(url, str) or not url.strip():
+                    return 400, {"error": "Falta la URL"}
+                if media_type not in MEDIA_TYPES:
+                    return 400, {"error": f"Tipo de medio inválido: {media_type}"}
+                url = url.strip()
+                self.enqueue_requested.emit(url, media_type)
+                return 202, {"queued": [url]}
+            if method == "DELETE":
+                url = query.get("url") or data.get("url")
+                if not isinstance(url, str) or not url:
+                    return 400, {"error": "Falta la URL"}
+                self.cancel_requested.emit(url)
+                return 202, {"cancelled": url}
+            return 405, {"error": "Método no permitido"}
+
+        if path == "/api/jobs/bulk":
+            if method != "POST":
+                return 405, {"error": "Método no permitido"}
+            urls = data.get("urls", [])
+            if not isinstance(urls, list):
+                return 400, {"error": "urls debe ser una lista"}
+            urls = [u.strip() for u in urls if isinstance(u, str) and u.strip()]
+            media_type = data.get("media_type", MEDIA_TYPES[0])
+            if not urls:
+                return 400, {"error": "Faltan las URLs"}
+            if media_type not in MEDIA_TYPES:
+                return 400, {"error": f"Tipo de medio inválido: {media_type}"}
+            self.bulk_enqueue_requested.emit(urls, media_type)
+            return 202, {"queued": urls}
+
+        if path == "/api/jobs/status":
+            job = self.downloader.job_status(query.get("url", ""))
+            if job is None:
+                return 404, {"error": "Descarga no encontrada"}
+            return 200, job
+
+        if path == "/api/platforms":
+            return 200, {"platforms": self.downloader.controller.snapshot()}
+
+        if path == "/api/metrics":
+            return 200, metrics.registry.to_dict()
+
+        return 404, {"error": "Ruta no encontrada"}
+
+    async def _send_json(self, writer, status, payload, keep_alive=True):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        await self._send(writer, status, body, "application/json; charset=utf-8", keep_alive)
+
+    async def _send(self, writer, status, body, content_type, keep_alive=True):
+        headers = [
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + body)
+        await writer.drain()
+
+    async def _stream_events(self, writer):
+        """Envía los eventos de progreso como Server-Sent Events"""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: keep-alive\r\n\r\n"
+        )
+        await writer.drain()
+
+        queue = asyncio.Queue(maxsize=SSE_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    message = b": keepalive\n\n"
+                writer.write(message)
+                await writer.drain()
+        finally:
+            self._subscribers.discard(queue)
@@ -0,0 +1,390 @@
+"""Benchmarks sin interfaz gráfica de los caminos críticos de la aplicación.
+
+Uso:
+    python benchmarks.py --sizes 1000 10000 --output resultados.json
+    python benchmarks.py --compare resultados_anteriores.json
+
+Se ejecuta con ``QT_QPA_PLATFORM=offscreen`` sobre árboles de archivos
+sintéticos creados en un directorio temporal. Los resultados se guardan en
+JSON para comparar entre commits; ``--compare`` marca como regresión todo lo
+que empeore más que ``--threshold``.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import platform as platform_module
+from datetime import datetime
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+SORT_MODES = ["Alfabético", "Fecha", "Aleatorio"]
+DEFAULT_SIZES = [1000, 10000, 50000]
+
+
+def rss_bytes():
+    """Memoria residente actual del proceso (pico si no hay /proc)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return 0
+
+
+def best_of(func, repeat):
+    """Mejor tiempo en segundos de ``repeat`` ejecuciones"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def make_tree(root, count, extension):
+    """Crea ``count`` archivos vacíos con nombres realistas"""
+    os.makedirs(root, exist_ok=True)
+    for i in range(count):
+        name = f"Artista {i % 997} - Canción número {i} [1080p] (Official Video){extension}"
+        open(os.path.join(root, name), "wb").close()
+    return root
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+class BenchmarkRunner:
+    def __init__(self, sizes, repeat, workdir):
+        self.sizes = sizes
+        self.repeat = repeat
+        self.workdir = workdir
+        self.results = {}
+        self._app = None
+
+    def record(self, name, **values):
+        self.results[name] = values
+        summary = ", ".join(f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}" for k, v in values.items())
+        print(f"{name}: {summary}", file=sys.__stdout__, flush=True)
+
+    def qt_app(self):
+        if self._app is None:
+            from PyQt5.QtWidgets import QApplication
+            self._app = QApplication.instance() or QApplication(sys.argv[:1])
+        return self._app
+
+    def tree(self, count, extension):
+        return make_tree(os.path.join(self.workdir, f"tree{extension}-{count}"), count, extension)
+
+    # --- Biblioteca ---
+
+    def bench_get_media_files(self):
+        from utils import get_media_files
+        for count in self.sizes:
+            root = self.tree(count, ".mp4")
+            for mode in SORT_MODES:
+                seconds = best_of(lambda: get_media_files(root, mode), self.repeat)
+                self.record(f"get_media_files[{mode}][{count}]", seconds=seconds,
+                            files_per_second=count / seconds)
+
+    def bench_load_directory(self):
+        self.qt_app()
+        from music_player import MusicPlayer
+        player = MusicPlayer()
+        for count in self.sizes:
+            root = self.tree(count, ".mp3")
+            for mode in SORT_MODES:
+                seconds = best_of(lambda: player.load_directory(root, mode), self.repeat)
+                self.record(f"load_directory[{mode}][{count}]", seconds=seconds,
+                            files_per_second=count / seconds)
+
+    def bench_list_population(self):
+        """Tiempo y memoria de _add_items_to_list con una ventana real sin pantalla"""
+        app = self.qt_app()
+        home = os.path.join(self.workdir, "home")
+        os.makedirs(home, exist_ok=True)
+        # La ventana guarda caché e historial en HOME; se aísla y se restaura al final
+        saved_env = {name: os.environ.get(name) for name in ("HOME", "USERPROFILE")}
+        os.environ["HOME"] = home
+        os.environ["USERPROFILE"] = home
+
+        from utils import get_media_files
+        stdout, stderr = sys.stdout, sys.stderr
+        window = None
+        try:
+            from main import MainWindow
+            window = MainWindow()
+            sys.stdout, sys.stderr = stdout, stderr
+            for count in self.sizes:
+                files = get_media_files(self.tree(count, ".mp4"), "Alfabético")
+                window._add_items_to_list(window.video_list, [])
+                app.processEvents()
+                rss_before = rss_bytes()
+                start = time.perf_counter()
+                window._add_items_to_list(window.video_list, files)
+                app.processEvents()
+                seconds = time.perf_counter() - start
+                rss_delta = rss_bytes() - rss_before
+                self.record(f"add_items_to_list[{count}]", seconds=seconds,
+                            rss_delta_bytes=rss_delta, rss_per_item_bytes=rss_delta / count)
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+            if window is not None:
+                window.downloader.close()
+                window.deleteLater()
+                app.processEvents()
+            for name, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+    # --- Caché ---
+
+    def bench_cache_manager(self, threads=8, operations=200):
+        from cache_manager import CacheManager
+        cache_dir = os.path.join(self.workdir, "cache")
+        source = os.path.join(self.workdir, "payload.bin")
+        with open(source, "wb") as f:
+            f.write(os.urandom(64 * 1024))
+        cache = CacheManager(cache_dir)
+
+        def worker(offset, action):
+            for i in range(operations):
+                url = f"https://example.com/video/{(offset + i) % (operations * 2)}"
+                if action == "put":
+                    cache.cache_file(url, "Videos", source)
+                else:
+                    cache.get_cached_file(url, "Videos")
+
+        for action in ("put", "get"):
+            workers = [threading.Thread(target=worker, args=(t * operations, action)) for t in range(threads)]
+            start = time.perf_counter()
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+            seconds = time.perf_counter() - start
+            self.record(f"cache_manager[{action}]", seconds=seconds,
+                        ops_per_second=threads * operations / seconds, threads=threads)
+
+        seconds = best_of(cache._clean_old_cache, self.repeat)
+        self.record("cache_manager[evict]", seconds=seconds)
+
+    # --- Downloader ---
+
+    def bench_downloader_helpers(self, count=100000):
+        self.qt_app()
+        from downloader import Downloader
+        from url_router import BENCHMARK_URLS
+        downloader = Downloader()
+        urls = []
+        for i in range(count):
+            base = BENCHMARK_URLS[i % len(BENCHMARK_URLS)]
+            urls.append(f"{base}{'&' if '?' in base else '?'}n={i}")
+        seconds = best_of(lambda: [downloader.detect_platform(u) for u in urls], 1)
+        self.record("detect_platform[cold]", seconds=seconds, urls_per_second=count / seconds)
+        seconds = best_of(lambda: [downloader.detect_platform(u) for u in urls[:1000]], self.repeat)
+        self.record("detect_platform[cached]", seconds=seconds, urls_per_second=1000 / seconds)
+
+        names = [f"Artista {i} - Canción [1080p] (Official Video) {{x}}.mp4" for i in range(count)]
+        seconds = best_of(lambda: [downloader.clean_filename(n) for n in names], self.repeat)
+        self.record("clean_filename", seconds=seconds, names_per_second=count / seconds)
+
+    def bench_progress_fanout(self, listeners=(1, 4, 16), emits=20000):
+        """Costo de emitir progress_signal con varios receptores conectados"""
+        app = self.qt_app()
+        from downloader import Downloader
+        for count in listeners:
+            downloader = Downloader()
+            received = [0]
+
+            def slot(url, progress):
+                received[0] += 1
+
+            for _ in range(count):
+                downloader.progress_signal.connect(slot)
+            start = time.perf_counter()
+            for i in range(emits):
+                downloader.progress_signal.emit("https://example.com/v", i % 100)
+            app.processEvents()
+            seconds = time.perf_counter() - start
+            self.record(f"progress_fanout[{count}]", seconds=seconds,
+                        emits_per_second=emits / seconds, deliveries=received[0])
+
+    def bench_queue_model(self, updates_per_job=20):
+        """Altas, actualizaciones de progreso y finalizaciones en el modelo de la cola"""
+        app = self.qt_app()
+        from download_history import DownloadHistory
+        from download_queue_model import DownloadQueueModel
+        for count in self.sizes:
+            history = DownloadHistory(os.path.join(self.workdir, f"history-{count}.jsonl"))
+            model = DownloadQueueModel(history)
+            urls = [f"https://example.com/video/{i}" for i in range(count)]
+            rss_before = rss_bytes()
+            seconds = best_of(lambda: model.add_jobs(urls, "Videos"), 1)
+            self.record(f"queue_model[add][{count}]", seconds=seconds, jobs_per_second=count / seconds,
+                        rss_per_job_bytes=(rss_bytes() - rss_before) / count)
+
+            active = urls[:model.max_finished]
+            start = time.perf_counter()
+            for progress in range(updates_per_job):
+                for url in active:
+                    model.update(url, progress=progress * 5, status=f"Descargando... {progress * 5}%")
+                model._flush()
+            app.processEvents()
+            seconds = time.perf_counter() - start
+            updates = updates_per_job * len(active)
+            self.record(f"queue_model[update][{count}]", seconds=seconds, updates_per_second=updates / seconds)
+
+            seconds = best_of(lambda: [model.finish(url, 'completed', "Completado") for url in active], 1)
+            self.record(f"queue_model[finish][{count}]", seconds=seconds,
+                        finishes_per_second=len(active) / seconds)
+
+    def bench_library_search(self, query="artista 12 cancion 34"):
+        """Construcción del índice y búsqueda letra por letra, como al escribir"""
+        from utils import get_media_files
+        from search_index import build_index
+        for count in self.sizes:
+            files = get_media_files(self.tree(count, ".mp4"), "Alfabético")
+            rss_before = rss_bytes()
+            start = time.perf_counter()
+            index = build_index(files)
+            seconds = time.perf_counter() - start
+            self.record(f"library_search[index][{count}]", seconds=seconds,
+                        rss_per_item_bytes=(rss_bytes() - rss_before) / count)
+
+            worst = 0.0
+            for length in range(1, len(query) + 1):
+                start = time.perf_counter()
+                index.search(query[:length])
+                worst = max(worst, time.perf_counter() - start)
+            self.record(f"library_search[keystroke][{count}]", seconds=worst)
+
+    def bench_duplicates(self, file_bytes=256 * 1024):
+        """Búsqueda de duplicados en frío y con el caché de hashes ya lleno"""
+        from duplicate_finder import HashCache, find_duplicates
+        for count in self.sizes:
+            root = os.path.join(self.workdir, f"dupes-{count}")
+            os.makedirs(root, exist_ok=True)
+            for i in range(count):
+                # Pocos tamaños distintos: casi todo pasa a la etapa del hash parcial.
+                # Uno de cada diez archivos es copia del anterior.
+                source = i - 1 if i % 10 == 1 else i
+                data = (b"%08d" % source) * (file_bytes // 8 + source % 4)
+                with open(os.path.join(root, f"{i}.mp4"), "wb") as f:
+                    f.write(data)
+            cache = HashCache(os.path.join(self.workdir, f"hashes-{count}.json"))
+            for kind in ("frio", "caché"):
+                start = time.perf_counter()
+                groups = find_duplicates([root], cache)
+                self.record(f"duplicates[{kind}][{count}]", seconds=time.perf_counter() - start,
+                            groups=len(groups))
+
+    def run(self, only=None):
+        benchmarks = {
+            "get_media_files": self.bench_get_media_files,
+            "load_directory": self.bench_load_directory,
+            "list_population": self.bench_list_population,
+            "cache_manager": self.bench_cache_manager,
+            "downloader_helpers": self.bench_downloader_helpers,
+            "progress_fanout": self.bench_progress_fanout,
+            "queue_model": self.bench_queue_model,
+            "library_search": self.bench_library_search,
+            "duplicates": self.bench_duplicates,
+        }
+        for name, bench in benchmarks.items():
+            if only and name not in only:
+                continue
+            try:
+                bench()
+            except ImportError as e:
+                print(f"{name}: omitido ({str(e)})", file=sys.__stdout__)
+        return {
+            "meta": {
+                "commit": git_commit(),
+                "date": datetime.now().isoformat(),
+                "python": sys.version.split()[0],
+                "platform": platform_module.platform(),
+                "sizes": self.sizes,
+                "repeat": self.repeat,
+            },
+            "results": self.results,
+        }
+
+
+# Métricas en las que un valor mayor es mejor
+HIGHER_IS_BETTER = ("_per_second",)
+
+
+def compare(current, baseline, threshold):
+    """Compara dos ejecuciones y devuelve las líneas con regresiones"""
+    regressions = []
+    for name, values in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        for metric, value in values.items():
+            old = base.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            if metric in ("threads", "deliveries"):
+                continue
+            change = (value - old) / abs(old)
+            worse = -change if metric.endswith(HIGHER_IS_BETTER) else change
+            marker = "REGRESIÓN" if worse > threshold else ""
+            line = f"{name}.{metric}: {old:.4g} -> {value:.4g} ({change:+.1%}) {marker}".rstrip()
+            print(line)
+            if marker:
+                regressions.append(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks sin interfaz de Media Downloader")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Cantidad de archivos de los árboles sintéticos")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", help="Ejecutar solo estos benchmarks")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Empeoramiento relativo que se considera regresión")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="media_bench_")
+    try:
+        results = BenchmarkRunner(args.sizes, args.repeat, workdir).run(args.only)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import os
+import re
+import csv
+import io
+from dataclasses import dataclass, field
+from typing import Dict, List, Set
+from url_router import route_urls, is_valid_url
+
+URL_PATTERN = re.compile(r'https?://[^\s"\'<>,;]+')
+IMPORT_FILE_FILTER = "Listas de URLs (*.txt *.m3u *.m3u8 *.csv);;Todos los archivos (*)"
+
+
+def extract_urls(text, kind=None):
+    """Extrae las URLs de un texto plano, una lista M3U o un CSV"""
+    if kind is None:
+        kind = 'm3u' if text.lstrip().startswith('#EXTM3U') else 'text'
+
+    if kind == 'm3u':
+        # Las líneas de comentario (#EXTINF, logos, etc.) no son entradas
+        lines = (line.strip() for line in text.splitlines())
+        return [line for line in lines if line and not line.startswith('#') and URL_PATTERN.match(line)]
+
+    if kind == 'csv':
+        urls = []
+        for row in csv.reader(io.StringIO(text)):
+            for cell in row:
+                urls.extend(URL_PATTERN.findall(cell))
+        return urls
+
+    return URL_PATTERN.findall(text)
+
+
+def read_urls_file(path):
+    """Lee un archivo de texto, M3U/M3U8 o CSV y devuelve sus URLs"""
+    extension = os.path.splitext(path)[1].lower()
+    kind = {'.m3u': 'm3u', '.m3u8': 'm3u', '.csv': 'csv'}.get(extension)
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return extract_urls(f.read(), kind)
+
+
+@dataclass
+class ImportResult:
+    accepted: List[str] = field(default_factory=list)
+    duplicates: int = 0
+    in_queue: int = 0
+    in_library: int = 0
+    invalid: int = 0
+
+    def summary(self) -> str:
+        """Resumen legible de la importación"""
+        parts = [f"{len(self.accepted)} añadidas"]
+        if self.duplicates:
+            parts.append(f"{self.duplicates} repetidas")
+        if self.in_queue:
+            parts.append(f"{self.in_queue} ya en cola")
+        if self.in_library:
+            parts.append(f"{self.in_library} ya en la biblioteca")
+        if self.invalid:
+            parts.append(f"{self.invalid} inválidas")
+        return "Importación: " + ", ".join(parts)
+
+
+def plan_import(urls, queued_urls: Set[str], history: Dict[str, dict],
+                library_titles: Dict[str, Set[str]]) -> ImportResult:
+    """Normaliza y deduplica un lote de URLs en una sola pasada.
+
+    Una URL se descarta si se repite dentro del lote, si ya está en la cola o
+    si el historial dice que se descargó y el archivo sigue en la biblioteca.
+    La URL canónica solo sirve para comparar: se encola la URL tal como se
+    pegó, porque la normalización puede quitar parámetros que importan
+    (``t=`` de YouTube, consultas sin valor).
+    """
+    result = ImportResult()
+    seen = set()
+    urls = list(urls)
+    for url, route in zip(urls, route_urls(urls)):
+        key = route.url
+        if not is_valid_url(key):
+            result.invalid += 1
+        elif key in seen:
+            result.duplicates += 1
+        elif key in queued_urls:
+            result.in_queue += 1
+        elif key in history and history[key].get('title') in library_titles.get(history[key].get('media_type'), ()):
+            result.in_library += 1
+        else:
+            result.accepted.append(url.strip())
+        seen.add(key)
+    return result
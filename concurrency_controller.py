@@ -0,0 +1,155 @@
+import re
+import time
+import random
+import threading
+import metrics
+
+# Mensajes de yt-dlp que indican que el servidor nos está limitando
+THROTTLE_PATTERN = re.compile(r"\b(429|403)\b|too many requests|forbidden|rate.?limit", re.IGNORECASE)
+TIMEOUT_PATTERN = re.compile(r"timed? ?out|connection (reset|aborted|refused)|temporary failure|"
+                             r"remote end closed|incompleteread", re.IGNORECASE)
+
+LIMIT_GAUGE = metrics.registry.gauge("download_concurrency_limit", "Descargas simultáneas permitidas por plataforma")
+CIRCUIT_OPEN_TOTAL = metrics.registry.counter("download_circuit_open_total", "Aperturas del circuito por plataforma")
+
+
+def classify_error(message):
+    """Devuelve 'throttle', 'timeout' o None según el mensaje de error"""
+    if not message:
+        return None
+    if THROTTLE_PATTERN.search(message):
+        return 'throttle'
+    if TIMEOUT_PATTERN.search(message):
+        return 'timeout'
+    return None
+
+
+class _PlatformState:
+    __slots__ = ('limit', 'active', 'best_rate', 'failures', 'open_until', 'open_seconds', 'half_open')
+
+    def __init__(self, limit, open_seconds):
+        self.limit = limit
+        self.active = 0
+        self.best_rate = 0.0
+        self.failures = 0
+        self.open_until = 0.0
+        self.open_seconds = open_seconds
+        self.half_open = False
+
+
+class ConcurrencyController:
+    """Límite de descargas simultáneas por plataforma con AIMD y circuit breaker.
+
+    Cada plataforma empieza con ``initial_limit`` descargas a la vez. Mientras
+    la velocidad agregada siga mejorando el límite sube de a uno (aumento
+    aditivo); un 429/403 o un timeout lo reduce a la mitad (disminución
+    multiplicativa). Tras ``failure_threshold`` fallos seguidos el circuito se
+    abre y la plataforma queda en pausa; al vencer la pausa se deja pasar un
+    único trabajo de prueba que cierra el circuito o lo vuelve a abrir con el
+    doble de espera.
+    """
+
+    def __init__(self, initial_limit=2, min_limit=1, max_limit=6, failure_threshold=5,
+                 open_seconds=120, max_open_seconds=1800, base_delay=2.0, max_delay=120.0, max_retries=3):
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._states = {}
+
+    def _state(self, platform):
+        state = self._states.get(platform)
+        if state is None:
+            state = self._states[platform] = _PlatformState(self.initial_limit, self.open_seconds)
+            LIMIT_GAUGE.set(state.limit, platform=platform)
+        return state
+
+    def can_start(self, platform):
+        """Indica si la plataforma admite otra descarga ahora mismo"""
+        with self._lock:
+            state = self._state(platform)
+            if state.half_open:
+                return False
+            if state.open_until:
+                if time.monotonic() < state.open_until:
+                    return False
+                # Pausa vencida: se deja pasar un solo trabajo de prueba
+                state.open_until = 0.0
+                state.half_open = True
+                return True
+            return state.active < state.limit
+
+    def started(self, platform):
+        with self._lock:
+            self._state(platform).active += 1
+
+    def succeeded(self, platform, rate=None):
+        """Registra una descarga correcta con su velocidad media en bytes/s"""
+        with self._lock:
+            state = self._state(platform)
+            state.active = max(0, state.active - 1)
+            state.failures = 0
+            if state.half_open:
+                state.half_open = False
+                state.open_seconds = self.open_seconds
+            if rate:
+                # Velocidad agregada aproximada con las descargas en curso
+                aggregate = rate * (state.active + 1)
+                if aggregate > state.best_rate * 1.05 and state.limit < self.max_limit:
+                    state.limit += 1
+                    LIMIT_GAUGE.set(state.limit, platform=platform)
+                state.best_rate = max(aggregate, state.best_rate * 0.98)
+
+    def failed(self, platform, kind):
+        """Registra un fallo; devuelve los segundos de pausa si se abrió el circuito"""
+        with self._lock:
+            state = self._state(platform)
+            state.active = max(0, state.active - 1)
+            if kind is None:
+                # Un error del contenido no dice nada del servidor: no cuenta como fallo,
+                # pero tampoco prueba que la plataforma responda. Si era el trabajo de
+                # prueba, el circuito se vuelve a abrir con la misma espera.
+                if not state.half_open:
+                    return 0
+                state.half_open = False
+                state.open_until = time.monotonic() + state.open_seconds
+                return state.open_seconds
+            state.limit = max(self.min_limit, state.limit // 2)
+            state.best_rate *= 0.5
+            LIMIT_GAUGE.set(state.limit, platform=platform)
+            state.failures += 1
+            if state.half_open or state.failures >= self.failure_threshold:
+                if state.half_open:
+                    state.open_seconds = min(state.open_seconds * 2, self.max_open_seconds)
+                state.half_open = False
+                state.failures = 0
+                state.open_until = time.monotonic() + state.open_seconds
+                CIRCUIT_OPEN_TOTAL.inc(platform=platform)
+                return state.open_seconds
+            return 0
+
+    def paused_for(self, platform):
+        """Segundos que faltan para que la plataforma vuelva a aceptar trabajos"""
+        with self._lock:
+            state = self._state(platform)
+            return max(0.0, state.open_until - time.monotonic()) if state.open_until else 0.0
+
+    def retry_delay(self, attempt):
+        """Espera exponencial con jitter para el reintento número ``attempt`` (desde 1)"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.5)
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            return {platform: {
+                'limit': state.limit,
+                'active': state.active,
+                'paused_seconds': max(0, round(state.open_until - now)) if state.open_until else 0,
+            } for platform, state in self._states.items()}
@@ -0,0 +1,83 @@
+import os
+import json
+import threading
+from collections import deque
+from datetime import datetime
+
+
+class DownloadHistory:
+    """Historial de descargas terminadas guardado como JSON por líneas.
+
+    El archivo solo se amplía al final, así que registrar una descarga no
+    reescribe el historial completo. En memoria se guarda únicamente el índice
+    de URLs normalizadas a su registro más reciente.
+    """
+
+    def __init__(self, history_file=None):
+        if history_file is None:
+            history_file = os.path.join(os.path.expanduser("~"), ".media_downloader_cache", "history.jsonl")
+        self.history_file = history_file
+        self._lock = threading.Lock()
+        self._by_url = None
+        self.appended = 0  # registros agregados desde que se abrió el historial
+
+    def _index(self):
+        """Índice de URLs; se carga al primer uso recorriendo el archivo línea por línea"""
+        if self._by_url is None:
+            by_url = {}
+            for record in self.iter_records():
+                by_url[record['url']] = record
+            self._by_url = by_url
+        return self._by_url
+
+    def iter_records(self):
+        """Recorre los registros del historial desde el más antiguo"""
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(record, dict) and 'url' in record:
+                        yield record
+        except FileNotFoundError:
+            return
+
+    def record(self, url, media_type, title=None, filename=None, status="completed"):
+        """Agrega una descarga al historial"""
+        entry = {
+            'url': url,
+            'media_type': media_type,
+            'title': title,
+            'filename': filename,
+            'status': status,
+            'date': datetime.now().isoformat(),
+        }
+        with self._lock:
+            os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
+            with open(self.history_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._index()[url] = entry
+            self.appended += 1
+        return entry
+
+    def page(self, offset, limit):
+        """Devuelve hasta ``limit`` registros saltando los ``offset`` más recientes.
+
+        Recorre el archivo guardando solo una ventana de ``offset + limit``
+        registros, así que la memoria no depende del tamaño del historial.
+        """
+        window = deque(self.iter_records(), maxlen=offset + limit)
+        newest_first = list(reversed(window))
+        return newest_first[offset:offset + limit]
+
+    def get(self, url):
+        """Devuelve el último registro de una URL normalizada"""
+        with self._lock:
+            return self._index().get(url)
+
+    def completed_urls(self):
+        """Devuelve {url: registro} de las descargas completadas"""
+        with self._lock:
+            return {url: r for url, r in self._index().items() if r.get('status') == 'completed'}
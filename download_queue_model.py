@@ -0,0 +1,340 @@
+from PyQt5.QtCore import (Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel, QTimer,
+                          QRect, QSize, pyqtSignal)
+from PyQt5.QtGui import QColor, QPainter, QFontMetrics
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle
+
+UrlRole = Qt.UserRole + 1
+StateRole = Qt.UserRole + 2
+ProgressRole = Qt.UserRole + 3
+StatusRole = Qt.UserRole + 4
+GroupRole = Qt.UserRole + 5
+DetailRole = Qt.UserRole + 6
+
+STATE_LABELS = {
+    'pending': "En cola",
+    'downloading': "Descargando",
+    'completed': "Completadas",
+    'error': "Con error",
+}
+FINISHED_STATES = ('completed', 'error')
+
+
+class QueueRow:
+    __slots__ = ('url', 'title', 'media_type', 'state', 'progress', 'status', 'speed', 'eta', 'group')
+
+    def __init__(self, url, media_type, group="", title=None, state='pending', status="En cola..."):
+        self.url = url
+        self.title = title
+        self.media_type = media_type
+        self.state = state
+        self.progress = 100 if state in FINISHED_STATES else 0
+        self.status = status
+        self.speed = 0.0
+        self.eta = None
+        self.group = group
+
+
+def format_eta(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+class DownloadQueueModel(QAbstractListModel):
+    """Modelo de la cola de descargas para una vista virtualizada.
+
+    Las filas activas van primero en orden de cola y las terminadas después,
+    de la más nueva a la más vieja. En memoria solo se guardan las últimas
+    ``max_finished`` terminadas; las anteriores se leen del historial en
+    disco por páginas cuando la vista llega al final (fetchMore). Las
+    terminadas en esta sesión no siempre tienen registro (una descarga
+    cancelada antes de empezar, una URL repetida), así que la posición en el
+    historial se calcula con los registros agregados durante la sesión más
+    las filas ya leídas de él, no con la cantidad de filas terminadas; las de
+    la sesión descartadas de memoria se vuelven a leer de ahí. Las
+    actualizaciones de progreso se acumulan y se notifican juntas cada
+    ``flush_interval_ms``.
+    """
+    summary_changed = pyqtSignal()
+
+    def __init__(self, history, max_finished=200, page_size=50, flush_interval_ms=100, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.max_finished = max_finished
+        self.page_size = page_size
+        self._rows = []
+        self._by_url = {}
+        self._positions = {}         # fila activa -> índice en _rows
+        self._finished_start = 0     # índice de la primera fila terminada
+        self._history_loaded = 0     # filas en memoria leídas del historial (siempre al final)
+        self._history_appended = history.appended
+        self._session_trimmed = 0    # filas terminadas en esta sesión ya descartadas de memoria
+        self._history_exhausted = False
+        self._dirty = set()
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(flush_interval_ms)
+        self.flush_timer.timeout.connect(self._flush)
+
+    # --- API de Qt ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return row.title or row.url
+        if role == Qt.ToolTipRole or role == UrlRole:
+            return row.url
+        if role == StateRole:
+            return row.state
+        if role == ProgressRole:
+            return row.progress
+        if role == StatusRole:
+            return row.status
+        if role == GroupRole:
+            return row.group
+        if role == DetailRole:
+            details = []
+            if row.state == 'downloading' and row.speed:
+                details.append(f"{row.speed / 1024 / 1024:.1f} MB/s")
+            if row.state == 'downloading' and row.eta is not None:
+                details.append(f"{format_eta(row.eta)} restantes")
+            return " · ".join(details)
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._history_exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        """Agrega al final la siguiente página del historial en disco"""
+        # Los registros de esta sesión que siguen en memoria ya se muestran como filas terminadas
+        session = max(0, self.history.appended - self._history_appended - self._session_trimmed)
+        offset = session + self._history_loaded
+        records = self.history.page(offset, self.page_size)
+        if len(records) < self.page_size:
+            self._history_exhausted = True
+        if not records:
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(records) - 1)
+        for record in records:
+            state = 'completed' if record.get('status') == 'completed' else 'error'
+            self._rows.append(QueueRow(record['url'], record.get('media_type'), title=record.get('title'),
+                                       state=state, status=record.get('filename') or record.get('date', "")))
+        self._history_loaded += len(records)
+        self.endInsertRows()
+
+    # --- Cola ---
+
+    def contains(self, url):
+        return url in self._by_url
+
+    def active_urls(self, group=None):
+        """URLs de las filas sin terminar, opcionalmente solo las de un lote"""
+        return [url for url, row in self._by_url.items() if group is None or row.group == group]
+
+    def add_jobs(self, urls, media_type, group=""):
+        """Agrega trabajos al final del tramo activo con una sola notificación"""
+        new_rows = [QueueRow(url, media_type, group) for url in urls if url not in self._by_url]
+        if not new_rows:
+            return
+        start = self._finished_start
+        self.beginInsertRows(QModelIndex(), start, start + len(new_rows) - 1)
+        self._rows[start:start] = new_rows
+        for i, row in enumerate(new_rows):
+            self._by_url[row.url] = row
+            self._positions[row] = start + i
+        self._finished_start += len(new_rows)
+        self.endInsertRows()
+        self.summary_changed.emit()
+
+    def update(self, url, **fields):
+        """Cambia campos de una fila activa; la vista se entera en el próximo flush"""
+        row = self._by_url.get(url)
+        if row is None:
+            return
+        for name, value in fields.items():
+            setattr(row, name, value)
+        if row.state == 'pending':
+            row.state = 'downloading'
+            self.summary_changed.emit()
+        self._dirty.add(row)
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def finish(self, url, state, status):
+        """Mueve una fila al principio del tramo de terminadas"""
+        row = self._by_url.pop(url, None)
+        if row is None:
+            return
+        self._dirty.discard(row)
+        row.state = state
+        row.status = status
+        row.progress = 100
+        row.speed = 0.0
+        row.eta = None
+
+        position = self._positions.pop(row)
+        target = self._finished_start - 1
+        if position != target:
+            self.beginMoveRows(QModelIndex(), position, position, QModelIndex(), target + 1)
+            self._rows.insert(target, self._rows.pop(position))
+            self.endMoveRows()
+        self._finished_start -= 1
+        self._renumber(position)
+        changed = self.index(target)
+        self.dataChanged.emit(changed, changed)
+        self._trim_finished()
+        self.summary_changed.emit()
+
+    def remove(self, url):
+        """Quita una fila activa (descargas canceladas)"""
+        row = self._by_url.pop(url, None)
+        if row is None:
+            return
+        self._dirty.discard(row)
+        position = self._positions.pop(row)
+        self.beginRemoveRows(QModelIndex(), position, position)
+        del self._rows[position]
+        self._finished_start -= 1
+        self.endRemoveRows()
+        self._renumber(position)
+        self.summary_changed.emit()
+
+    def _renumber(self, start):
+        """Actualiza las posiciones de las filas activas desde ``start``"""
+        for i in range(start, self._finished_start):
+            self._positions[self._rows[i]] = i
+
+    def _trim_finished(self):
+        """Descarta de memoria las terminadas más viejas; siguen en el historial"""
+        excess = len(self._rows) - self._finished_start - self.max_finished
+        if excess <= 0:
+            return
+        start = len(self._rows) - excess
+        self.beginRemoveRows(QModelIndex(), start, len(self._rows) - 1)
+        del self._rows[start:]
+        self.endRemoveRows()
+        # Las filas del historial están al final: son las primeras en descartarse
+        self._session_trimmed += max(0, excess - self._history_loaded)
+        self._history_loaded = max(0, self._history_loaded - excess)
+        self._history_exhausted = False
+
+    def _flush(self):
+        if not self._dirty:
+            return
+        positions = [self._positions[row] for row in self._dirty]
+        self._dirty.clear()
+        self.dataChanged.emit(self.index(min(positions)), self.index(max(positions)),
+                              [ProgressRole, StatusRole, DetailRole, Qt.DisplayRole])
+
+    def counts(self):
+        """Cantidad de filas en memoria por estado"""
+        counts = dict.fromkeys(STATE_LABELS, 0)
+        for row in self._rows:
+            counts[row.state] += 1
+        return counts
+
+    def group_progress(self, group):
+        """(terminadas, con error, total) de las filas en memoria de un lote"""
+        done = errors = total = 0
+        for row in self._rows:
+            if row.group != group:
+                continue
+            total += 1
+            if row.state == 'completed':
+                done += 1
+            elif row.state == 'error':
+                errors += 1
+        return done, errors, total
+
+
+class DownloadQueueFilter(QSortFilterProxyModel):
+    """Filtra la cola por estado y por lote"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.state = None
+        self.group = None
+
+    def set_state(self, state):
+        self.state = state
+        self.invalidateFilter()
+
+    def set_group(self, group):
+        self.group = group
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.state is None and self.group is None:
+            return True
+        index = self.sourceModel().index(source_row, 0, source_parent)
+        if self.state is not None and index.data(StateRole) != self.state:
+            return False
+        if self.group is not None and index.data(GroupRole) != self.group:
+            return False
+        return True
+
+
+class DownloadItemDelegate(QStyledItemDelegate):
+    """Pinta título, barra de progreso y estado de cada descarga sin widgets por fila"""
+    ROW_HEIGHT = 58
+    STATE_COLORS = {
+        'pending': QColor("#9E9E9E"),
+        'downloading': QColor("#007ACC"),
+        'completed': QColor("#00C853"),
+        'error': QColor("#FF3B30"),
+    }
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        rect = option.rect.adjusted(4, 2, -4, -2)
+        selected = option.state & QStyle.State_Selected
+        painter.fillRect(rect, QColor("#0078d4") if selected else QColor("#2D2D2D"))
+        painter.setPen(QColor("#3D3D3D"))
+        painter.drawRect(rect)
+
+        state = index.data(StateRole)
+        color = self.STATE_COLORS.get(state, QColor("#9E9E9E"))
+        metrics = QFontMetrics(option.font)
+        inner = rect.adjusted(8, 4, -8, -4)
+
+        group = index.data(GroupRole)
+        title = index.data(Qt.DisplayRole)
+        if group:
+            title = f"[{group}] {title}"
+        painter.setPen(QColor("#E0E0E0"))
+        title_rect = QRect(inner.left(), inner.top(), inner.width(), metrics.height())
+        painter.drawText(title_rect, Qt.AlignLeft | Qt.AlignVCenter,
+                         metrics.elidedText(title, Qt.ElideMiddle, title_rect.width()))
+
+        bar = QRect(inner.left(), title_rect.bottom() + 4, inner.width(), 8)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QColor("#3D3D3D"))
+        painter.setBrush(QColor("#1E1E1E"))
+        painter.drawRoundedRect(bar, 3, 3)
+        progress = index.data(ProgressRole) or 0
+        if progress:
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(color)
+            painter.drawRoundedRect(QRect(bar.left(), bar.top(), bar.width() * progress // 100, bar.height()), 3, 3)
+
+        status_rect = QRect(inner.left(), bar.bottom() + 4, inner.width(), metrics.height())
+        detail = index.data(DetailRole)
+        painter.setPen(color)
+        status = index.data(StatusRole) or ""
+        if detail:
+            painter.drawText(status_rect, Qt.AlignRight | Qt.AlignVCenter, detail)
+            status_rect.setRight(status_rect.right() - metrics.horizontalAdvance(detail) - 8)
+        painter.drawText(status_rect, Qt.AlignLeft | Qt.AlignVCenter,
+                         metrics.elidedText(status, Qt.ElideRight, status_rect.width()))
+        painter.restore()
@@ -1,21 +1,18 @@
 from PyQt5.QtCore import QObject, pyqtSignal
-import yt_dlp
+from session_manager import SessionManager
+from metadata_prefetch import MetadataPrefetcher
+from stream_resolver import StreamResolver
+from download_history import DownloadHistory
+from url_router import route_url, normalize_url
+from metrics import DownloadTrace
+from job_registry import JobRegistry
+from concurrency_controller import ConcurrencyController, classify_error
+from progressive_playback import ProgressivePlaybackServer, PROGRESSIVE_OPTIONS
+from utils import clean_title
 import os
 import threading
-import re
 from queue import Queue
-from dataclasses import dataclass
-from typing import Optional, Dict
-
-@dataclass
-class DownloadItem:
-    url: str
-    path: str
-    media_type: str
-    title: Optional[str] = None
-    status: str = "pending"  # pending, downloading, completed, error
-    progress: int = 0
-    download_thread: Optional[threading.Thread] = None
+from collections import deque
 
 class Downloader(QObject):
     progress_signal = pyqtSignal(str, int)  # url, progress
@@ -23,84 +20,230 @@ class Downloader(QObject):
     error_signal = pyqtSignal(str, str)     # url, error message
     status_signal = pyqtSignal(str, str)    # url, status message
     title_signal = pyqtSignal(str, str)     # url, clean title
+    speed_signal = pyqtSignal(str, float, int)  # url, bytes/s, ETA en segundos (-1 si se desconoce)
+    playable_signal = pyqtSignal(str, str)  # url, URL local para verla mientras se descarga
 
     def __init__(self):
         super().__init__()
-        self.downloads: Dict[str, DownloadItem] = {}
+        # Trabajos en curso; los terminados pasan a un archivo de tamaño fijo
+        self.jobs = JobRegistry()
         self._lock = threading.Lock()
+        self.sessions = SessionManager()
+        self.prefetcher = MetadataPrefetcher(self)
+        self.stream_resolver = StreamResolver(self)
+        self.history = DownloadHistory()
+        # Opciones de yt-dlp que se aplican sobre las de cada plataforma (p. ej. media_origin.ytdl_profile)
+        self.extra_options = {}
+        # Proxy para reproducir descargas en curso; se crea con la primera que lo pida
+        self.playback = None
+
+        # Planificador: las descargas esperan en una cola por plataforma hasta que
+        # haya hueco global y el controlador de esa plataforma las admita
+        self.max_concurrent_downloads = 8
+        self.controller = ConcurrencyController()
+        self._pending = {}  # plataforma -> deque de JobRecord
+        self._active = 0
 
     def clean_filename(self, filename: str) -> str:
         """Limpia el nombre del archivo quitando códigos y extensiones"""
-        # Quitar extensión
-        name = os.path.splitext(filename)[0]
-        # Quitar códigos típicos como [1080p], (720p), etc.
-        name = re.sub(r'\[.*?\]|\(.*?\)|\{.*?\}', '', name)
-        # Quitar caracteres especiales y espacios múltiples
-        name = re.sub(r'[^\w\s-]', ' ', name)
-        name = re.sub(r'\s+', ' ', name).strip()
-        return name
-
-    def add_to_queue(self, url: str, download_path: str, media_type: str):
-        """Añade una nueva descarga a la cola"""
+        return clean_title(filename)
+
+    def add_to_queue(self, url: str, download_path: str, media_type: str, progressive: bool = False):
+        """Añade una nueva descarga a la cola.
+
+        Con ``progressive`` se prefiere un formato de un solo archivo y se emite
+        ``playable_signal`` en cuanto hay datos suficientes para empezar a verla.
+        """
+        platform = self.detect_platform(url)
         with self._lock:
-            if url in self.downloads:
+            job = self.jobs.add(url, download_path, media_type, platform)
+            if job is None:
                 self.error_signal.emit(url, "Esta URL ya está en la cola")
                 return
+            job.progressive = progressive and media_type != "Música"
+
+            self._enqueue_locked(job)
+            self._start_pending_locked()
+
+    def add_many(self, urls, download_path: str, media_type: str):
+        """Añade un lote de descargas tomando el candado una sola vez.
+
+        Las URLs que ya están en la cola se omiten sin emitir errores; devuelve
+        la lista de URLs realmente encoladas.
+        """
+        accepted = []
+        with self._lock:
+            for url in urls:
+                job = self.jobs.add(url, download_path, media_type, self.detect_platform(url))
+                if job is None:
+                    continue
+                self._enqueue_locked(job)
+                accepted.append(url)
+            self._start_pending_locked()
+        return accepted
+
+    def queued_urls(self):
+        """Devuelve las URLs normalizadas que están en la cola"""
+        return {normalize_url(url) for url in self.jobs.urls()}
+
+    def _enqueue_locked(self, job):
+        self._pending.setdefault(job.platform, deque()).append(job)
+
+    def _startable_locked(self, job):
+        """Indica si una entrada de la cola sigue siendo un trabajo que hay que arrancar"""
+        # Una URL cancelada y vuelta a añadir es otro trabajo: la entrada vieja se descarta
+        return self.jobs.get(job.url) is job and job.status == 'pending' and job.thread is None
+
+    def _start_pending_locked(self):
+        """Inicia descargas pendientes hasta llenar los huecos libres.
+
+        Las plataformas se recorren por turnos, una descarga por plataforma en
+        cada vuelta, para que ninguna acapare los huecos globales.
+        """
+        started = True
+        while started and self._active < self.max_concurrent_downloads:
+            started = False
+            for platform in list(self._pending):
+                if self._active >= self.max_concurrent_downloads:
+                    break
+                queue = self._pending[platform]
+                while queue and not self._startable_locked(queue[0]):
+                    queue.popleft()
+                if not queue:
+                    del self._pending[platform]
+                    continue
+                if not self.controller.can_start(platform):
+                    continue
+                self._launch_locked(queue.popleft())
+                started = True
+                if not queue:
+                    del self._pending[platform]
+
+    def _launch_locked(self, job):
+        # El nombre del hilo identifica la descarga en la consola
+        download_thread = threading.Thread(target=self._download_worker, args=(job,), name=job.url)
+        download_thread.daemon = True
+        job.thread = download_thread
+        self._active += 1
+        self.controller.started(job.platform)
+        download_thread.start()
+
+    def _wake_scheduler(self):
+        """Reintenta arrancar pendientes cuando vence una pausa de plataforma"""
+        with self._lock:
+            self._start_pending_locked()
+
+    def _requeue(self, job):
+        """Devuelve a la cola un trabajo que espera su reintento"""
+        with self._lock:
+            if self.jobs.get(job.url) is not job or job.status != 'pending':
+                return
+            self._enqueue_locked(job)
+            self._start_pending_locked()
 
-            download_item = DownloadItem(url=url, path=download_path, media_type=media_type)
-            self.downloads[url] = download_item
+    def snapshot(self):
+        """Devuelve una copia del estado de las descargas en curso y de las últimas terminadas"""
+        return self.jobs.snapshot()
 
-            # Iniciar thread de descarga
-            download_thread = threading.Thread(target=self._download_worker, args=(url,))
-            download_thread.daemon = True
-            self.downloads[url].download_thread = download_thread
-            download_thread.start()
+    def job_status(self, url):
+        """Estado de una URL en curso o terminada recientemente; None si no se conoce"""
+        return self.jobs.find(url)
 
     def cancel_download(self, url: str):
         """Cancela una descarga específica"""
         with self._lock:
-            if url in self.downloads:
-                self.downloads[url].status = "cancelled"
-                self.status_signal.emit(url, "Cancelando descarga...")
+            job = self.jobs.get(url)
+            if job is None or not self.jobs.transition(job, 'cancelled'):
+                return
+            if job.thread is None:
+                # Aún no empezó: basta con sacarla del registro y de la cola
+                queue = self._pending.get(job.platform)
+                if queue is not None:
+                    try:
+                        queue.remove(job)
+                    except ValueError:
+                        pass  # esperaba un reintento fuera de la cola
+                    if not queue:
+                        del self._pending[job.platform]
+                self.jobs.archive(url)
+                self.error_signal.emit(url, "Descarga cancelada")
+                return
+            self.status_signal.emit(url, "Cancelando descarga...")
 
-    def _download_worker(self, url: str):
-        download_item = self.downloads[url]
+    def _download_worker(self, job):
+        url = job.url
+        platform = job.platform
+        trace = None
+        failure = None       # 'throttle', 'timeout' o None
+        retry_in = None      # segundos hasta el reintento, si se reintenta
         try:
-            platform = self.detect_platform(url)
+            trace = DownloadTrace(url, platform)
             self.status_signal.emit(url, f"Detectada plataforma: {platform}")
 
-            ydl_opts = self.get_platform_options(platform, download_item.media_type)
-            ydl_opts['progress_hooks'] = [lambda d: self._progress_hook(url, d)]
-            ydl_opts['outtmpl'] = os.path.join(download_item.path, '%(title)s.%(ext)s')
+            ydl_opts = self.get_platform_options(platform, job.media_type)
+            ydl_opts['outtmpl'] = os.path.join(job.path, '%(title)s.%(ext)s')
+            if job.progressive:
+                ydl_opts.update(PROGRESSIVE_OPTIONS)
+                self._playback_server().register(url)
+
+            def progress_hook(d):
+                trace.on_progress(d)
+                if job.progressive and self.playback.feed(url, d):
+                    self.playable_signal.emit(url, self.playback.url_for(url))
+                self._progress_hook(url, d)
 
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                if download_item.status == "cancelled":
+            with self.sessions.acquire(ydl_opts, progress_hook=progress_hook,
+                                       postprocessor_hook=trace.on_postprocess,
+                                       log_hook=trace.on_log) as ydl:
+                if job.status == 'cancelled':
                     self.error_signal.emit(url, "Descarga cancelada")
                     return
 
                 self.status_signal.emit(url, "Obteniendo información...")
-                info = ydl.extract_info(url, download=False)
+                with trace.phase('extraccion'):
+                    # Reutilizar la información precargada al pegar la URL
+                    info = self.prefetcher.take(url)
+                    if info is None:
+                        info = ydl.extract_info(url, download=False, process=False)
+                if not info:
+                    # Con ignoreerrors yt-dlp devuelve None: el motivo real (p. ej. un 429) está en el log
+                    raise Exception(trace.last_error or "No se pudo obtener información del video")
 
                 # Emitir título limpio
                 if info.get('title'):
                     clean_title = self.clean_filename(info['title'])
                     self.title_signal.emit(url, clean_title)
-                    download_item.title = clean_title
+                    job.title = clean_title
 
-                if download_item.status == "cancelled":
+                if not self.jobs.transition(job, 'downloading'):
                     self.error_signal.emit(url, "Descarga cancelada")
                     return
 
-                download_item.status = "downloading"
-                ydl.download([url])
+                # El hook de postproceso corta esta fase mientras corre FFmpeg
+                trace.start('transferencia')
+                ydl.process_ie_result(info, download=True)
+                trace.stop('transferencia')
+                trace.stop('postproceso')
+                # Con ignoreerrors yt-dlp no lanza excepciones: solo registra el error
+                if not trace.bytes and trace.last_error:
+                    raise Exception(trace.last_error)
 
-                if download_item.status != "cancelled":
-                    download_item.status = "completed"
-                    final_filename = f"{download_item.title}.{'mp3' if download_item.media_type == 'Música' else 'mp4'}"
+                if self.jobs.transition(job, 'completed'):
+                    final_filename = f"{job.title}.{'mp3' if job.media_type == 'Música' else 'mp4'}"
+                    self.history.record(normalize_url(url), job.media_type,
+                                        job.title, final_filename)
                     self.finished_signal.emit(url, final_filename)
 
         except Exception as e:
             error_msg = str(e)
+            failure = classify_error(error_msg)
+            if failure and job.attempts < self.controller.max_retries and self.jobs.transition(job, 'pending'):
+                job.attempts += 1
+                retry_in = self.controller.retry_delay(job.attempts)
+                self.status_signal.emit(url, f"Reintentando en {retry_in:.0f} s "
+                                             f"(intento {job.attempts}/{self.controller.max_retries})...")
+                return
+
             if "unavailable video" in error_msg.lower():
                 error_msg = "El video no está disponible o es privado"
             elif "copyright" in error_msg.lower():
@@ -108,24 +251,64 @@ class Downloader(QObject):
             elif "cookies" in error_msg.lower():
                 error_msg = "Se requiere inicio de sesión para este contenido"
 
-            download_item.status = "error"
+            if not self.jobs.transition(job, 'error'):
+                return
+            self.history.record(normalize_url(url), job.media_type,
+                                job.title, status="error")
             self.error_signal.emit(url, error_msg)
         finally:
-            if download_item.status == "cancelled":
-                del self.downloads[url]
+            if trace is not None:
+                job.timings = trace.finish('retry' if retry_in is not None else job.status)
+            if job.status == 'completed':
+                self.controller.succeeded(platform, trace.rate())
+                pause = 0
+            else:
+                pause = self.controller.failed(platform, failure)
+            if job.progressive and retry_in is None:
+                self.playback.finish(url, job.status == 'completed')
+            with self._lock:
+                if retry_in is not None:
+                    job.thread = None
+                    timer = threading.Timer(retry_in, self._requeue, args=(job,))
+                    timer.daemon = True
+                    timer.start()
+                else:
+                    self.jobs.archive(url)
+                self._active -= 1
+                self._start_pending_locked()
+            if pause:
+                print(f"Demasiados errores en {platform}: pausa de {pause:.0f} s")
+                timer = threading.Timer(pause, self._wake_scheduler)
+                timer.daemon = True
+                timer.start()
+
+    def _playback_server(self):
+        with self._lock:
+            if self.playback is None:
+                self.playback = ProgressivePlaybackServer()
+            return self.playback
+
+    def close(self):
+        """Libera las sesiones de yt-dlp compartidas y el proxy de reproducción"""
+        self.sessions.close_all()
+        if self.playback is not None:
+            self.playback.stop()
 
     def _progress_hook(self, url: str, d):
-        if d['status'] == 'downloading' and url in self.downloads:
+        job = self.jobs.get(url)
+        if d['status'] == 'downloading' and job is not None:
             try:
                 total = d.get('total_bytes', 0) or d.get('total_bytes_estimate', 0)
                 downloaded = d.get('downloaded_bytes', 0)
                 if total > 0:
                     progress = (downloaded / total) * 100
-                    self.downloads[url].progress = int(progress)
+                    job.progress = int(progress)
                     self.progress_signal.emit(url, int(progress))
 
                     status_msg = f"Descargando... {int(progress)}%"
                     speed = d.get('speed', 0)
+                    eta = d.get('eta')
+                    self.speed_signal.emit(url, float(speed or 0), int(eta) if eta is not None else -1)
                     if speed:
                         speed_mb = speed / 1024 / 1024
                         status_msg += f" ({speed_mb:.1f} MB/s)"
@@ -135,38 +318,8 @@ class Downloader(QObject):
                 print(f"Error en progress_hook: {str(e)}")
 
     def detect_platform(self, url):
-        url = url.lower()
-        streamers = {
-            'streamwish.to': 'Streamwish',
-            'filemoon.sx': 'Filemoon',
-            'streamtape.com': 'Streamtape',
-            'doodstream.com': 'Doodstream',
-            'dooodster.com': 'Doodstream',  # Alias para doodstream
-            'dood.': 'Doodstream',          # Captura todos los subdominios dood.*
-            'streamlare.com': 'Streamlare',
-            'uqload.com': 'Uqload',
-            'voe.sx': 'Voe',
-            'upstream.to': 'Upstream'
-        }
-
-        for domain, platform in streamers.items():
-            if domain in url:
-                return platform
-
-        if 'tiktok.com' in url:
-            return 'TikTok'
-        elif 'instagram.com' in url:
-            return 'Instagram'
-        elif 'facebook.com' in url or 'fb.watch' in url:
-            return 'Facebook'
-        elif 'twitter.com' in url or 'x.com' in url:
-            return 'Twitter'
-        elif 'cuevana' in url:
-            return 'Cuevana'
-        elif 'youtube.com' in url or 'youtu.be' in url:
-            return 'YouTube'
-        else:
-            return 'Unknown'
+        """Detecta la plataforma a partir del host de la URL"""
+        return route_url(url).platform
 
     def get_platform_options(self, platform, media_type):
         common_opts = {
@@ -237,9 +390,11 @@ class Downloader(QObject):
         if platform in ['Facebook', 'Instagram'] or platform in ['Streamwish', 'Filemoon', 'Streamtape', 'Doodstream']:
             common_opts.update({
                 'cookiesfrombrowser': ['chrome'],
+                'cookie_platform': platform,  # SessionManager presta solo las cookies de sus dominios
                 'http_headers': platform_configs.get(platform, {}).get('http_headers', {
                     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
                 })
             })
 
+        common_opts.update(self.extra_options)
         return common_opts
\ No newline at end of file
@@ -0,0 +1,271 @@
+"""Búsqueda de archivos duplicados en las carpetas de la biblioteca.
+
+Las descargas repetidas con títulos apenas distintos terminan en archivos
+idénticos con otro nombre. Se comparan en tres etapas, cada una sobre lo
+que sobrevivió a la anterior: tamaño (solo ``stat``), un hash parcial del
+principio, medio y final del archivo, y recién entonces el hash completo.
+La lectura se hace en un pool de hilos y los hashes se guardan por
+(dispositivo, inodo, mtime, tamaño), así que volver a buscar sobre una
+biblioteca que no cambió no lee los archivos otra vez.
+"""
+import os
+import json
+import hashlib
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+HASH_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".media_downloader_cache", "hashes.json")
+PARTIAL_CHUNK = 64 * 1024          # bytes leídos en cada una de las tres posiciones
+FULL_CHUNK = 1024 * 1024
+DEFAULT_WORKERS = 8
+# Solo se comparan medios: no los .part de descargas en curso, miniaturas ni listas .m3u8
+MEDIA_EXTENSIONS = {'.mp4', '.mkv', '.webm', '.avi', '.mov', '.flv', '.m4v', '.ts',
+                    '.mp3', '.m4a', '.aac', '.opus', '.ogg', '.flac', '.wav'}
+
+
+class HashCache:
+    """Hashes ya calculados, válidos mientras el archivo no cambie"""
+
+    def __init__(self, path=HASH_CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        try:
+            with open(path, 'r') as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    @staticmethod
+    def _key(stat):
+        return f"{stat.st_dev}:{stat.st_ino}"
+
+    def get(self, stat, kind):
+        with self._lock:
+            entry = self._entries.get(self._key(stat))
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return entry.get(kind)
+        return None
+
+    def put(self, stat, kind, digest):
+        key = self._key(stat)
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry or entry['mtime_ns'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+                entry = self._entries[key] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+            entry[kind] = digest
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(entries, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"No se pudo guardar el caché de hashes: {str(e)}")
+
+
+class DuplicateGroup:
+    """Archivos con el mismo contenido; el primero es el que se conserva"""
+
+    def __init__(self, size, paths, stats=None):
+        self.size = size
+        self.paths = paths
+        self.stats = stats or {}  # ruta -> os.stat_result del momento de la búsqueda
+
+    @property
+    def keep(self):
+        return self.paths[0]
+
+    @property
+    def extras(self):
+        return self.paths[1:]
+
+    @property
+    def reclaimable(self):
+        return self.size * (len(self.paths) - 1)
+
+
+def _partial_hash(path, size):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        # Principio, medio y final: los contenedores de video comparten cabeceras
+        for offset in sorted({0, max(0, size // 2 - PARTIAL_CHUNK // 2), max(0, size - PARTIAL_CHUNK)}):
+            f.seek(offset)
+            digest.update(f.read(PARTIAL_CHUNK))
+    return digest.hexdigest()
+
+
+def _full_hash(path, size):
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(FULL_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _scan_files(directories):
+    """Tamaño -> [(ruta, stat)], con un solo archivo por inodo (los enlaces ya no ocupan)"""
+    by_size = defaultdict(list)
+    seen_inodes = set()
+    for directory in directories:
+        for root, _, names in os.walk(directory):
+            for name in names:
+                if os.path.splitext(name)[1].lower() not in MEDIA_EXTENSIONS:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if stat.st_size == 0:
+                    continue
+                # FAT/exFAT y algunos recursos SMB informan st_ino 0: ahí no se puede saber
+                if stat.st_ino:
+                    inode = (stat.st_dev, stat.st_ino)
+                    if inode in seen_inodes:
+                        continue
+                    seen_inodes.add(inode)
+                by_size[stat.st_size].append((path, stat))
+    return by_size
+
+
+def _refine(groups, kind, hash_func, cache, executor):
+    """Divide cada grupo según el hash ``kind``; descarta los que quedan solos"""
+    def digest_of(item):
+        path, stat = item
+        # Sin número de inodo la clave del caché no identifica al archivo
+        use_cache = cache is not None and stat.st_ino != 0
+        digest = cache.get(stat, kind) if use_cache else None
+        if digest is None:
+            try:
+                digest = hash_func(path, stat.st_size)
+            except OSError as e:
+                print(f"No se pudo leer {path}: {str(e)}")
+                return None
+            if use_cache:
+                cache.put(stat, kind, digest)
+        return digest
+
+    items = [item for group in groups for item in group]
+    buckets = defaultdict(list)
+    for item, digest in zip(items, executor.map(digest_of, items)):
+        if digest is not None:
+            buckets[(item[1].st_size, digest)].append(item)
+    return [bucket for bucket in buckets.values() if len(bucket) > 1]
+
+
+def find_duplicates(directories, cache=None, workers=DEFAULT_WORKERS, progress=None):
+    """Grupos de archivos idénticos, los que más espacio liberan primero.
+
+    ``progress(mensaje)`` se llama al terminar cada etapa.
+    """
+    report = progress or (lambda message: None)
+    by_size = _scan_files(directories)
+    groups = [group for group in by_size.values() if len(group) > 1]
+    report(f"{sum(len(g) for g in by_size.values())} archivos, "
+           f"{sum(len(g) for g in groups)} con tamaño repetido")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        groups = _refine(groups, 'partial', _partial_hash, cache, executor)
+        report(f"{sum(len(g) for g in groups)} coinciden en el hash parcial")
+        groups = _refine(groups, 'full', _full_hash, cache, executor)
+    if cache:
+        cache.save()
+
+    result = []
+    for group in groups:
+        # Se conserva el más antiguo: las copias suelen ser descargas repetidas
+        group.sort(key=lambda item: (item[1].st_mtime_ns, item[0]))
+        result.append(DuplicateGroup(group[0][1].st_size, [path for path, _ in group], dict(group)))
+    result.sort(key=lambda group: group.reclaimable, reverse=True)
+    return result
+
+
+def reclaimable_bytes(groups):
+    return sum(group.reclaimable for group in groups)
+
+
+def _unchanged(group):
+    """Indica si los archivos del grupo siguen como en la búsqueda (puede haber pasado un rato)"""
+    try:
+        current = {path: os.stat(path) for path in group.paths}
+    except OSError:
+        return False
+    for path, stat in current.items():
+        before = group.stats.get(path)
+        if before is None or (stat.st_size, stat.st_mtime_ns) != (before.st_size, before.st_mtime_ns):
+            return False
+    keep = current[group.keep]
+    # Una copia que ya es el mismo inodo que el conservado no es una copia
+    return all(not keep.st_ino or (stat.st_dev, stat.st_ino) != (keep.st_dev, keep.st_ino)
+               for path, stat in current.items() if path != group.keep)
+
+
+def link_duplicates(groups):
+    """Reemplaza cada copia por un enlace duro al archivo conservado.
+
+    Devuelve ``(bytes liberados, errores)``; las copias en otro disco se dejan,
+    y los grupos que cambiaron desde la búsqueda no se tocan.
+    """
+    freed, errors = 0, []
+    for group in groups:
+        if not _unchanged(group):
+            errors.append(f"{group.keep}: los archivos cambiaron desde la búsqueda")
+            continue
+        for path in group.extras:
+            temp_path = path + ".dedupe-tmp"
+            try:
+                os.link(group.keep, temp_path)
+                os.replace(temp_path, path)  # atómico: la ruta nunca deja de existir
+                freed += group.size
+            except OSError as e:
+                errors.append(f"{path}: {str(e)}")
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+    return freed, errors
+
+
+def delete_duplicates(groups):
+    """Elimina las copias y conserva un archivo por grupo; devuelve ``(bytes liberados, errores)``"""
+    freed, errors = 0, []
+    for group in groups:
+        if not _unchanged(group):
+            errors.append(f"{group.keep}: los archivos cambiaron desde la búsqueda")
+            continue
+        for path in group.extras:
+            try:
+                os.remove(path)
+                freed += group.size
+            except OSError as e:
+                errors.append(f"{path}: {str(e)}")
+    return freed, errors
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def format_report(groups, limit=20):
+    lines = [f"{len(groups)} grupos de duplicados, {format_size(reclaimable_bytes(groups))} recuperables"]
+    for group in groups[:limit]:
+        lines.append(f"{format_size(group.reclaimable):>10}  se conserva {group.keep}")
+        lines.extend(f"{'':>10}    copia {path}" for path in group.extras)
+    if len(groups) > limit:
+        lines.append(f"... y {len(groups) - limit} grupos más")
+    return "\n".join(lines)
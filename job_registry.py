@@ -0,0 +1,123 @@
+import time
+import threading
+from collections import deque
+
+# Transiciones permitidas entre estados de un trabajo
+TRANSITIONS = {
+    'pending': {'pending', 'downloading', 'error', 'cancelled'},     # pending: reintento tras fallar la extracción
+    'downloading': {'pending', 'completed', 'error', 'cancelled'},  # pending: reintento
+    'completed': set(),
+    'error': set(),
+    'cancelled': set(),
+}
+FINISHED = ('completed', 'error', 'cancelled')
+
+
+class JobRecord:
+    """Estado de una descarga; con __slots__ para que miles de trabajos ocupen poco"""
+    __slots__ = ('url', 'path', 'media_type', 'platform', 'title', 'status', 'progress', 'attempts',
+                 'progressive', 'thread', 'timings', 'finished_at')
+
+    def __init__(self, url, path, media_type, platform=None):
+        self.url = url
+        self.path = path
+        self.media_type = media_type
+        self.platform = platform
+        self.title = None
+        self.status = 'pending'
+        self.progress = 0
+        self.attempts = 0
+        self.progressive = False  # reproducible mientras se descarga
+        self.thread = None
+        self.timings = None
+        self.finished_at = None
+
+    def to_dict(self):
+        return {
+            'url': self.url,
+            'title': self.title,
+            'status': self.status,
+            'progress': self.progress,
+            'media_type': self.media_type,
+            'platform': self.platform,
+            'attempts': self.attempts,
+            'path': self.path,
+            'timings': self.timings,
+        }
+
+
+class JobRegistry:
+    """Registro de trabajos en curso con archivo acotado de los terminados.
+
+    El diccionario de trabajos tiene su propio candado; los cambios de estado
+    usan uno de varios candados repartidos por URL, así que un worker que
+    cambia su estado no compite con los demás. Al terminar, un trabajo pasa
+    al archivo (un deque de tamaño fijo) sin la referencia a su hilo, de modo
+    que la memoria no crece con las descargas completadas.
+    """
+
+    def __init__(self, archive_size=500, lock_stripes=16):
+        self._lock = threading.Lock()
+        self._stripes = [threading.Lock() for _ in range(lock_stripes)]
+        self._jobs = {}
+        self._archive = deque(maxlen=archive_size)
+
+    def _stripe(self, url):
+        return self._stripes[hash(url) % len(self._stripes)]
+
+    def __contains__(self, url):
+        return url in self._jobs
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def get(self, url):
+        return self._jobs.get(url)
+
+    def urls(self):
+        with self._lock:
+            return list(self._jobs)
+
+    def add(self, url, path, media_type, platform=None):
+        """Registra un trabajo nuevo; devuelve None si la URL ya está en curso"""
+        with self._lock:
+            if url in self._jobs:
+                return None
+            job = self._jobs[url] = JobRecord(url, path, media_type, platform)
+            return job
+
+    def transition(self, job, status):
+        """Cambia el estado si la transición es válida; devuelve si se aplicó"""
+        with self._stripe(job.url):
+            if status not in TRANSITIONS[job.status]:
+                return False
+            job.status = status
+            if status in FINISHED:
+                job.finished_at = time.time()
+            return True
+
+    def archive(self, url):
+        """Saca un trabajo terminado del registro y lo guarda en el archivo"""
+        with self._lock:
+            job = self._jobs.pop(url, None)
+            if job is None:
+                return None
+            job.thread = None
+            self._archive.append(job)
+            return job
+
+    def snapshot(self, include_archive=True):
+        """Copia del estado de los trabajos en curso y, opcionalmente, de los archivados"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+            if include_archive:
+                jobs.extend(self._archive)
+        return [job.to_dict() for job in jobs]
+
+    def find(self, url):
+        """Busca una URL en curso o, si no, la última vez que aparece en el archivo"""
+        with self._lock:
+            job = self._jobs.get(url)
+            if job is None:
+                job = next((j for j in reversed(self._archive) if j.url == url), None)
+            return job.to_dict() if job else None
@@ -0,0 +1,158 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from utils import get_media_files
+from search_index import build_index
+from m3u_playlist import iter_entries
+from duplicate_finder import HashCache, find_duplicates
+import os
+import threading
+
+PLAYLIST_PAGE_SIZE = 1000
+
+
+class LibraryLoader(QObject):
+    """Lee las carpetas de la biblioteca en segundo plano.
+
+    Cada petición recibe un número de generación por tipo de medio; la UI solo
+    aplica el resultado de la última, así que una recarga vieja que termine
+    tarde nunca pisa a una más reciente. El índice de búsqueda también se
+    construye en este hilo.
+    """
+    loaded = pyqtSignal(str, int, list, object)  # media_type, generación, archivos, SearchIndex
+
+    def __init__(self):
+        super().__init__()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def request(self, media_type, directory, sort_by):
+        """Programa la lectura de una carpeta y devuelve su generación"""
+        with self._lock:
+            generation = self._generations.get(media_type, 0) + 1
+            self._generations[media_type] = generation
+
+        thread = threading.Thread(target=self._load, args=(media_type, generation, directory, sort_by))
+        thread.daemon = True
+        thread.start()
+        return generation
+
+    def is_current(self, media_type, generation):
+        with self._lock:
+            return self._generations.get(media_type) == generation
+
+    def _load(self, media_type, generation, directory, sort_by):
+        try:
+            files = get_media_files(directory, sort_by)
+        except OSError as e:
+            print(f"Error leyendo {directory}: {str(e)}")
+            files = []
+        if not self.is_current(media_type, generation):
+            return
+        index = build_index(files)
+        if self.is_current(media_type, generation):
+            self.loaded.emit(media_type, generation, files, index)
+
+
+class PlaylistLoader(QObject):
+    """Abre listas .m3u8 en segundo plano, de a páginas.
+
+    La primera página llega enseguida para poder empezar a reproducir; el
+    resto se sigue leyendo y resolviendo contra la biblioteca mientras tanto.
+    Una entrada cuya ruta ya no existe se busca por nombre de archivo en la
+    biblioteca (la carpeta pudo moverse); las que no se encuentran se
+    informan al final sin frenar la carga. La lista de reproducción no admite
+    la misma ruta dos veces: las entradas repetidas se cuentan y se informan.
+    """
+    page_loaded = pyqtSignal(int, list)          # generación, archivos
+    finished = pyqtSignal(int, int, list, int)   # generación, entradas leídas, faltantes (título, ruta), repetidas
+
+    def __init__(self):
+        super().__init__()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def request(self, playlist_path, library_files):
+        """Programa la lectura de una lista y devuelve su generación"""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+
+        thread = threading.Thread(target=self._load, args=(generation, playlist_path, list(library_files)))
+        thread.daemon = True
+        thread.start()
+        return generation
+
+    def is_current(self, generation):
+        with self._lock:
+            return self._generation == generation
+
+    def _load(self, generation, playlist_path, library_files):
+        known = {file['path'] for file in library_files}
+        by_name = {}
+        for file in library_files:
+            by_name.setdefault(file['name'], file['path'])
+
+        page, missing, count, emitted = [], [], 0, False
+        seen, repeated = set(), 0
+        try:
+            for title, path in iter_entries(playlist_path):
+                count += 1
+                resolved = self._resolve(path, known, by_name)
+                if resolved is None:
+                    missing.append((title or os.path.basename(path), path))
+                elif resolved in seen:
+                    repeated += 1
+                else:
+                    seen.add(resolved)
+                    page.append({'name': os.path.basename(resolved), 'path': resolved})
+                if len(page) >= PLAYLIST_PAGE_SIZE:
+                    if not self.is_current(generation):
+                        return
+                    self.page_loaded.emit(generation, page)
+                    page, emitted = [], True
+        except OSError as e:
+            print(f"Error leyendo la lista {playlist_path}: {str(e)}")
+
+        if not self.is_current(generation):
+            return
+        if page or not emitted:
+            self.page_loaded.emit(generation, page)
+        self.finished.emit(generation, count, missing, repeated)
+
+    @staticmethod
+    def _resolve(path, known, by_name):
+        if path in known or "://" in path or os.path.isfile(path):
+            return path
+        # Solo si la ruta ya no existe se busca un archivo del mismo nombre en la biblioteca
+        return by_name.get(os.path.basename(path))
+
+
+class DuplicateScanner(QObject):
+    """Busca duplicados en las carpetas de la biblioteca en segundo plano"""
+    progress = pyqtSignal(str)
+    finished = pyqtSignal(list)  # DuplicateGroup, los que más espacio liberan primero
+
+    def __init__(self):
+        super().__init__()
+        self._running = False
+
+    def is_running(self):
+        return self._running
+
+    def request(self, directories):
+        if self._running:
+            return False
+        self._running = True
+        thread = threading.Thread(target=self._scan, args=(list(directories),))
+        thread.daemon = True
+        thread.start()
+        return True
+
+    def _scan(self, directories):
+        groups = []
+        try:
+            groups = find_duplicates(directories, HashCache(), progress=self.progress.emit)
+        except OSError as e:
+            print(f"Error buscando duplicados: {str(e)}")
+        finally:
+            self._running = False
+        self.finished.emit(groups)
@@ -0,0 +1,153 @@
+import os
+from bisect import bisect_left
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, pyqtSignal
+from search_index import SearchIndex, build_index
+
+PathRole = Qt.UserRole + 1
+
+
+class LibraryModel(QAbstractListModel):
+    """Archivos de una carpeta de la biblioteca, filtrados por la búsqueda.
+
+    El modelo guarda todos los archivos y expone solo las posiciones que
+    coinciden con la búsqueda actual, así que filtrar es reemplazar una lista
+    de enteros: la vista no crea ni destruye widgets por fila. Si recibe una
+    ``Playlist``, la mantiene con las rutas de la biblioteca en el mismo orden.
+    """
+    checked_changed = pyqtSignal()
+
+    def __init__(self, playlist=None, parent=None):
+        super().__init__(parent)
+        self._files = []       # dicts de get_media_files; None si se eliminó
+        self._rows = []        # posiciones de _files visibles, en orden
+        self._doc_ids = {}     # ruta -> posición en _files
+        self._checked = set()  # posiciones marcadas para eliminar
+        self.index = SearchIndex()
+        self.playlist = playlist
+        self.query = ""
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        doc_id = self._rows[index.row()]
+        file = self._files[doc_id]
+        if role == Qt.DisplayRole:
+            return file['name']
+        if role == Qt.CheckStateRole:
+            return Qt.Checked if doc_id in self._checked else Qt.Unchecked
+        if role == Qt.ToolTipRole:
+            return file['path']
+        if role == PathRole:
+            return file['path']
+        return None
+
+    def flags(self, index):
+        return super().flags(index) | Qt.ItemIsUserCheckable
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or not index.isValid():
+            return False
+        doc_id = self._rows[index.row()]
+        if value == Qt.Checked:
+            self._checked.add(doc_id)
+        else:
+            self._checked.discard(doc_id)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        self.checked_changed.emit()
+        return True
+
+    def set_files(self, files, index=None):
+        """Reemplaza el contenido; ``index`` es el índice ya construido en segundo plano"""
+        self.beginResetModel()
+        self._files = [file if isinstance(file, dict) else {'name': os.path.basename(file), 'path': file}
+                       for file in files]
+        self._doc_ids = {file['path']: doc_id for doc_id, file in enumerate(self._files)}
+        self._checked.clear()
+        self.index = index if index is not None else build_index(self._files)
+        self._rows = self._matching_rows()
+        self.endResetModel()
+        if self.playlist is not None:
+            self.playlist.set_paths(file['path'] for file in self._files)
+        self.checked_changed.emit()
+
+    def append_files(self, files):
+        """Agrega archivos al final sin recargar la vista (páginas de una lista grande)"""
+        new_files = []
+        for file in files:
+            if not isinstance(file, dict):
+                file = {'name': os.path.basename(file), 'path': file}
+            if file['path'] not in self._doc_ids:
+                self._doc_ids[file['path']] = len(self._files) + len(new_files)
+                new_files.append(file)
+        if not new_files:
+            return
+        first = len(self._files)
+        self._files.extend(new_files)
+        for doc_id in range(first, len(self._files)):
+            self.index.add(doc_id, self._files[doc_id]['name'], self._files[doc_id].get('tags', ()))
+        # Los ids nuevos son mayores que todos: las filas visibles siguen ordenadas
+        matches = self.index.search(self.query)
+        rows = [doc_id for doc_id in range(first, len(self._files)) if matches is None or doc_id in matches]
+        if rows:
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(rows) - 1)
+            self._rows.extend(rows)
+            self.endInsertRows()
+        if self.playlist is not None:
+            self.playlist.append(file['path'] for file in new_files)
+
+    def set_query(self, text):
+        """Filtra las filas por la búsqueda; con texto vacío se muestran todas"""
+        if text == self.query:
+            return
+        self.query = text
+        self.beginResetModel()
+        self._rows = self._matching_rows()
+        self.endResetModel()
+
+    def _matching_rows(self):
+        matches = self.index.search(self.query)
+        if matches is None:
+            return [doc_id for doc_id, file in enumerate(self._files) if file is not None]
+        return sorted(matches)
+
+    def path(self, row):
+        """Ruta del archivo en una fila visible, o None"""
+        if 0 <= row < len(self._rows):
+            return self._files[self._rows[row]]['path']
+        return None
+
+    def row_for_path(self, path):
+        """Fila visible de un archivo, o -1 si no está o la búsqueda lo oculta"""
+        doc_id = self._doc_ids.get(path)
+        if doc_id is None:
+            return -1
+        # Las filas visibles están en el orden de _files: búsqueda binaria
+        row = bisect_left(self._rows, doc_id)
+        return row if row < len(self._rows) and self._rows[row] == doc_id else -1
+
+    def has_checked(self):
+        return bool(self._checked)
+
+    def checked_paths(self):
+        return [self._files[doc_id]['path'] for doc_id in sorted(self._checked)]
+
+    def remove_paths(self, paths):
+        """Quita de la lista los archivos eliminados del disco, estén visibles o no"""
+        paths = set(paths)
+        removed = {doc_id for doc_id, file in enumerate(self._files) if file and file['path'] in paths}
+        for row in reversed(range(len(self._rows))):
+            if self._rows[row] in removed:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._rows[row]
+                self.endRemoveRows()
+        for doc_id in removed:
+            del self._doc_ids[self._files[doc_id]['path']]
+            self._files[doc_id] = None
+            self._checked.discard(doc_id)
+            self.index.remove(doc_id)
+        if self.playlist is not None:
+            self.playlist.remove(paths)
+        self.checked_changed.emit()
@@ -0,0 +1,164 @@
+import os
+import time
+import logging
+import threading
+from logging.handlers import RotatingFileHandler
+from collections import deque
+
+LEVELS = {'DEBUG': logging.DEBUG, 'INFO': logging.INFO, 'WARNING': logging.WARNING, 'ERROR': logging.ERROR}
+
+
+def detect_level(text, default):
+    """Deduce el nivel de una línea a partir de los prefijos de yt-dlp"""
+    if text.startswith('ERROR:'):
+        return 'ERROR'
+    if text.startswith('WARNING:'):
+        return 'WARNING'
+    if text.startswith('[debug]'):
+        return 'DEBUG'
+    return default
+
+
+class LogRecord:
+    __slots__ = ('seq', 'created', 'level', 'source', 'text')
+
+    def __init__(self, seq, created, level, source, text):
+        self.seq = seq
+        self.created = created
+        self.level = level
+        self.source = source
+        self.text = text
+
+    def format(self):
+        stamp = time.strftime('%H:%M:%S', time.localtime(self.created))
+        return f"{stamp} [{self.level}] {self.text}"
+
+
+class LogSink:
+    """Búfer circular de la salida del programa.
+
+    Las escrituras solo agregan registros a colas acotadas; la consola los
+    recoge por lotes con ``drain``, así que el costo no crece con el tiempo
+    que lleve abierta la aplicación. El origen de cada línea es el nombre del
+    hilo que la escribió (los hilos de descarga llevan el nombre de su URL).
+    """
+
+    max_partial_size = 8192
+
+    def __init__(self, max_lines=5000, log_file=None, max_bytes=5 * 1024 * 1024, backup_count=3):
+        self._lock = threading.Lock()
+        self._records = deque(maxlen=max_lines)
+        self._pending = deque(maxlen=max_lines)
+        self._partial = {}  # id de hilo -> línea incompleta
+        self._seq = 0
+        self.dropped = 0
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.log_file = log_file or os.path.join(
+            os.path.expanduser("~"), ".media_downloader_cache", "logs", "console.log")
+        self._file_logger = None
+
+    @property
+    def max_lines(self):
+        return self._records.maxlen
+
+    def set_max_lines(self, max_lines):
+        """Cambia el límite de líneas conservando las más recientes"""
+        with self._lock:
+            self._records = deque(self._records, maxlen=max_lines)
+            self._pending = deque(self._pending, maxlen=max_lines)
+
+    def set_file_logging(self, enabled):
+        """Activa o desactiva la copia rotativa de la salida en disco"""
+        with self._lock:
+            if enabled and self._file_logger is None:
+                os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+                handler = RotatingFileHandler(self.log_file, maxBytes=self.max_bytes,
+                                              backupCount=self.backup_count, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(source)s: %(message)s'))
+                logger = logging.getLogger('media_downloader.console')
+                logger.propagate = False
+                logger.setLevel(logging.DEBUG)
+                logger.addHandler(handler)
+                self._file_logger = logger
+            elif not enabled and self._file_logger is not None:
+                for handler in list(self._file_logger.handlers):
+                    self._file_logger.removeHandler(handler)
+                    handler.close()
+                self._file_logger = None
+
+    def write(self, text, level='INFO'):
+        """Agrega texto escrito en stdout/stderr, separándolo en líneas"""
+        thread = threading.current_thread()
+        with self._lock:
+            data = self._partial.pop(thread.ident, '') + text
+            lines = data.replace('\r', '\n').split('\n')
+            tail = lines.pop()
+            if len(tail) > self.max_partial_size:
+                lines.append(tail)
+                tail = ''
+            if tail:
+                self._partial[thread.ident] = tail
+            for line in lines:
+                if line.strip():
+                    self._append_locked(detect_level(line, level), thread.name, line)
+
+    def log(self, text, level='INFO', source=None):
+        """Agrega una línea completa sin pasar por stdout"""
+        with self._lock:
+            self._append_locked(level, source or threading.current_thread().name, text)
+
+    def _append_locked(self, level, source, text):
+        self._seq += 1
+        record = LogRecord(self._seq, time.time(), level, source, text)
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._records.append(record)
+        self._pending.append(record)
+        if self._file_logger is not None:
+            self._file_logger.log(LEVELS.get(level, logging.INFO), text, extra={'source': source})
+
+    def drain(self):
+        """Devuelve y vacía los registros nuevos desde la última llamada"""
+        with self._lock:
+            records = list(self._pending)
+            self._pending.clear()
+        return records
+
+    def records(self):
+        """Copia de los registros conservados en el búfer"""
+        with self._lock:
+            return list(self._records)
+
+    def sources(self):
+        """Orígenes distintos presentes en el búfer"""
+        with self._lock:
+            return sorted({r.source for r in self._records})
+
+
+def matches(record, min_level='DEBUG', source=None):
+    """Indica si un registro pasa los filtros de nivel y origen"""
+    if LEVELS.get(record.level, logging.INFO) < LEVELS.get(min_level, logging.DEBUG):
+        return False
+    return source is None or record.source == source
+
+
+class ConsoleRedirect:
+    """Reemplazo de sys.stdout/sys.stderr que escribe en el LogSink"""
+
+    def __init__(self, sink, stream=None, level='INFO'):
+        self.sink = sink
+        self.stream = stream
+        self.level = level
+
+    def write(self, text):
+        self.sink.write(str(text), self.level)
+        if self.stream:
+            self.stream.write(text)
+
+    def flush(self):
+        if self.stream:
+            self.stream.flush()
+
+    def isatty(self):
+        return False
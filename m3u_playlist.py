@@ -0,0 +1,56 @@
+"""Listas de reproducción M3U8 leídas como flujo.
+
+Las entradas se generan a medida que se lee el archivo, así que una lista
+de cientos de miles de pistas no se carga entera en memoria antes de poder
+mostrar la primera página.
+"""
+import os
+from urllib.parse import urlsplit, unquote
+
+M3U_FILE_FILTER = "Listas M3U (*.m3u8 *.m3u);;Todos los archivos (*)"
+
+
+def _location_to_path(location, base_dir):
+    if location.startswith("file://"):
+        return unquote(urlsplit(location).path)
+    if "://" in location:
+        return location  # URL remota: se deja como está
+    return os.path.normpath(os.path.join(base_dir, location))
+
+
+def iter_entries(playlist_path):
+    """Genera ``(título, ruta)`` leyendo el archivo por líneas"""
+    base_dir = os.path.dirname(os.path.abspath(playlist_path))
+    with open(playlist_path, 'r', encoding='utf-8-sig', errors='replace') as f:
+        title = None
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('#'):
+                if line.startswith('#EXTINF:'):
+                    title = line.split(',', 1)[1].strip() if ',' in line else None
+                continue
+            yield title, _location_to_path(line, base_dir)
+            title = None
+
+
+def write_m3u8(playlist_path, paths, titles=None):
+    """Guarda una lista de reproducción; devuelve la cantidad de entradas"""
+    base_dir = os.path.dirname(os.path.abspath(playlist_path))
+    prefix = os.path.join(base_dir, "")
+    count = 0
+    with open(playlist_path, 'w', encoding='utf-8') as f:
+        f.write("#EXTM3U\n")
+        for i, path in enumerate(paths):
+            title = titles[i] if titles else os.path.splitext(os.path.basename(path))[0]
+            if path.startswith(prefix):
+                location = path[len(prefix):]  # caso común, sin el costo de relpath
+            else:
+                try:
+                    location = os.path.relpath(path, base_dir)
+                except ValueError:
+                    location = path  # otra unidad en Windows
+            f.write(f"#EXTINF:-1,{title}\n{location}\n")
+            count += 1
+    return count
@@ -1,75 +1,148 @@
 import sys
+import threading
+import startup_profile
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QTabWidget, QWidget, 
                             QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
                             QLineEdit, QComboBox, QFileDialog, QProgressBar,
-                            QListWidget, QSlider, QCheckBox, QTextEdit, QDialog,
-                            QMessageBox, QListWidgetItem, QGroupBox, QScrollArea, QFrame)
+                            QSlider, QCheckBox, QPlainTextEdit, QDialog,
+                            QMessageBox, QGroupBox, QScrollArea, QFrame,
+                            QMenu, QSpinBox, QInputDialog, QListView)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QObject, QTimer
 from PyQt5.QtGui import QIcon, QFont
-import vlc
 from styles import STYLES
 from downloader import Downloader
+from progressive_playback import PLAYER_OPTIONS
+from stream_resolver import player_options
+from download_queue_model import (DownloadQueueModel, DownloadQueueFilter, DownloadItemDelegate,
+                                  STATE_LABELS, UrlRole, GroupRole)
+from api_server import ControlAPIServer
+from url_router import is_valid_url
+from log_sink import LogSink, ConsoleRedirect, matches
+from bulk_import import extract_urls, read_urls_file, plan_import, IMPORT_FILE_FILTER
 from music_player import MusicPlayer
-from video_player import VideoPlayerWindow
-from utils import create_download_folders, get_media_files
+from readahead import ReadaheadPrefetcher
+from library_model import LibraryModel
+from playback_profiles import PROFILES, DEFAULT_PROFILE, format_stats
+from library_loader import LibraryLoader, PlaylistLoader, DuplicateScanner
+from duplicate_finder import (link_duplicates, delete_duplicates, reclaimable_bytes,
+                              format_report, format_size)
+from m3u_playlist import write_m3u8, M3U_FILE_FILTER
+from utils import create_download_folders
+import metrics
+from sampling_profiler import SamplingProfiler
+from stall_watchdog import StallWatchdog
 import os
 
-class DownloadItemWidget(QWidget):
-    def __init__(self, url, parent=None):
-        super().__init__(parent)
-        self.url = url
-        self.setObjectName("DownloadItemWidget")
-        self.init_ui()
-
-    def init_ui(self):
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(5, 5, 5, 5)
-
-        # Info superior
-        top_layout = QHBoxLayout()
-        self.title_label = QLabel("Obteniendo información...")
-        self.cancel_btn = QPushButton("❌")
-        self.cancel_btn.setFixedSize(24, 24)
-        self.cancel_btn.setProperty("class", "cancel-button")
-
-        top_layout.addWidget(self.title_label, stretch=1)
-        top_layout.addWidget(self.cancel_btn)
-
-        # Barra de progreso
-        self.progress_bar = QProgressBar()
-
-        # Estado
-        self.status_label = QLabel("Iniciando...")
-        self.status_label.setProperty("class", "status-label")
-
-        layout.addLayout(top_layout)
-        layout.addWidget(self.progress_bar)
-        layout.addWidget(self.status_label)
-
+startup_profile.mark("imports")
 
 class ConsoleWindow(QDialog):
-    def __init__(self, parent=None):
+    ALL_SOURCES = "Todas las fuentes"
+
+    def __init__(self, log_sink, parent=None):
         super().__init__(parent)
+        self.log_sink = log_sink
         self.setWindowTitle("Consola del Programador")
         self.setMinimumSize(600, 400)
         self.setStyleSheet(STYLES)
 
         layout = QVBoxLayout()
-        self.console = QTextEdit()
+
+        # Filtros por nivel y por URL, límite de líneas y log en archivo
+        filters_layout = QHBoxLayout()
+        self.level_combo = QComboBox()
+        self.level_combo.addItems(["DEBUG", "INFO", "WARNING", "ERROR"])
+        self.level_combo.setCurrentText("DEBUG")
+        self.source_combo = QComboBox()
+        self.source_combo.addItem(self.ALL_SOURCES)
+        self.source_combo.setMinimumWidth(200)
+        self.max_lines_spin = QSpinBox()
+        self.max_lines_spin.setRange(100, 100000)
+        self.max_lines_spin.setSingleStep(1000)
+        self.max_lines_spin.setValue(log_sink.max_lines)
+        self.file_log_checkbox = QCheckBox("Guardar en archivo")
+
+        filters_layout.addWidget(QLabel("Nivel:"))
+        filters_layout.addWidget(self.level_combo)
+        filters_layout.addWidget(QLabel("Fuente:"))
+        filters_layout.addWidget(self.source_combo, 1)
+        filters_layout.addWidget(QLabel("Máx. líneas:"))
+        filters_layout.addWidget(self.max_lines_spin)
+        filters_layout.addWidget(self.file_log_checkbox)
+
+        self.console = QPlainTextEdit()
         self.console.setReadOnly(True)
         self.console.setObjectName("ConsoleTextEdit") #Added objectName
-        layout.addWidget(self.console)
-        self.setLayout(layout)
+        self.console.setMaximumBlockCount(log_sink.max_lines)
 
-class ConsoleRedirect(QObject):
-    output_written = pyqtSignal(str)
+        # Herramientas de diagnóstico que agrega la ventana principal
+        self.tools_layout = QHBoxLayout()
+        self.tools_layout.addStretch()
 
-    def write(self, text):
-        self.output_written.emit(str(text))
-        sys.__stdout__.write(text)
+        layout.addLayout(filters_layout)
+        layout.addWidget(self.console)
+        layout.addLayout(self.tools_layout)
+        self.setLayout(layout)
 
-    def flush(self):
-        sys.__stdout__.flush()
+        self.level_combo.currentTextChanged.connect(self._reload)
+        self.source_combo.activated.connect(self._reload)
+        self.max_lines_spin.editingFinished.connect(self._set_max_lines)
+        self.file_log_checkbox.toggled.connect(self.log_sink.set_file_logging)
+
+        # Vuelca los registros nuevos por lotes en lugar de uno por escritura
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(200)
+        self.flush_timer.timeout.connect(self._flush)
+
+        self._known_sources = set()
+        self._reload()
+
+    def add_tool_button(self, text, callback):
+        """Agrega un botón de diagnóstico debajo de la consola"""
+        button = QPushButton(text)
+        button.clicked.connect(callback)
+        self.tools_layout.insertWidget(self.tools_layout.count() - 1, button)
+        return button
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._reload()
+        self.flush_timer.start()
+
+    def hideEvent(self, event):
+        self.flush_timer.stop()
+        super().hideEvent(event)
+
+    def _current_source(self):
+        source = self.source_combo.currentText()
+        return None if source == self.ALL_SOURCES else source
+
+    def _append_records(self, records):
+        level = self.level_combo.currentText()
+        source = self._current_source()
+        lines = [r.format() for r in records if matches(r, level, source)]
+        if lines:
+            self.console.appendPlainText("\n".join(lines))
+
+        new_sources = {r.source for r in records} - self._known_sources
+        if new_sources:
+            self._known_sources |= new_sources
+            self.source_combo.addItems(sorted(new_sources))
+
+    def _flush(self):
+        records = self.log_sink.drain()
+        if records:
+            self._append_records(records)
+
+    def _reload(self):
+        """Vuelve a pintar la consola con los filtros actuales"""
+        self.log_sink.drain()
+        self.console.clear()
+        self._append_records(self.log_sink.records())
+
+    def _set_max_lines(self):
+        max_lines = self.max_lines_spin.value()
+        self.log_sink.set_max_lines(max_lines)
+        self.console.setMaximumBlockCount(max_lines)
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -84,25 +157,75 @@ class MainWindow(QMainWindow):
 
         # Inicializar componentes
         self.downloader = Downloader()
-        self.music_player = MusicPlayer()
+        self.prefetcher = ReadaheadPrefetcher()
+        self.music_player = MusicPlayer(prefetcher=self.prefetcher)
+        self.library_loader = LibraryLoader()
+        self.library_loader.loaded.connect(self._on_library_loaded)
+        self._library_lists = {}    # tipo de medio -> (lista, generación pendiente)
+        self._library_files = {}    # tipo de medio -> archivos de la última lectura de su carpeta
+        self.playlist_loader = PlaylistLoader()
+        self.playlist_loader.page_loaded.connect(self._on_playlist_page)
+        self.playlist_loader.finished.connect(self._on_playlist_finished)
+        self._playlist_generation = None
+        self._playlist_first_page = False
+        self.duplicate_scanner = DuplicateScanner()
+        self.duplicate_scanner.progress.connect(lambda message: self.statusBar().showMessage(message))
+        self.duplicate_scanner.finished.connect(self._on_duplicates_found)
+        self._loaded_tabs = set()
         self.download_thread = None
         self.video_window = None
+        self.video_profile = DEFAULT_PROFILE
         self.console_window = None
-        self.console_redirect = ConsoleRedirect()
-        self.console_redirect.output_written.connect(self._update_console)
-        sys.stdout = self.console_redirect
-        sys.stderr = self.console_redirect
-        self.download_widgets = {} # Added for download queue
+        self.profiler = None
+        # Fin del muestreo; se detiene si el perfil se termina a mano
+        self.profile_timer = QTimer(self)
+        self.profile_timer.setSingleShot(True)
+        self.profile_timer.timeout.connect(self._finish_profile)
+        self.stall_watchdog = StallWatchdog(parent=self)
+        self.stall_watchdog.stall_detected.connect(self._on_ui_stall)
+        self.log_sink = LogSink()
+        sys.stdout = ConsoleRedirect(self.log_sink, sys.__stdout__, 'INFO')
+        sys.stderr = ConsoleRedirect(self.log_sink, sys.__stderr__, 'ERROR')
+        self.queue_model = DownloadQueueModel(self.downloader.history, parent=self)
+        self.queue_model.summary_changed.connect(self._schedule_queue_summary)
+        self._batch_counter = 0
+        self.setAcceptDrops(True)
+
+        # Agrupa las recargas de la biblioteca cuando terminan muchas descargas seguidas
+        self.library_refresh_timer = QTimer(self)
+        self.library_refresh_timer.setSingleShot(True)
+        self.library_refresh_timer.setInterval(1000)
+        self.library_refresh_timer.timeout.connect(self._refresh_libraries)
 
         self.init_ui()
 
+        # API local para encolar descargas desde otros programas
+        self.api_server = ControlAPIServer(self.downloader)
+        self.api_server.enqueue_requested.connect(self.queue_download)
+        self.api_server.bulk_enqueue_requested.connect(self._queue_bulk_downloads)
+        self.api_server.cancel_requested.connect(self.cancel_specific_download)
+
         # Conectar señales del downloader
         self.downloader.progress_signal.connect(self._update_download_progress)
         self.downloader.finished_signal.connect(self._download_finished)
         self.downloader.error_signal.connect(self._download_error)
         self.downloader.status_signal.connect(self._update_download_status)
         self.downloader.title_signal.connect(self._update_download_title)
-
+        self.downloader.speed_signal.connect(self._update_download_speed)
+        self.downloader.playable_signal.connect(self._play_while_downloading)
+        self.downloader.stream_resolver.resolved.connect(self._play_stream)
+        self.downloader.stream_resolver.failed.connect(self._stream_failed)
+        self.downloader.prefetcher.preview_ready.connect(self._show_url_preview)
+        self.downloader.prefetcher.preview_failed.connect(self._show_url_preview_error)
+        startup_profile.mark("ventana construida")
+
+    def finish_startup(self):
+        """Segunda etapa del arranque, ejecutada con la ventana ya visible"""
+        startup_profile.mark("ventana visible")
+        self.api_server.start()
+        self.stall_watchdog.start()
+        self._ensure_tab_loaded(self.tabs.currentIndex())
+        startup_profile.mark("servicios iniciados")
 
     def init_ui(self):
         # Widget principal
@@ -123,7 +246,11 @@ class MainWindow(QMainWindow):
         self.delete_btn.hide()  # Ocultar inicialmente
         self.delete_btn.clicked.connect(self._delete_selected_items)
 
+        self.duplicates_btn = QPushButton("Buscar duplicados")
+        self.duplicates_btn.clicked.connect(self._find_duplicates)
+
         right_controls.addWidget(self.console_checkbox)
+        right_controls.addWidget(self.duplicates_btn)
         right_controls.addWidget(self.delete_btn)
         top_layout.addLayout(right_controls)
 
@@ -142,6 +269,20 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(tabs)
         main_widget.setLayout(main_layout)
 
+        self._library_views = {
+            "Videos": self.video_list,
+            "Música": self.music_list,
+            "Películas": self.movies_list,
+        }
+
+        # Las listas de medios se cargan la primera vez que se muestra su pestaña
+        self._tab_loaders = {
+            tabs.indexOf(self.video_list.parentWidget()): self._load_videos,
+            tabs.indexOf(self.music_list.parentWidget()): self._load_music_files,
+            tabs.indexOf(self.movies_list.parentWidget()): self._load_movies,
+        }
+        tabs.currentChanged.connect(self._ensure_tab_loaded)
+
         # Conectar cambio de pestaña para actualizar botón eliminar
         tabs.currentChanged.connect(self._update_delete_button)
         self.console_checkbox.stateChanged.connect(self._toggle_developer_mode)
@@ -150,7 +291,11 @@ class MainWindow(QMainWindow):
         """Activa/desactiva el modo desarrollador"""
         if state == Qt.Checked:
             if not self.console_window:
-                self.console_window = ConsoleWindow(self)
+                self.console_window = ConsoleWindow(self.log_sink, self)
+                self.console_window.add_tool_button("Informe de arranque", self._show_startup_report)
+                self.console_window.add_tool_button("Métricas", self._show_metrics)
+                self.profile_button = self.console_window.add_tool_button("Perfilar...", self._toggle_profiler)
+                self.console_window.add_tool_button("Bloqueos de la UI", self._show_stall_report)
             self.console_window.show()
             print("Modo desarrollador activado")
         else:
@@ -158,60 +303,128 @@ class MainWindow(QMainWindow):
                 self.console_window.hide()
             print("Modo desarrollador desactivado")
 
-    def _update_console(self, text):
-        """Actualiza la consola con nuevo texto"""
-        if self.console_window:
-            self.console_window.console.append(text.rstrip())
+    def _on_ui_stall(self, stall):
+        self.log_sink.log(f"UI bloqueada {stall['duration'] * 1000:.0f} ms en {stall['slot']}", 'WARNING', 'watchdog')
+
+    def _show_stall_report(self):
+        """Escribe en la consola los slots que más bloquearon el bucle de eventos"""
+        report = self.stall_watchdog.report()
+        if not report:
+            self.log_sink.log("Sin bloqueos de la UI registrados", 'INFO', 'watchdog')
+            return
+        self.log_sink.log(f"{'Veces':>6} {'Total ms':>9} {'Máx ms':>8}  Slot", 'INFO', 'watchdog')
+        for entry in report[:20]:
+            self.log_sink.log(f"{entry['count']:6d} {entry['total'] * 1000:9.0f} {entry['max'] * 1000:8.0f}  "
+                              f"{entry['slot']}", 'INFO', 'watchdog')
+        last = self.stall_watchdog.stalls[-1]
+        self.log_sink.log("Pila del último bloqueo:", 'INFO', 'watchdog')
+        for line in last['stack']:
+            self.log_sink.log(f"    {line}", 'INFO', 'watchdog')
+
+    def _toggle_profiler(self):
+        """Inicia un muestreo de todos los hilos o lo termina antes de tiempo"""
+        if self.profiler and self.profiler.running:
+            self._finish_profile()
+            return
+
+        seconds, ok = QInputDialog.getInt(self, "Perfilador", "Segundos a muestrear:", 10, 1, 600)
+        if not ok:
+            return
+        self.profiler = SamplingProfiler()
+        self.profiler.start()
+        self.profile_button.setText("Detener perfil")
+        self.log_sink.log(f"Perfilando todos los hilos durante {seconds} s...", 'INFO', 'perfilador')
+        self.profile_timer.start(seconds * 1000)
+
+    def _finish_profile(self):
+        self.profile_timer.stop()
+        profiler = self.profiler
+        if not profiler or not profiler.running:
+            return
+        profiler.stop()
+        self.profile_button.setText("Perfilar...")
+        self.log_sink.log(f"{profiler.sample_count} muestras en {profiler.duration:.1f} s", 'INFO', 'perfilador')
+        for label, samples in profiler.top(10):
+            self.log_sink.log(f"{samples:6d}  {label}", 'INFO', 'perfilador')
+
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Guardar perfil", "perfil.speedscope.json",
+            "Speedscope (*.json);;Pilas plegadas (*.folded *.txt)")
+        if path:
+            try:
+                profiler.save(path)
+                self.log_sink.log(f"Perfil guardado en {path}", 'INFO', 'perfilador')
+            except OSError as e:
+                self.log_sink.log(f"No se pudo guardar el perfil: {str(e)}", 'ERROR', 'perfilador')
+
+    def _show_metrics(self):
+        """Escribe en la consola las métricas de descarga y los últimos trabajos"""
+        for line in metrics.registry.to_prometheus().splitlines():
+            if not line.startswith("#"):
+                self.log_sink.log(line, 'INFO', 'métricas')
+        for job in list(metrics.registry.recent_jobs)[-10:]:
+            phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in job['phases'].items())
+            self.log_sink.log(f"{job['status']} {job['platform']} {job['url']}: {job['seconds']:.2f}s "
+                              f"({phases}), {job['bytes'] / 1024 / 1024:.1f} MB, "
+                              f"{job['retries']} reintentos", 'INFO', 'métricas')
+
+    def _show_startup_report(self):
+        """Escribe en la consola las etapas del arranque y el costo de los imports"""
+        def run():
+            try:
+                imports = startup_profile.import_report()
+            except Exception as e:
+                self.log_sink.log(f"No se pudo medir los imports: {str(e)}", 'ERROR', 'arranque')
+                imports = None
+            for line in startup_profile.format_report(imports).splitlines():
+                self.log_sink.log(line, 'INFO', 'arranque')
+
+        self.log_sink.log(startup_profile.format_report(), 'INFO', 'arranque')
+        self.log_sink.log("Midiendo imports con -X importtime...", 'INFO', 'arranque')
+        threading.Thread(target=run, daemon=True).start()
+
+    def _ensure_tab_loaded(self, index):
+        """Carga la lista de una pestaña si todavía no se leyó su carpeta"""
+        loader = self._tab_loaders.get(index)
+        if loader and index not in self._loaded_tabs:
+            self._loaded_tabs.add(index)
+            loader()
+
+    def _request_library(self, media_type, list_widget, sort_by):
+        """Pide al cargador en segundo plano la lista de archivos de una carpeta"""
+        directory = os.path.join(self.base_download_path, media_type)
+        generation = self.library_loader.request(media_type, directory, sort_by)
+        self._library_lists[media_type] = (list_widget, generation)
+
+    def _on_library_loaded(self, media_type, generation, files, index):
+        list_widget, expected = self._library_lists.get(media_type, (None, None))
+        if list_widget is not None and generation == expected:
+            self._library_files[media_type] = files
+            self._add_items_to_list(list_widget, files, index)
+            startup_profile.mark(f"lista {media_type} cargada")
+
+    def _current_library(self):
+        """Vista de la biblioteca de la pestaña actual y su tipo de medio, o (None, None)"""
+        current_tab = self.tabs.currentWidget()
+        for media_type, view in self._library_views.items():
+            if view.parentWidget() is current_tab:
+                return view, media_type
+        return None, None
 
     def _update_delete_button(self):
         """Actualiza la visibilidad del botón de eliminar según la pestaña actual"""
-        current_tab = self.tabs.currentWidget()
-        list_widget = None
-
-        if hasattr(current_tab, 'findChild'):
-            list_widget = current_tab.findChild(QListWidget)
-
-        if list_widget:
-            has_checked = False
-            for i in range(list_widget.count()):
-                item = list_widget.item(i)
-                widget = list_widget.itemWidget(item)
-                checkbox = widget.findChild(QCheckBox) if widget else None
-                if checkbox and checkbox.isChecked():
-                    has_checked = True
-                    break
-            self.delete_btn.setVisible(has_checked)
+        view, _ = self._current_library()
+        self.delete_btn.setVisible(bool(view and view.model().has_checked()))
 
     def _delete_selected_items(self):
         """Elimina los elementos seleccionados de la lista actual"""
-        current_tab = self.tabs.currentWidget()
-        list_widget = None
-        media_type = ""
-
-        # Determinar la lista actual y el tipo de medio
-        if hasattr(current_tab, 'findChild'):
-            list_widget = current_tab.findChild(QListWidget)
-            if list_widget == self.video_list:
-                media_type = "Videos"
-            elif list_widget == self.music_list:
-                media_type = "Música"
-            elif list_widget == self.movies_list:
-                media_type = "Películas"
-
-        if not list_widget or not media_type:
+        view, media_type = self._current_library()
+        if not view:
             return
 
-        items_to_delete = []
-        for i in range(list_widget.count()):
-            item = list_widget.item(i)
-            widget = list_widget.itemWidget(item)
-            checkbox = widget.findChild(QCheckBox) if widget else None
-            if checkbox and checkbox.isChecked():
-                name_label = widget.findChild(QLabel) if widget else None
-                if name_label:
-                    items_to_delete.append((i, name_label.text()))
-
-        if not items_to_delete:
+        model = view.model()
+        paths_to_delete = model.checked_paths()
+        if not paths_to_delete:
             return
 
         msg = QMessageBox()
@@ -222,81 +435,84 @@ class MainWindow(QMainWindow):
         msg.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
 
         if msg.exec_() == QMessageBox.Yes:
-            for index, file_name in reversed(items_to_delete):
-                file_path = os.path.join(self.base_download_path, media_type, file_name)
+            deleted = []
+            for file_path in paths_to_delete:
                 try:
                     os.remove(file_path)
-                    list_widget.takeItem(index)
+                    deleted.append(file_path)
                 except Exception as e:
-                    QMessageBox.critical(self, "Error", f"No se pudo eliminar {file_name}: {str(e)}")
+                    QMessageBox.critical(self, "Error", f"No se pudo eliminar {os.path.basename(file_path)}: {str(e)}")
+            model.remove_paths(deleted)
 
             # Actualizar visibilidad del botón después de eliminar
             self._update_delete_button()
 
-    def create_custom_list_item(self, text):
-        """Crea un item personalizado con checkbox para las listas"""
-        # Crear el item principal
-        item = QListWidgetItem()
-        
-        # Crear el widget contenedor
-        widget = QWidget()
-        widget.setObjectName("ListItemWidget")
-        
-        # Crear el layout principal sin márgenes
-        layout = QHBoxLayout(widget)
-        layout.setContentsMargins(4, 4, 4, 4)
-        layout.setSpacing(8)
-        
-        # Crear checkbox
-        checkbox = QCheckBox()
-        checkbox.setFixedSize(20, 20)
-        checkbox.stateChanged.connect(self._update_delete_button)
-        
-        # Crear label
-        name_label = QLabel(text)
-        name_label.setObjectName("ListItemLabel")
-        
-        # Agregar widgets al layout
-        layout.addWidget(checkbox)
-        layout.addWidget(name_label, 1)
-        layout.addStretch()
-        
-        # Establecer una altura fija para el widget
-        widget.setFixedHeight(32)
-        
-        # Configurar el tamaño del item para que coincida con el widget
-        item.setSizeHint(widget.sizeHint())
-        
-        return item, widget
-
-    def _on_track_double_clicked(self, item):
-        """Reproduce una pista de música"""
-        widget = self.music_list.itemWidget(item)
-        if not widget:
+    def _find_duplicates(self):
+        """Busca archivos repetidos en las tres carpetas de la biblioteca"""
+        directories = [os.path.join(self.base_download_path, media_type) for media_type in self._library_views]
+        if self.duplicate_scanner.request(directories):
+            self.duplicates_btn.setEnabled(False)
+            self.statusBar().showMessage("Buscando duplicados...")
+
+    def _on_duplicates_found(self, groups):
+        self.duplicates_btn.setEnabled(True)
+        if not groups:
+            self.statusBar().showMessage("No se encontraron duplicados", 5000)
             return
-
-        name_label = widget.findChild(QLabel)
-        if name_label:
-            clicked_track = name_label.text()
-            # Cargar toda la lista de reproducción
-            music_path = os.path.join(self.base_download_path, "Música")
-            all_tracks = []
-            current_index = 0
-
-            for i in range(self.music_list.count()):
-                item_widget = self.music_list.itemWidget(self.music_list.item(i))
-                track_label = item_widget.findChild(QLabel) if item_widget else None
-                if track_label:
-                    track_name = track_label.text()
-                    track_path = os.path.join(music_path, track_name)
-                    all_tracks.append(track_path)
-                    if track_name == clicked_track:
-                        current_index = i
-
-            # Actualizar la lista de reproducción y reproducir la pista seleccionada
-            if all_tracks:
-                self.music_player.current_playlist = all_tracks
-                self.music_player.play_track(current_index)
+        self.statusBar().clearMessage()
+        report = format_report(groups)
+        self.log_sink.log(report, 'INFO', 'duplicados')
+
+        msg = QMessageBox(self)
+        msg.setIcon(QMessageBox.Question)
+        msg.setWindowTitle("Duplicados")
+        msg.setText(f"{len(groups)} archivos tienen copias; se pueden recuperar "
+                    f"{format_size(reclaimable_bytes(groups))}.")
+        msg.setInformativeText("Se conserva el archivo más antiguo de cada grupo. Un enlace duro "
+                               "mantiene todos los nombres ocupando el espacio de uno solo.")
+        msg.setDetailedText(report)
+        link_btn = msg.addButton("Enlazar copias", QMessageBox.AcceptRole)
+        delete_btn = msg.addButton("Eliminar copias", QMessageBox.DestructiveRole)
+        msg.addButton(QMessageBox.Cancel)
+        msg.exec_()
+
+        if msg.clickedButton() is link_btn:
+            freed, errors = link_duplicates(groups)
+        elif msg.clickedButton() is delete_btn:
+            freed, errors = delete_duplicates(groups)
+            removed = [path for group in groups for path in group.extras if not os.path.exists(path)]
+            for view in self._library_views.values():
+                view.model().remove_paths(removed)
+        else:
+            return
+        for error in errors:
+            self.log_sink.log(f"No se pudo reemplazar {error}", 'ERROR', 'duplicados')
+        self.statusBar().showMessage(f"Se recuperaron {format_size(freed)}"
+                                     + (f", {len(errors)} errores (ver consola)" if errors else ""), 10000)
+
+    def _create_library_view(self, object_name, playlist=None):
+        """Lista de una carpeta de la biblioteca con su modelo filtrable"""
+        view = QListView()
+        view.setObjectName(object_name)
+        view.setUniformItemSizes(True)
+        model = LibraryModel(playlist, view)
+        model.checked_changed.connect(self._update_delete_button)
+        view.setModel(model)
+        return view
+
+    def _create_search_box(self, view):
+        """Campo de búsqueda que filtra la lista en cada tecla"""
+        search = QLineEdit()
+        search.setPlaceholderText("Buscar...")
+        search.setClearButtonEnabled(True)
+        search.textChanged.connect(view.model().set_query)
+        return search
+
+    def _on_track_double_clicked(self, index):
+        """Reproduce una pista de música; la lista de reproducción es la del modelo"""
+        path = self.music_list.model().path(index.row())
+        if path:
+            self.music_player.play_path(path)
 
 
     def create_downloader_tab(self):
@@ -321,6 +537,18 @@ class MainWindow(QMainWindow):
         platform_layout.addWidget(self.platform_detected)
         platform_layout.addStretch()
 
+        # Vista previa de la información de la URL
+        self.url_preview = QLabel("")
+        self.url_preview.setObjectName("UrlPreviewLabel")
+        self.url_preview.setProperty("class", "status-label")
+        self.url_preview.setWordWrap(True)
+
+        # Espera a que el usuario deje de escribir antes de precargar
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(400)
+        self.prefetch_timer.timeout.connect(self._prefetch_url)
+
         # Tipo de medio
         type_layout = QHBoxLayout()
         type_label = QLabel("Tipo:")
@@ -334,30 +562,78 @@ class MainWindow(QMainWindow):
         download_btn.setProperty("class", "primary-button")
         download_btn.clicked.connect(self.start_download)
 
+        # Importación masiva desde archivo o portapapeles
+        import_btn = QPushButton("Importar lista")
+        import_menu = QMenu(import_btn)
+        import_menu.addAction("Desde archivo...", self._import_from_file)
+        import_menu.addAction("Desde portapapeles", self._import_from_clipboard)
+        import_btn.setMenu(import_menu)
+
+        # Ver sin descargar: se resuelve la URL del medio y se abre en el reproductor
+        stream_btn = QPushButton("Ver ahora")
+        stream_btn.clicked.connect(self.stream_now)
+
+        # Reproducir mientras se descarga (prefiere formatos de un solo archivo)
+        self.progressive_checkbox = QCheckBox("Ver mientras se descarga")
+        self.type_combo.currentTextChanged.connect(
+            lambda media_type: self.progressive_checkbox.setEnabled(media_type != "Música"))
+
         controls_layout = QHBoxLayout()
         controls_layout.addLayout(type_layout)
+        controls_layout.addWidget(self.progressive_checkbox)
         controls_layout.addWidget(download_btn)
+        controls_layout.addWidget(stream_btn)
+        controls_layout.addWidget(import_btn)
 
-        # Lista de descargas activas
+        # Cola de descargas: una vista virtualizada que solo pinta las filas visibles
         downloads_group = QGroupBox("Descargas Activas")
         downloads_layout = QVBoxLayout()
-        self.downloads_list = QWidget()
-        self.downloads_list.setObjectName("downloads_list")
-        self.downloads_list_layout = QVBoxLayout(self.downloads_list)
-        self.downloads_list_layout.setSpacing(10)
-        self.downloads_list_layout.addStretch()
-
-        downloads_scroll = QScrollArea()
-        downloads_scroll.setWidget(self.downloads_list)
-        downloads_scroll.setWidgetResizable(True)
-        downloads_scroll.setObjectName("DownloadsScrollArea")
-
-        downloads_layout.addWidget(downloads_scroll)
+
+        queue_filters = QHBoxLayout()
+        self.queue_state_combo = QComboBox()
+        self.queue_state_combo.addItem("Todas", None)
+        for state, label in STATE_LABELS.items():
+            self.queue_state_combo.addItem(label, state)
+        self.queue_group_combo = QComboBox()
+        self.queue_group_combo.addItem("Todos los lotes", None)
+        self.queue_summary = QLabel("")
+        self.queue_summary.setProperty("class", "status-label")
+        queue_filters.addWidget(QLabel("Estado:"))
+        queue_filters.addWidget(self.queue_state_combo)
+        queue_filters.addWidget(QLabel("Lote:"))
+        queue_filters.addWidget(self.queue_group_combo)
+        queue_filters.addWidget(self.queue_summary, 1)
+
+        self.queue_filter = DownloadQueueFilter(self)
+        self.queue_filter.setSourceModel(self.queue_model)
+        self.downloads_view = QListView()
+        self.downloads_view.setObjectName("DownloadsView")
+        self.downloads_view.setModel(self.queue_filter)
+        self.downloads_view.setItemDelegate(DownloadItemDelegate(self.downloads_view))
+        self.downloads_view.setUniformItemSizes(True)
+        self.downloads_view.setSelectionMode(QListView.ExtendedSelection)
+        self.downloads_view.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.downloads_view.customContextMenuRequested.connect(self._show_queue_menu)
+
+        self.queue_state_combo.currentIndexChanged.connect(
+            lambda: self.queue_filter.set_state(self.queue_state_combo.currentData()))
+        self.queue_group_combo.currentIndexChanged.connect(
+            lambda: self.queue_filter.set_group(self.queue_group_combo.currentData()))
+
+        # El resumen se recalcula como mucho una vez por intervalo
+        self.queue_summary_timer = QTimer(self)
+        self.queue_summary_timer.setSingleShot(True)
+        self.queue_summary_timer.setInterval(250)
+        self.queue_summary_timer.timeout.connect(self._update_queue_summary)
+
+        downloads_layout.addLayout(queue_filters)
+        downloads_layout.addWidget(self.downloads_view)
         downloads_group.setLayout(downloads_layout)
 
         # Agregar todo al layout principal
         layout.addLayout(url_layout)
         layout.addLayout(platform_layout)
+        layout.addWidget(self.url_preview)
         layout.addLayout(controls_layout)
         layout.addWidget(downloads_group)
 
@@ -378,14 +654,15 @@ class MainWindow(QMainWindow):
         filter_layout.addWidget(self.video_filter_combo)
 
         # Lista de videos
-        self.video_list = QListWidget()
-        self.video_list.itemDoubleClicked.connect(self._play_video)
-        self.video_list.setObjectName("VideoList") #Added objectName
+        self.video_list = self._create_library_view("VideoList")
+        self.video_list.doubleClicked.connect(self._play_video)
+        self.video_list.selectionModel().currentRowChanged.connect(
+            lambda current, previous: self._prefetch_selection(self.video_list, current.row()))
+        filter_layout.addWidget(self._create_search_box(self.video_list), 1)
 
         layout.addLayout(filter_layout)
         layout.addWidget(self.video_list)
 
-        self._load_videos()
         tab.setLayout(layout)
         return tab
 
@@ -397,15 +674,33 @@ class MainWindow(QMainWindow):
         filter_layout = QHBoxLayout()
         filter_label = QLabel("Ordenar por:")
         self.music_filter_combo = QComboBox()
-        self.music_filter_combo.addItems(["Alfabético", "Fecha", "Aleatorio"])
+        # El orden aleatorio es de la reproducción (botón 🔀), no de la lista
+        self.music_filter_combo.addItems(["Alfabético", "Fecha"])
         self.music_filter_combo.currentTextChanged.connect(self._update_music_list)
         filter_layout.addWidget(filter_label)
         filter_layout.addWidget(self.music_filter_combo)
 
         # Lista de reproducción
-        self.music_list = QListWidget()
-        self.music_list.itemDoubleClicked.connect(self._on_track_double_clicked)
-        self.music_list.setObjectName("MusicList") #Added objectName
+        self.music_list = self._create_library_view("MusicList", self.music_player.current_playlist)
+        self.music_list.doubleClicked.connect(self._on_track_double_clicked)
+        filter_layout.addWidget(self._create_search_box(self.music_list), 1)
+        filter_layout.addWidget(QLabel("Perfil:"))
+        self.music_profile_combo = QComboBox()
+        self.music_profile_combo.addItems(list(PROFILES))
+        self.music_profile_combo.setCurrentText(self.music_player.profile)
+        self.music_profile_combo.currentTextChanged.connect(self.music_player.set_profile)
+        filter_layout.addWidget(self.music_profile_combo)
+        self.music_stats_button = QPushButton("📊")
+        self.music_stats_button.setToolTip("Estadísticas de reproducción")
+        self.music_stats_button.setCheckable(True)
+        self.music_stats_button.toggled.connect(self._toggle_music_stats)
+        filter_layout.addWidget(self.music_stats_button)
+        open_playlist_btn = QPushButton("Abrir lista")
+        open_playlist_btn.clicked.connect(self._open_playlist)
+        filter_layout.addWidget(open_playlist_btn)
+        save_playlist_btn = QPushButton("Guardar lista")
+        save_playlist_btn.clicked.connect(self._save_playlist)
+        filter_layout.addWidget(save_playlist_btn)
 
         # Controles de reproducción
         controls_layout = QHBoxLayout()
@@ -418,6 +713,11 @@ class MainWindow(QMainWindow):
         play_btn.clicked.connect(self.music_player.play_pause)
         next_btn.clicked.connect(self.music_player.next_track)
 
+        shuffle_btn = QPushButton("🔀")
+        shuffle_btn.setToolTip("Reproducción aleatoria")
+        shuffle_btn.setCheckable(True)
+        shuffle_btn.toggled.connect(self.music_player.set_shuffle)
+
         # Control de volumen
         volume_layout = QHBoxLayout()
         volume_label = QLabel("🔈")
@@ -435,6 +735,7 @@ class MainWindow(QMainWindow):
         controls_layout.addWidget(prev_btn)
         controls_layout.addWidget(play_btn)
         controls_layout.addWidget(next_btn)
+        controls_layout.addWidget(shuffle_btn)
         controls_layout.addLayout(volume_layout)
         controls_layout.addStretch()
 
@@ -452,7 +753,8 @@ class MainWindow(QMainWindow):
         self.music_player.position_changed.connect(self._on_position_changed)
         self.music_player.duration_changed.connect(self._on_duration_changed)
         self.music_player.track_changed.connect(self._on_track_changed)
-        self.time_slider.sliderMoved.connect(self.music_player.seek)
+        self.time_slider.sliderMoved.connect(lambda v: self.music_player.seek(v, precise=False))
+        self.time_slider.sliderReleased.connect(lambda: self.music_player.seek(self.time_slider.value()))
 
         # Marco para los controles de música
         music_controls_frame = QFrame()
@@ -463,9 +765,14 @@ class MainWindow(QMainWindow):
         music_controls_layout.addLayout(time_layout)
         music_controls_layout.addLayout(controls_layout)
 
-
-        # Cargar música existente
-        self._load_music_files()
+        # Panel de estadísticas de libVLC
+        self.music_stats_label = QLabel()
+        self.music_stats_label.setObjectName("PlaybackStats")
+        self.music_stats_label.hide()
+        self.music_stats_timer = QTimer(self)
+        self.music_stats_timer.setInterval(1000)
+        self.music_stats_timer.timeout.connect(self._update_music_stats)
+        music_controls_layout.addWidget(self.music_stats_label)
 
         layout.addLayout(filter_layout)
         layout.addWidget(self.music_list)
@@ -488,48 +795,43 @@ class MainWindow(QMainWindow):
         filter_layout.addWidget(self.movies_filter_combo)
 
         # Lista de películas
-        self.movies_list = QListWidget()
-        self.movies_list.itemDoubleClicked.connect(self._play_movie)
-        self.movies_list.setObjectName("MoviesList") #Added objectName
+        self.movies_list = self._create_library_view("MoviesList")
+        self.movies_list.doubleClicked.connect(self._play_movie)
+        self.movies_list.selectionModel().currentRowChanged.connect(
+            lambda current, previous: self._prefetch_selection(self.movies_list, current.row()))
+        filter_layout.addWidget(self._create_search_box(self.movies_list), 1)
 
         layout.addLayout(filter_layout)
         layout.addWidget(self.movies_list)
 
-        self._load_movies()
         tab.setLayout(layout)
         return tab
 
-    def _play_video(self, item):
+    def _play_video(self, index):
         """Reproduce un video"""
-        media_type = "Videos"
-        widget = self.video_list.itemWidget(item)
-        name_label = widget.findChild(QLabel) if widget else None
-        if name_label:
-            video_name = name_label.text()
-            video_path = os.path.join(self.base_download_path, media_type, video_name)
-            self.video_window = VideoPlayerWindow(video_path, self)
-            self.video_window.show()
-
-    def _play_movie(self, item):
+        model = self.video_list.model()
+        video_path = model.path(index.row())
+        if video_path:
+            self._open_player(video_path, next_paths=[model.path(index.row() + 1)])
+
+    def _play_movie(self, index):
         """Reproduce una película"""
-        media_type = "Películas"
-        widget = self.movies_list.itemWidget(item)
-        name_label = widget.findChild(QLabel) if widget else None
-        if name_label:
-            movie_name = name_label.text()
-            movie_path = os.path.join(self.base_download_path, media_type, movie_name)
-            self.video_window = VideoPlayerWindow(movie_path, self)
-            self.video_window.show()
+        model = self.movies_list.model()
+        movie_path = model.path(index.row())
+        if movie_path:
+            self._open_player(movie_path, next_paths=[model.path(index.row() + 1)])
+
+    def _prefetch_selection(self, view, row):
+        """Precarga el elemento seleccionado y el siguiente: son los próximos en abrirse"""
+        if row >= 0:
+            model = view.model()
+            self.prefetcher.hint([model.path(row), model.path(row + 1)], owner="selección")
 
     def _load_videos(self):
-        video_path = os.path.join(self.base_download_path, "Videos")
-        files = get_media_files(video_path, self.video_filter_combo.currentText())
-        self._add_items_to_list(self.video_list, files)
+        self._request_library("Videos", self.video_list, self.video_filter_combo.currentText())
 
     def _load_movies(self):
-        movies_path = os.path.join(self.base_download_path, "Películas")
-        files = get_media_files(movies_path, self.movies_filter_combo.currentText())
-        self._add_items_to_list(self.movies_list, files)
+        self._request_library("Películas", self.movies_list, self.movies_filter_combo.currentText())
 
     def _update_video_list(self):
         self._load_videos()
@@ -543,20 +845,103 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "Por favor ingrese una URL")
             return
 
-        media_type = self.type_combo.currentText()
-        download_path = os.path.join(self.base_download_path, media_type)
+        self.queue_download(url, self.type_combo.currentText(), self.progressive_checkbox.isChecked())
+        self.url_input.clear()
 
-        # Crear widget para esta descarga
-        download_widget = DownloadItemWidget(url)
-        download_widget.cancel_btn.clicked.connect(lambda: self.cancel_specific_download(url))
+    def stream_now(self):
+        """Reproduce la URL sin descargarla"""
+        url = self.url_input.text().strip()
+        if not url:
+            QMessageBox.warning(self, "Error", "Por favor ingrese una URL")
+            return
+        if self.downloader.stream_resolver.cached(url) is None:
+            self.statusBar().showMessage("Obteniendo el stream...")
+        self.downloader.stream_resolver.resolve(url, self.type_combo.currentText())
 
-        # Insertar al inicio de la lista
-        self.downloads_list_layout.insertWidget(0, download_widget)
-        self.download_widgets[url] = download_widget
+    def _play_stream(self, url, stream):
+        self.statusBar().showMessage(f"Reproduciendo: {stream.get('title') or url}", 5000)
+        self._open_player(stream['url'], player_options(stream))
 
-        # Iniciar descarga
-        self.downloader.add_to_queue(url, download_path, media_type)
-        self.url_input.clear()
+    def _stream_failed(self, url, error):
+        self.statusBar().showMessage(f"No se pudo ver {url}: {error}", 10000)
+
+    def queue_download(self, url, media_type, progressive=False):
+        """Agrega la fila de la descarga y la añade a la cola del downloader"""
+        if self.queue_model.contains(url):
+            self.statusBar().showMessage("Esta URL ya está en la cola", 5000)
+            return
+        download_path = os.path.join(self.base_download_path, media_type)
+        self.queue_model.add_jobs([url], media_type)
+        self.downloader.add_to_queue(url, download_path, media_type, progressive)
+
+    def _queue_bulk_downloads(self, urls, media_type):
+        """Encola varias URLs recibidas por la API local"""
+        self.import_urls(urls, media_type)
+
+    def import_urls(self, urls, media_type=None):
+        """Normaliza, deduplica y encola un lote de URLs con una sola actualización de la UI"""
+        media_type = media_type or self.type_combo.currentText()
+        library_titles = {}
+        for folder in ("Videos", "Música", "Películas"):
+            folder_path = os.path.join(self.base_download_path, folder)
+            names = os.listdir(folder_path) if os.path.isdir(folder_path) else []
+            library_titles[folder] = {self.downloader.clean_filename(name) for name in names}
+
+        result = plan_import(urls, self.downloader.queued_urls(),
+                             self.downloader.history.completed_urls(), library_titles)
+        if result.accepted:
+            download_path = os.path.join(self.base_download_path, media_type)
+            accepted = self.downloader.add_many(result.accepted, download_path, media_type)
+            if accepted:
+                self._add_batch(accepted, media_type)
+        self.statusBar().showMessage(result.summary(), 10000)
+        return result
+
+    def _import_from_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Importar URLs", "", IMPORT_FILE_FILTER)
+        if path:
+            try:
+                self.import_urls(read_urls_file(path))
+            except OSError as e:
+                QMessageBox.critical(self, "Error", f"No se pudo leer {path}: {str(e)}")
+
+    def _import_from_clipboard(self):
+        self.import_urls(extract_urls(QApplication.clipboard().text()))
+
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls() or event.mimeData().hasText():
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        """Importa las URLs de archivos o texto soltados sobre la ventana"""
+        mime = event.mimeData()
+        local_files = [u.toLocalFile() for u in mime.urls() if u.isLocalFile()] if mime.hasUrls() else []
+        urls = []
+        if local_files:
+            for path in local_files:
+                try:
+                    urls.extend(read_urls_file(path))
+                except OSError as e:
+                    print(f"Error leyendo {path}: {str(e)}")
+        elif mime.hasUrls():
+            urls = [u.toString() for u in mime.urls()]
+        else:
+            urls = extract_urls(mime.text())
+        if urls:
+            self.import_urls(urls)
+            event.acceptProposedAction()
+
+    def _add_batch(self, urls, media_type):
+        """Agrega un lote a la cola como un grupo filtrable"""
+        self._batch_counter += 1
+        group = f"Lote {self._batch_counter}"
+        self.queue_model.add_jobs(urls, media_type, group)
+        self.queue_group_combo.addItem(group, group)
+
+    def cancel_batch(self, group):
+        """Cancela todas las descargas sin terminar de un lote"""
+        for url in self.queue_model.active_urls(group):
+            self.cancel_specific_download(url)
 
     def cancel_download(self):
         """Cancela la descarga actual"""
@@ -567,22 +952,68 @@ class MainWindow(QMainWindow):
     def cancel_specific_download(self, url):
         """Cancela una descarga específica"""
         self.downloader.cancel_download(url)
-        if url in self.download_widgets:
-            widget = self.download_widgets[url]
-            widget.status_label.setText("Cancelado")
-            widget.status_label.setProperty("class", "error-label") #Added to use styles.py
-            widget.progress_bar.setEnabled(False)
-            # Programar la eliminación del widget después de un tiempo
-            QTimer.singleShot(5000, lambda: self._remove_download_widget(url))
-
-    def _remove_download_widget(self, url):
-        """Elimina el widget de la descarga de la interfaz"""
-        if url in self.download_widgets:
-            widget = self.download_widgets[url]
-            self.downloads_list_layout.removeWidget(widget)
-            widget.deleteLater()
-            del self.download_widgets[url]
+        self.queue_model.remove(url)
 
+    def _show_queue_menu(self, position):
+        """Menú contextual de la cola: cancelar descargas o lotes y copiar URLs"""
+        indexes = self.downloads_view.selectionModel().selectedIndexes()
+        if not indexes:
+            return
+        urls = [index.data(UrlRole) for index in indexes]
+        active = [url for url in urls if self.queue_model.contains(url)]
+        groups = {index.data(GroupRole) for index in indexes} - {""}
+
+        menu = QMenu(self)
+        cancel_action = menu.addAction(f"Cancelar ({len(active)})")
+        cancel_action.setEnabled(bool(active))
+        batch_actions = {menu.addAction(f"Cancelar {group}"): group for group in sorted(groups)}
+        stream_url = self.downloader.playback.url_for(urls[0]) \
+            if self.downloader.playback and len(active) == 1 else None
+        watch_action = menu.addAction("Ver mientras se descarga") if stream_url else None
+        copy_action = menu.addAction("Copiar URL" if len(urls) == 1 else "Copiar URLs")
+
+        action = menu.exec_(self.downloads_view.viewport().mapToGlobal(position))
+        if action == cancel_action:
+            for url in active:
+                self.cancel_specific_download(url)
+        elif action in batch_actions:
+            self.cancel_batch(batch_actions[action])
+        elif watch_action is not None and action == watch_action:
+            self._open_player(stream_url, PLAYER_OPTIONS)
+        elif action == copy_action:
+            QApplication.clipboard().setText("\n".join(urls))
+
+    def _play_while_downloading(self, url, stream_url):
+        """Abre el reproductor en cuanto la descarga tiene datos suficientes"""
+        self.statusBar().showMessage("Reproduciendo mientras se descarga...", 5000)
+        self._open_player(stream_url, PLAYER_OPTIONS)
+
+    def _open_player(self, source, media_options=(), next_paths=()):
+        from video_player import VideoPlayerWindow
+        self.video_window = VideoPlayerWindow(source, self, media_options, self.video_profile,
+                                              self.prefetcher, next_paths)
+        # El próximo video se abre con el último perfil elegido
+        self.video_window.profile_combo.currentTextChanged.connect(self._set_video_profile)
+        self.video_window.show()
+
+    def _set_video_profile(self, profile):
+        self.video_profile = profile
+
+    def _schedule_queue_summary(self):
+        if not self.queue_summary_timer.isActive():
+            self.queue_summary_timer.start()
+
+    def _update_queue_summary(self):
+        """Actualiza el resumen por estado y el progreso de cada lote en el combo"""
+        counts = self.queue_model.counts()
+        self.queue_summary.setText(" · ".join(f"{counts[state]} {label.lower()}"
+                                              for state, label in STATE_LABELS.items() if counts[state]))
+        for i in range(1, self.queue_group_combo.count()):
+            group = self.queue_group_combo.itemData(i)
+            done, errors, total = self.queue_model.group_progress(group)
+            text = f"{group} ({done}/{total}"
+            text += f", {errors} con error)" if errors else ")"
+            self.queue_group_combo.setItemText(i, text)
 
     def _on_thread_finished(self):
         if self.download_thread:
@@ -591,48 +1022,34 @@ class MainWindow(QMainWindow):
 
     def _update_download_progress(self, url, progress):
         """Actualiza el progreso de una descarga específica"""
-        if url in self.download_widgets:
-            widget = self.download_widgets[url]
-            widget.progress_bar.setValue(progress)
+        self.queue_model.update(url, progress=progress)
+
+    def _update_download_speed(self, url, speed, eta):
+        self.queue_model.update(url, speed=speed, eta=eta if eta >= 0 else None)
 
     def _download_finished(self, url, filename):
         """Maneja la finalización de una descarga específica"""
-        if url in self.download_widgets:
-            widget = self.download_widgets[url]
-            widget.status_label.setText(f"Completado: {filename}")
-            widget.status_label.setProperty("class", "success-label") #Added to use styles.py
-            widget.progress_bar.setValue(100)
-            widget.cancel_btn.setEnabled(False)
-            # Programar la eliminación del widget después de un tiempo
-            QTimer.singleShot(5000, lambda: self._remove_download_widget(url))
-
-            # Actualizar listas de medios
-            self._load_videos()
-            self._load_movies()
-            self._load_music_files()
+        self.queue_model.finish(url, 'completed', f"Completado: {filename}")
+
+        # Actualizar listas de medios
+        self.library_refresh_timer.start()
+
+    def _refresh_libraries(self):
+        """Recarga la lista visible; las demás se recargan al volver a mostrarse"""
+        self._loaded_tabs.clear()
+        self._ensure_tab_loaded(self.tabs.currentIndex())
 
     def _download_error(self, url, error):
         """Maneja errores de una descarga específica"""
-        if url in self.download_widgets:
-            widget = self.download_widgets[url]
-            widget.status_label.setText(f"Error: {error}")
-            widget.status_label.setProperty("class", "error-label") #Added to use styles.py
-            widget.progress_bar.setEnabled(False)
-            widget.cancel_btn.setEnabled(False)
-            # Programar la eliminación del widget después de un tiempo
-            QTimer.singleShot(5000, lambda: self._remove_download_widget(url))
+        self.queue_model.finish(url, 'error', f"Error: {error}")
 
     def _update_download_status(self, url, status):
         """Actualiza el estado de una descarga específica"""
-        if url in self.download_widgets:
-            widget = self.download_widgets[url]
-            widget.status_label.setText(status)
+        self.queue_model.update(url, status=status)
 
     def _update_download_title(self, url, title):
         """Actualiza el título de una descarga específica"""
-        if url in self.download_widgets:
-            widget = self.download_widgets[url]
-            widget.title_label.setText(title)
+        self.queue_model.update(url, title=title)
 
     def update_progress(self, progress):
         self.progress_bar.setValue(progress)
@@ -659,11 +1076,35 @@ class MainWindow(QMainWindow):
         self.status_label.setText(f"Error: {error}")
         self.status_label.setStyleSheet("color: #FF3B30;")
 
+    def closeEvent(self, event):
+        self.stall_watchdog.stop()
+        self.api_server.stop()
+        self.downloader.close()
+        self.prefetcher.stop()
+        super().closeEvent(event)
+
     def _load_music_files(self):
         self._update_music_list()
 
+    def _toggle_music_stats(self, visible):
+        self.music_stats_label.setVisible(visible)
+        if visible:
+            self._update_music_stats()
+            self.music_stats_timer.start()
+        else:
+            self.music_stats_timer.stop()
+
+    def _update_music_stats(self):
+        stats = self.music_player.stats(self.music_stats_timer.interval() / 1000.0)
+        text = format_stats(stats, self.music_player.profile)
+        latency = self.music_player.seek_controller.last_latency()
+        if latency is not None:
+            text += f"\nÚltimo salto: {latency:.0f} ms"
+        self.music_stats_label.setText(text)
+
     def _on_position_changed(self, position):
-        self.time_slider.setValue(position)
+        if not self.time_slider.isSliderDown():
+            self.time_slider.setValue(position)
         self.current_time.setText(self.music_player.format_time(position))
 
     def _on_duration_changed(self, duration):
@@ -671,16 +1112,71 @@ class MainWindow(QMainWindow):
         self.total_time.setText(self.music_player.format_time(duration))
 
     def _on_track_changed(self, track_name):
-        # Encuentra y selecciona la pista actual en la lista
-        items = self.music_list.findItems(track_name, Qt.MatchExactly)
-        if items:
-            self.music_list.setCurrentItem(items[0])
+        # Selecciona la pista actual en la lista (si la búsqueda no la oculta)
+        model = self.music_list.model()
+        row = model.row_for_path(self.music_player.current_path)
+        if row >= 0:
+            self.music_list.setCurrentIndex(model.index(row))
 
     def _update_music_list(self):
-        sort_by = self.music_filter_combo.currentText()
-        music_path = os.path.join(self.base_download_path, "Música")
-        files = get_media_files(music_path, sort_by)
-        self._add_items_to_list(self.music_list, files)
+        self._playlist_generation = None
+        self._request_library("Música", self.music_list, self.music_filter_combo.currentText())
+
+    def _save_playlist(self):
+        """Guarda la lista de reproducción actual como .m3u8"""
+        paths = list(self.music_player.current_playlist)
+        if not paths:
+            self.statusBar().showMessage("La lista de reproducción está vacía", 5000)
+            return
+        directory = os.path.join(self.base_download_path, "Música")
+        path, _ = QFileDialog.getSaveFileName(self, "Guardar lista", directory, M3U_FILE_FILTER)
+        if not path:
+            return
+        if not os.path.splitext(path)[1]:
+            path += ".m3u8"
+        try:
+            count = write_m3u8(path, paths)
+            self.statusBar().showMessage(f"Lista guardada: {count} pistas en {os.path.basename(path)}", 5000)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"No se pudo guardar la lista: {str(e)}")
+
+    def _open_playlist(self):
+        """Abre una lista .m3u8; las pistas se resuelven contra la biblioteca de música"""
+        directory = os.path.join(self.base_download_path, "Música")
+        path, _ = QFileDialog.getOpenFileName(self, "Abrir lista", directory, M3U_FILE_FILTER)
+        if not path:
+            return
+        # Una recarga de la carpeta pendiente no debe pisar la lista abierta
+        self._library_lists.pop("Música", None)
+        self._playlist_first_page = True
+        self._playlist_generation = self.playlist_loader.request(path, self._library_files.get("Música", []))
+        self.statusBar().showMessage(f"Abriendo {os.path.basename(path)}...")
+
+    def _on_playlist_page(self, generation, files):
+        if generation != self._playlist_generation:
+            return
+        model = self.music_list.model()
+        if self._playlist_first_page:
+            self._playlist_first_page = False
+            model.set_files(files)
+        else:
+            model.append_files(files)
+        self.statusBar().showMessage(f"Cargando lista: {len(self.music_player.current_playlist)} pistas...")
+
+    def _on_playlist_finished(self, generation, count, missing, repeated):
+        if generation != self._playlist_generation:
+            return
+        self._playlist_generation = None
+        message = f"Lista cargada: {count - len(missing) - repeated} de {count} pistas"
+        if repeated:
+            message += f", {repeated} repetidas omitidas"
+        if missing:
+            message += f", {len(missing)} no encontradas (ver consola)"
+            for title, path in missing[:50]:
+                self.log_sink.log(f"No encontrada: {title} ({path})", 'WARNING', 'listas')
+            if len(missing) > 50:
+                self.log_sink.log(f"... y {len(missing) - 50} más", 'WARNING', 'listas')
+        self.statusBar().showMessage(message, 10000)
 
     def _update_position(self):
         """Actualiza la posición actual durante la reproducción"""
@@ -689,12 +1185,15 @@ class MainWindow(QMainWindow):
             self.music_player.position_changed.emit(position)
 
             # Verificar si la canción terminó
+            import vlc
             if self.music_player.get_state() == vlc.State.Ended:
                 self.music_player.next_track()
 
     def _on_url_changed(self):
         """Detectar plataforma cuando cambia la URL"""
         url = self.url_input.text()
+        self.url_preview.setText("")
+        self.prefetch_timer.start()
         if url:
             platform = self.downloader.detect_platform(url)
             self.platform_detected.setText(platform)
@@ -707,18 +1206,33 @@ class MainWindow(QMainWindow):
             elif 'playlist' in url.lower() and 'youtube.com' in url.lower():
                 self.type_combo.setCurrentText('Música')
 
-    def _add_items_to_list(self, list_widget, files):
-        """Agrega items con checkbox a una lista"""
-        list_widget.clear()
-        for file in files:
-            if isinstance(file, dict):
-                name = file['name']
-            else:
-                name = os.path.basename(file)
+    def _prefetch_url(self):
+        """Precarga la información de la URL escrita"""
+        url = self.url_input.text().strip()
+        if is_valid_url(url):
+            self.url_preview.setText("Obteniendo vista previa...")
+            self.downloader.prefetcher.prefetch(url, self.type_combo.currentText())
+
+    def _show_url_preview(self, url, preview):
+        """Muestra título, duración, tamaño estimado y tamaño de la playlist"""
+        if url != self.url_input.text().strip():
+            return
+        parts = [preview.get('title') or "Sin título"]
+        if preview.get('duration'):
+            parts.append(self.music_player.format_time(int(preview['duration'] * 1000)))
+        if preview.get('size'):
+            parts.append(f"~{preview['size'] / 1024 / 1024:.1f} MB")
+        if preview.get('playlist_count') is not None:
+            parts.append(f"{preview['playlist_count']} elementos")
+        self.url_preview.setText(" · ".join(parts))
+
+    def _show_url_preview_error(self, url, error):
+        if url == self.url_input.text().strip():
+            self.url_preview.setText(f"Sin vista previa: {error}")
 
-            item, widget = self.create_custom_list_item(name)
-            list_widget.addItem(item)
-            list_widget.setItemWidget(item, widget)
+    def _add_items_to_list(self, list_widget, files, index=None):
+        """Carga los archivos en el modelo de una lista; ``index`` es su índice de búsqueda"""
+        list_widget.model().set_files(files, index)
 
 
 
@@ -737,6 +1251,8 @@ def main():
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
+    # Lo que no hace falta para pintar la ventana se inicia después
+    QTimer.singleShot(0, window.finish_startup)
     try:
         sys.exit(app.exec_())
     except KeyboardInterrupt:
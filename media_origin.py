@@ -0,0 +1,387 @@
+"""Servidor de origen local para medir el rendimiento de descarga sin red.
+
+Sirve MP4 progresivo, HLS y DASH con contenido sintético y permite simular
+latencia, ancho de banda limitado, errores y fragmentos lentos. Junto con
+``ytdl_profile`` permite ejecutar el Downloader real contra localhost:
+
+    python media_origin.py --jobs 20 --kind hls --fragments 1 4 8
+"""
+import os
+import re
+import sys
+import time
+import json
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+from dataclasses import dataclass
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+_BLOCK = bytes(range(256)) * 256  # 64 KB de patrón determinista
+
+_PROGRESSIVE = re.compile(r'^/progressive/([\w-]+)\.mp4$')
+_HLS_PLAYLIST = re.compile(r'^/hls/([\w-]+)\.m3u8$')
+_HLS_SEGMENT = re.compile(r'^/hls/([\w-]+)/seg-(\d+)\.ts$')
+_DASH_MANIFEST = re.compile(r'^/dash/([\w-]+)\.mpd$')
+_DASH_SEGMENT = re.compile(r'^/dash/([\w-]+)/(init|seg-(\d+))\.m4s$')
+_RANGE = re.compile(r'bytes=(\d*)-(\d*)')
+
+
+@dataclass
+class OriginConfig:
+    latency: float = 0.0               # segundos antes de cada respuesta
+    bandwidth: int = 0                 # bytes/s por conexión (0 = sin límite)
+    error_rate: float = 0.0            # probabilidad de responder con error
+    error_status: int = 503
+    slow_fragment_rate: float = 0.0    # probabilidad de que un fragmento sea lento
+    slow_fragment_delay: float = 2.0
+    progressive_size: int = 20 * 1024 * 1024
+    segment_count: int = 30
+    segment_size: int = 512 * 1024
+    segment_duration: float = 4.0
+
+
+def synthetic_bytes(offset, length):
+    """Bytes del contenido sintético entre offset y offset + length"""
+    start = offset % len(_BLOCK)
+    data = bytearray()
+    while len(data) < length:
+        chunk = _BLOCK[start:start + length - len(data)]
+        data += chunk
+        start = 0
+    return bytes(data)
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MediaOrigin/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def config(self):
+        return self.server.config
+
+    def do_HEAD(self):
+        self._handle(send_body=False)
+
+    def do_GET(self):
+        self._handle(send_body=True)
+
+    def _handle(self, send_body):
+        config = self.config
+        self.server.count_request()
+        if config.latency:
+            time.sleep(config.latency)
+        if config.error_rate and random.random() < config.error_rate:
+            self._send_bytes(config.error_status, b"error inyectado", "text/plain", send_body)
+            return
+
+        path = self.path.split('?', 1)[0]
+        match = _PROGRESSIVE.match(path)
+        if match:
+            self._send_progressive(send_body)
+            return
+        match = _HLS_PLAYLIST.match(path)
+        if match:
+            self._send_bytes(200, self._hls_playlist(match.group(1)).encode(),
+                             "application/vnd.apple.mpegurl", send_body)
+            return
+        match = _DASH_MANIFEST.match(path)
+        if match:
+            self._send_bytes(200, self._dash_manifest(match.group(1)).encode(),
+                             "application/dash+xml", send_body)
+            return
+        if _HLS_SEGMENT.match(path) or _DASH_SEGMENT.match(path):
+            if config.slow_fragment_rate and random.random() < config.slow_fragment_rate:
+                time.sleep(config.slow_fragment_delay)
+            size = 4096 if path.endswith("init.m4s") else config.segment_size
+            content_type = "video/mp2t" if path.endswith(".ts") else "video/iso.segment"
+            self._send_stream(200, 0, size, size, content_type, send_body)
+            return
+        self._send_bytes(404, b"no encontrado", "text/plain", send_body)
+
+    def _hls_playlist(self, name):
+        config = self.config
+        lines = ["#EXTM3U", "#EXT-X-VERSION:3",
+                 f"#EXT-X-TARGETDURATION:{int(config.segment_duration + 0.999)}",
+                 "#EXT-X-MEDIA-SEQUENCE:0", "#EXT-X-PLAYLIST-TYPE:VOD"]
+        for i in range(config.segment_count):
+            lines.append(f"#EXTINF:{config.segment_duration:.3f},")
+            lines.append(f"{name}/seg-{i}.ts")
+        lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+    def _dash_manifest(self, name):
+        config = self.config
+        duration = config.segment_count * config.segment_duration
+        timescale = 1000
+        segment_ms = int(config.segment_duration * timescale)
+        bandwidth = int(config.segment_size * 8 / config.segment_duration)
+        # Una sola representación con audio y video para que no haga falta mezclar con FFmpeg
+        return f"""<?xml version="1.0" encoding="UTF-8"?>
+<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" mediaPresentationDuration="PT{duration:.3f}S"
+     minBufferTime="PT2S" profiles="urn:mpeg:dash:profile:isoff-on-demand:2011">
+  <Period>
+    <AdaptationSet mimeType="video/mp4" segmentAlignment="true">
+      <Representation id="av" codecs="avc1.64001f,mp4a.40.2" bandwidth="{bandwidth}" width="1280" height="720">
+        <SegmentTemplate timescale="{timescale}" duration="{segment_ms}" startNumber="0"
+                         initialization="{name}/init.m4s" media="{name}/seg-$Number$.m4s"/>
+      </Representation>
+    </AdaptationSet>
+  </Period>
+</MPD>
+"""
+
+    def _send_progressive(self, send_body):
+        total = self.config.progressive_size
+        start, end = 0, total - 1
+        status = 200
+        match = _RANGE.match(self.headers.get("Range", ""))
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), total - 1) if match.group(2) else total - 1
+            else:
+                start = max(0, total - int(match.group(2)))
+            if start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{total}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+        self._send_stream(status, start, end - start + 1, total, "video/mp4", send_body)
+
+    def _send_bytes(self, status, body, content_type, send_body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _send_stream(self, status, offset, length, total, content_type, send_body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {offset}-{offset + length - 1}/{total}")
+        self.end_headers()
+        if not send_body:
+            return
+
+        bandwidth = self.config.bandwidth
+        chunk_size = 64 * 1024
+        started = time.perf_counter()
+        sent = 0
+        try:
+            while sent < length:
+                chunk = synthetic_bytes(offset + sent, min(chunk_size, length - sent))
+                self.wfile.write(chunk)
+                sent += len(chunk)
+                self.server.count_bytes(len(chunk))
+                if bandwidth:
+                    # Dormir lo necesario para no superar el ancho de banda configurado
+                    ahead = sent / bandwidth - (time.perf_counter() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class MediaOrigin(ThreadingHTTPServer):
+    """Servidor de origen en localhost que corre en un hilo propio"""
+    daemon_threads = True
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        super().__init__((host, port), OriginHandler)
+        self.config = config or OriginConfig()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0
+        self._thread = None
+
+    def count_request(self):
+        with self._stats_lock:
+            self.requests += 1
+
+    def count_bytes(self, count):
+        with self._stats_lock:
+            self.bytes_sent += count
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, kind, name):
+        """URL de un medio sintético: kind es progressive, hls o dash"""
+        extension = {'progressive': 'mp4', 'hls': 'm3u8', 'dash': 'mpd'}[kind]
+        return f"{self.base_url}/{kind}/{name}.{extension}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="media-origin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def ytdl_profile(fragment_concurrency=1):
+    """Opciones de yt-dlp para descargar del origen local con el extractor genérico"""
+    return {
+        'force_generic_extractor': True,
+        'format': 'best',
+        'fixup': 'never',
+        'hls_prefer_native': True,
+        'concurrent_fragment_downloads': fragment_concurrency,
+        'retries': 3,
+        'fragment_retries': 3,
+        'quiet': True,
+        'no_warnings': True,
+    }
+
+
+def run_throughput(origin, kind, jobs, concurrency, fragments, timeout=600):
+    """Descarga ``jobs`` medios del origen con el Downloader real y mide el rendimiento"""
+    from PyQt5.QtCore import QCoreApplication, QTimer
+    from downloader import Downloader
+    from concurrency_controller import ConcurrencyController
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    workdir = tempfile.mkdtemp(prefix="media_origin_")
+    # El Downloader guarda caché e historial en HOME; se aísla y se restaura al final
+    saved_env = {name: os.environ.get(name) for name in ("HOME", "USERPROFILE")}
+    os.environ["HOME"] = workdir
+    os.environ["USERPROFILE"] = workdir
+    try:
+        downloader = Downloader()
+        downloader.max_concurrent_downloads = concurrency
+        # Todas las URLs del origen son de la plataforma 'Unknown': sin esto el
+        # controlador AIMD limitaría la prueba a 2 descargas (6 como máximo)
+        downloader.controller = ConcurrencyController(initial_limit=concurrency, max_limit=concurrency)
+        downloader.extra_options = ytdl_profile(fragments)
+
+        lock = threading.Lock()
+        queued_at, first_byte, done, failed = {}, {}, {}, {}
+
+        def on_progress(url, progress):
+            with lock:
+                first_byte.setdefault(url, time.perf_counter())
+
+        def on_done(url, *_):
+            with lock:
+                done.setdefault(url, time.perf_counter())
+
+        def on_error(url, error):
+            # Los fallos terminan el trabajo pero no cuentan como descargas completadas
+            with lock:
+                failed.setdefault(url, time.perf_counter())
+            print(f"Error en {url}: {error}", file=sys.__stderr__)
+
+        downloader.progress_signal.connect(on_progress)
+        downloader.finished_signal.connect(on_done)
+        downloader.error_signal.connect(on_error)
+
+        bytes_before = origin.bytes_sent
+        start = time.perf_counter()
+        urls = [origin.url_for(kind, f"{kind}-{fragments}-{i}") for i in range(jobs)]
+        for url in urls:
+            queued_at[url] = time.perf_counter()
+        downloader.add_many(urls, workdir, "Videos")
+
+        def check():
+            with lock:
+                finished = len(done.keys() | failed.keys())
+            if finished >= jobs or time.perf_counter() - start > timeout:
+                app.quit()
+
+        timer = QTimer()
+        timer.setInterval(100)
+        timer.timeout.connect(check)
+        timer.start()
+        app.exec_()
+        timer.stop()
+
+        elapsed = time.perf_counter() - start
+        # Límite con el que terminó la prueba: los 429/timeouts del origen lo reducen
+        platform_limit = downloader.controller.snapshot().get('Unknown', {}).get('limit', concurrency)
+        effective_limit = min(concurrency, platform_limit)
+        downloader.close()
+    finally:
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    ttfb = sorted(first_byte[u] - queued_at[u] for u in first_byte)
+    return {
+        'kind': kind,
+        'jobs': jobs,
+        'completed': len(done),
+        'errors': len(failed),
+        'concurrency': concurrency,
+        'effective_limit': effective_limit,
+        'fragment_concurrency': fragments,
+        'seconds': elapsed,
+        'jobs_per_minute': len(done) / elapsed * 60 if elapsed else 0.0,
+        'ttfb_median_seconds': ttfb[len(ttfb) // 2] if ttfb else None,
+        'ttfb_p95_seconds': ttfb[int(len(ttfb) * 0.95)] if ttfb else None,
+        'megabytes_per_second': (origin.bytes_sent - bytes_before) / elapsed / 1024 / 1024 if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Origen local de medios y prueba de rendimiento del Downloader")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--serve", action="store_true", help="Solo servir, sin lanzar descargas")
+    parser.add_argument("--kind", choices=["progressive", "hls", "dash"], default="hls")
+    parser.add_argument("--jobs", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--fragments", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--bandwidth", type=int, default=0, help="bytes/s por conexión")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slow-fragment-rate", type=float, default=0.0)
+    parser.add_argument("--slow-fragment-delay", type=float, default=2.0)
+    parser.add_argument("--output", help="Archivo JSON con los resultados")
+    args = parser.parse_args()
+
+    config = OriginConfig(latency=args.latency, bandwidth=args.bandwidth, error_rate=args.error_rate,
+                          slow_fragment_rate=args.slow_fragment_rate,
+                          slow_fragment_delay=args.slow_fragment_delay)
+    origin = MediaOrigin(config, port=args.port).start()
+    print(f"Origen local en {origin.base_url}")
+
+    if args.serve:
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        origin.stop()
+        return
+
+    results = []
+    for fragments in args.fragments:
+        result = run_throughput(origin, args.kind, args.jobs, args.concurrency, fragments)
+        results.append(result)
+        print(json.dumps(result, ensure_ascii=False))
+    origin.stop()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from collections import OrderedDict
+from url_router import normalize_url
+import threading
+import time
+
+
+def _estimate_size(info):
+    """Estima el tamaño de la descarga a partir de los formatos disponibles"""
+    best_combined = best_video = best_audio = 0
+    for f in info.get('formats') or []:
+        size = f.get('filesize') or f.get('filesize_approx') or 0
+        has_video = f.get('vcodec') not in (None, 'none')
+        has_audio = f.get('acodec') not in (None, 'none')
+        if has_video and has_audio:
+            best_combined = max(best_combined, size)
+        elif has_video:
+            best_video = max(best_video, size)
+        elif has_audio:
+            best_audio = max(best_audio, size)
+    size = max(best_combined, best_video + best_audio)
+    return size or info.get('filesize') or info.get('filesize_approx')
+
+
+def build_preview(info):
+    """Extrae los datos que se muestran en la vista previa"""
+    preview = {
+        'title': info.get('title'),
+        'duration': info.get('duration'),
+        'size': None,
+        'playlist_count': None,
+    }
+    if info.get('_type') == 'playlist':
+        entries = info.get('entries')
+        count = info.get('playlist_count')
+        if count is None and isinstance(entries, list):
+            count = len(entries)
+        preview['playlist_count'] = count
+    else:
+        preview['size'] = _estimate_size(info)
+    return preview
+
+
+class MetadataPrefetcher(QObject):
+    """Extrae la información de una URL en segundo plano antes de descargarla.
+
+    Los resultados se guardan sin procesar (``process=False``) en una caché con
+    TTL indexada por la URL normalizada, de modo que el trabajo de descarga
+    pueda procesarlos directamente sin volver a consultar el sitio.
+    """
+    preview_ready = pyqtSignal(str, dict)   # url, vista previa
+    preview_failed = pyqtSignal(str, str)   # url, mensaje de error
+
+    def __init__(self, downloader, ttl=300, max_entries=128):
+        super().__init__()
+        self.downloader = downloader
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._cache = OrderedDict()  # clave -> (expira, info, vista previa)
+        self._inflight = {}          # clave -> threading.Event
+        self._lock = threading.Lock()
+
+    def _get_fresh(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return entry
+
+    def prefetch(self, url, media_type):
+        """Inicia la extracción de la URL si no está en caché ni en curso"""
+        key = normalize_url(url)
+        with self._lock:
+            entry = self._get_fresh(key)
+            if entry is None and key in self._inflight:
+                return
+            if entry is None:
+                self._inflight[key] = threading.Event()
+
+        if entry is not None:
+            self.preview_ready.emit(url, entry[2])
+            return
+
+        thread = threading.Thread(target=self._extract, args=(key, url, media_type))
+        thread.daemon = True
+        thread.start()
+
+    def _extract(self, key, url, media_type):
+        try:
+            platform = self.downloader.detect_platform(url)
+            ydl_opts = self.downloader.get_platform_options(platform, media_type)
+            with self.downloader.sessions.acquire(ydl_opts) as ydl:
+                info = ydl.extract_info(url, download=False, process=False)
+
+            if not info:
+                self.preview_failed.emit(url, "No se pudo obtener información")
+                return
+
+            preview = build_preview(info)
+            # Las entradas de una playlist sin procesar son un generador que solo
+            # puede recorrerse una vez: se muestra la vista previa pero no se reutiliza
+            reusable = info.get('_type') != 'playlist'
+            with self._lock:
+                self._cache[key] = (time.monotonic() + self.ttl, info if reusable else None, preview)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+            self.preview_ready.emit(url, preview)
+        except Exception as e:
+            self.preview_failed.emit(url, str(e))
+        finally:
+            with self._lock:
+                event = self._inflight.pop(key, None)
+            if event:
+                event.set()
+
+    def take(self, url, wait=120):
+        """Devuelve la información precargada de la URL y la retira de la caché.
+
+        Si la extracción sigue en curso se espera hasta ``wait`` segundos para
+        no repetirla. Devuelve None si no hay información reutilizable.
+        """
+        key = normalize_url(url)
+        with self._lock:
+            event = self._inflight.get(key)
+        if event is not None:
+            event.wait(wait)
+
+        with self._lock:
+            entry = self._get_fresh(key)
+            if entry is None or entry[1] is None:
+                return None
+            # yt-dlp modifica el diccionario al procesarlo, así que no se comparte
+            del self._cache[key]
+            return entry[1]
@@ -0,0 +1,242 @@
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+THROUGHPUT_BUCKETS = (64e3, 256e3, 1e6, 2.5e6, 5e6, 10e6, 25e6, 50e6, 100e6)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in key) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, registry, name, help_text):
+        self._lock = registry._lock
+        self.name = name
+        self.help = help_text
+        self._values = {}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, help_text, buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, help_text)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['counts'][i] += 1
+            entry['sum'] += value
+            entry['count'] += 1
+
+    def samples(self):
+        samples = []
+        for key, entry in self._values.items():
+            for bound, count in zip(self.buckets, entry['counts']):
+                samples.append((f"{self.name}_bucket", key + (('le', f"{bound:g}"),), count))
+            samples.append((f"{self.name}_bucket", key + (('le', "+Inf"),), entry['count']))
+            samples.append((f"{self.name}_sum", key, entry['sum']))
+            samples.append((f"{self.name}_count", key, entry['count']))
+        return samples
+
+
+class MetricsRegistry:
+    """Registro de métricas del proceso con volcado Prometheus y JSON"""
+
+    def __init__(self, recent_jobs=100):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self.recent_jobs = deque(maxlen=recent_jobs)
+
+    def _get_or_create(self, cls, name, help_text, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(self, name, help_text, **kwargs)
+            return metric
+
+    def counter(self, name, help_text=""):
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name, help_text=""):
+        return self._get_or_create(Gauge, name, help_text)
+
+    def histogram(self, name, help_text="", buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def to_prometheus(self):
+        """Volcado en formato de texto de Prometheus"""
+        lines = []
+        with self._lock:
+            for metric in self._metrics.values():
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                for name, key, value in metric.samples():
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self):
+        """Volcado serializable a JSON con las métricas y los últimos trabajos"""
+        with self._lock:
+            metrics = {}
+            for metric in self._metrics.values():
+                metrics[metric.name] = {
+                    'type': metric.kind,
+                    'help': metric.help,
+                    'samples': [{'name': name, 'labels': dict(key), 'value': value}
+                                for name, key, value in metric.samples()],
+                }
+            return {'metrics': metrics, 'recent_jobs': list(self.recent_jobs)}
+
+    def to_json(self, indent=None):
+        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
+
+
+registry = MetricsRegistry()
+
+PHASE_SECONDS = registry.histogram(
+    "download_phase_seconds", "Duración de cada fase de una descarga (extraccion, transferencia, postproceso)")
+JOBS_TOTAL = registry.counter("download_jobs_total", "Descargas terminadas por plataforma y estado")
+BYTES_TOTAL = registry.counter("download_bytes_total", "Bytes descargados por plataforma")
+RETRIES_TOTAL = registry.counter("download_retries_total", "Reintentos de yt-dlp por plataforma")
+THROUGHPUT = registry.histogram(
+    "download_throughput_bytes_per_second", "Velocidad media de transferencia por trabajo",
+    buckets=THROUGHPUT_BUCKETS)
+ACTIVE_JOBS = registry.gauge("download_active_jobs", "Descargas en curso por plataforma")
+
+
+class DownloadTrace:
+    """Tiempos por fase, bytes y reintentos de un trabajo de descarga"""
+
+    def __init__(self, url, platform):
+        self.url = url
+        self.platform = platform
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.bytes = 0
+        self.retries = 0
+        self.last_error = None
+        self._open = {}
+        ACTIVE_JOBS.inc(platform=platform)
+
+    def start(self, phase):
+        self._open.setdefault(phase, time.perf_counter())
+
+    def stop(self, phase):
+        started = self._open.pop(phase, None)
+        if started is not None:
+            elapsed = time.perf_counter() - started
+            self.phases[phase] = self.phases.get(phase, 0.0) + elapsed
+            PHASE_SECONDS.observe(elapsed, phase=phase, platform=self.platform)
+
+    @contextmanager
+    def phase(self, phase):
+        self.start(phase)
+        try:
+            yield
+        finally:
+            self.stop(phase)
+
+    def on_progress(self, d):
+        """Hook de progreso de yt-dlp: suma los bytes de cada archivo terminado"""
+        if d.get('status') == 'downloading' and 'postproceso' in self._open:
+            # En una playlist la siguiente entrada vuelve a transferir
+            self.stop('postproceso')
+            self.start('transferencia')
+        elif d.get('status') == 'finished':
+            self.bytes += d.get('total_bytes') or d.get('downloaded_bytes') or 0
+
+    def on_postprocess(self, d):
+        """Hook de postproceso: separa el tiempo de FFmpeg del de transferencia.
+
+        Solo el primer postprocesador corta la transferencia; los siguientes
+        (incluido el que mueve el archivo final) siguen en la misma fase.
+        """
+        if d.get('status') == 'started' and 'transferencia' in self._open:
+            self.stop('transferencia')
+            self.start('postproceso')
+
+    def on_log(self, level, message):
+        if level == 'error':
+            self.last_error = message
+        if 'Retrying' in message or 'Reintentando' in message:
+            self.retries += 1
+            RETRIES_TOTAL.inc(platform=self.platform)
+
+    def rate(self):
+        """Velocidad media de transferencia en bytes/s, o None sin datos"""
+        transfer = self.phases.get('transferencia')
+        return self.bytes / transfer if self.bytes and transfer else None
+
+    def finish(self, status):
+        """Cierra las fases abiertas y registra el trabajo en las métricas"""
+        for phase in list(self._open):
+            self.stop(phase)
+        ACTIVE_JOBS.dec(platform=self.platform)
+        JOBS_TOTAL.inc(platform=self.platform, status=status)
+        if self.bytes:
+            BYTES_TOTAL.inc(self.bytes, platform=self.platform)
+            rate = self.rate()
+            if rate:
+                THROUGHPUT.observe(rate, platform=self.platform)
+        summary = {
+            'url': self.url,
+            'platform': self.platform,
+            'status': status,
+            'seconds': round(time.perf_counter() - self.started, 3),
+            'phases': {k: round(v, 3) for k, v in self.phases.items()},
+            'bytes': self.bytes,
+            'retries': self.retries,
+        }
+        with registry._lock:
+            registry.recent_jobs.append(summary)
+        return summary
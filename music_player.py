@@ -1,5 +1,8 @@
 from PyQt5.QtCore import QObject, pyqtSignal, QUrl, QTime, QTimer
-import vlc
+from playback_profiles import PROFILES, DEFAULT_PROFILE, StatsMonitor, create_instance
+from seek_controller import SeekController
+from playlist import Playlist
+from shuffle_engine import ShuffleEngine
 import os
 
 class MusicPlayer(QObject):
@@ -9,13 +12,25 @@ class MusicPlayer(QObject):
     state_changed = pyqtSignal(bool)  # True for playing, False for paused
     volume_changed = pyqtSignal(float)
 
-    def __init__(self):
+    def __init__(self, profile=DEFAULT_PROFILE, prefetcher=None):
         super().__init__()
-        self.instance = vlc.Instance()
-        self.player = self.instance.media_player_new()
-        self.current_playlist = []
-        self.current_index = -1
+        # VLC se inicializa al reproducir por primera vez (ver _ensure_player)
+        self.profile = profile if profile in PROFILES else DEFAULT_PROFILE
+        self.stats_monitor = StatsMonitor()
+        self.seek_controller = SeekController(lambda: self.player, parent=self)
+        self.prefetcher = prefetcher  # ReadaheadPrefetcher opcional
+        self.instance = None
+        self.player = None
+        self.event_manager = None
+        # Compartida con el modelo de la lista de música (ver LibraryModel)
+        self.current_playlist = Playlist()
+        self.current_path = None
+        self._last_index = -1
         self.current_position = 0
+        # Orden aleatorio solo de la reproducción; la lista mostrada no cambia
+        self.shuffle = False
+        self.shuffle_engine = ShuffleEngine()
+        self._shuffle_version = None
         self._volume = 1.0  # 100% volumen por defecto
 
         # Timer para actualizar la posición
@@ -23,13 +38,68 @@ class MusicPlayer(QObject):
         self.timer.setInterval(1000)  # Update every second
         self.timer.timeout.connect(self._update_position)
 
-        # Configurar manejador de eventos de VLC
-        self.event_manager = self.player.event_manager()
-        self.event_manager.event_attach(vlc.EventType.MediaPlayerEndReached, self._on_end_reached)
+    def _ensure_player(self):
+        """Crea la instancia de VLC la primera vez que se necesita"""
+        if self.player is None:
+            import vlc
+            self.instance = create_instance(self.profile)
+            self.player = self.instance.media_player_new()
+            self.player.audio_set_volume(int(self._volume * 100))
+
+            # Configurar manejador de eventos de VLC
+            self.event_manager = self.player.event_manager()
+            self.event_manager.event_attach(vlc.EventType.MediaPlayerEndReached, self._on_end_reached)
+        return self.player
+
+    def set_profile(self, profile):
+        """Cambia el perfil de libVLC; si hay una pista sonando, la retoma en el mismo punto"""
+        if profile == self.profile or profile not in PROFILES:
+            return
+        self.profile = profile
+        if self.player is None:
+            return
+        position = self.player.get_time()
+        was_playing = self.player.is_playing()
+        self.seek_controller.cancel()
+        self.player.stop()
+        self.player.release()
+        self.instance.release()
+        self.player = self.instance = self.event_manager = None
+        self.stats_monitor.reset()
+        self.current_position = position
+        if was_playing and 0 <= self.current_index < len(self.current_playlist):
+            self.play_track(self.current_index, start_ms=position)
+
+    @property
+    def current_index(self):
+        """Posición de la pista actual; se busca por ruta, así que sobrevive a las recargas de la lista"""
+        index = self.current_playlist.index_of(self.current_path) if self.current_path else -1
+        if index >= 0:
+            return index
+        # La pista ya no está: se sigue desde donde estaba
+        return min(self._last_index, len(self.current_playlist) - 1)
+
+    def stats(self, elapsed=1.0):
+        """Estadísticas de decodificación de la pista actual (ver playback_profiles)"""
+        if self.player is None:
+            return None
+        return self.stats_monitor.sample(self.player.get_media(), elapsed)
+
+    def set_shuffle(self, enabled):
+        """Activa o desactiva el orden aleatorio de reproducción"""
+        self.shuffle = enabled
+        if enabled and self.current_path:
+            self._sync_shuffle()
+            self.shuffle_engine.played(self.current_index, self.current_playlist.__getitem__)
+
+    def _sync_shuffle(self):
+        """Reinicia el sorteo si la lista cambió; las pistas ya escuchadas no se repiten"""
+        if self._shuffle_version != self.current_playlist.version:
+            self._shuffle_version = self.current_playlist.version
+            self.shuffle_engine.reset(len(self.current_playlist))
 
     def load_directory(self, directory, sort_by="Alfabético"):
-        """Carga todas las canciones MP3 del directorio"""
-        self.current_playlist = []
+        """Carga todas las canciones MP3 del directorio; "Aleatorio" solo cambia la reproducción"""
         files = []
         for file in os.listdir(directory):
             if file.lower().endswith('.mp3'):
@@ -43,16 +113,23 @@ class MusicPlayer(QObject):
         # Aplicar filtro
         if sort_by == "Fecha":
             files.sort(key=lambda x: x['date'], reverse=True)
-        elif sort_by == "Alfabético":
+        else:
             files.sort(key=lambda x: x['name'].lower())
-        elif sort_by == "Aleatorio":
-            import random
-            random.shuffle(files)
 
-        self.current_playlist = [file['path'] for file in files]
+        self.current_playlist.set_paths(file['path'] for file in files)
+        self.set_shuffle(sort_by == "Aleatorio")
 
     def play_pause(self):
         """Alterna entre reproducir y pausar"""
+        if self.player is None:
+            # Nada cargado todavía: empezar por la primera pista (o retomar tras cambiar de perfil)
+            if self.current_path is None and self.shuffle:
+                self._sync_shuffle()
+                playlist = self.current_playlist
+                self.play_track(self.shuffle_engine.next(playlist.__getitem__, playlist.index_of) or 0)
+            else:
+                self.play_track(max(self.current_index, 0), self.current_position)
+            return
         if self.player.is_playing():
             self.player.pause()
             self.timer.stop()
@@ -62,30 +139,60 @@ class MusicPlayer(QObject):
             self.timer.start()
             self.state_changed.emit(True)
 
-    def play_track(self, index):
+    def play_track(self, index, start_ms=0):
         """Reproduce una pista específica"""
         if 0 <= index < len(self.current_playlist):
+            self._ensure_player()
+            self.seek_controller.cancel()
             self.player.stop()
-            self.current_index = index
+            self.current_path = self.current_playlist[index]
+            self._last_index = index
 
-            media = self.instance.media_new(self.current_playlist[index])
+            media = self.instance.media_new(self.current_path)
+            if start_ms > 0:
+                media.add_option(f":start-time={start_ms / 1000:.3f}")
             self.player.set_media(media)
+            self.stats_monitor.reset()
 
             # Reproducir después de que el medio esté listo
             self.player.play()
-            self.current_position = 0
+            self.current_position = start_ms
+            self._prefetch_next()
             self.timer.start()
 
             # Emitir información de la pista
-            self.track_changed.emit(os.path.basename(self.current_playlist[index]))
+            self.track_changed.emit(os.path.basename(self.current_path))
             self.state_changed.emit(True)
 
             # Obtener y emitir duración después de un breve retraso
             QTimer.singleShot(500, self._emit_duration)
 
+    def play_path(self, path):
+        """Reproduce una pista de la lista por su ruta"""
+        index = self.current_playlist.index_of(path)
+        if index >= 0 and self.shuffle:
+            # Elegida a mano: entra al historial y el sorteo ya no la repite
+            self._sync_shuffle()
+            self.shuffle_engine.played(index, self.current_playlist.__getitem__)
+        self.play_track(index)
+
+    def _prefetch_next(self):
+        """Pide al kernel el comienzo de las pistas siguientes antes de necesitarlas"""
+        if self.prefetcher is None:
+            return
+        playlist = self.current_playlist
+        self.prefetcher.set_active(self.current_path, owner="música")
+        if self.shuffle:
+            self._sync_shuffle()
+            upcoming = self.shuffle_engine.peek(playlist.__getitem__, playlist.index_of)
+            following = [playlist[upcoming]] if upcoming is not None else []
+        else:
+            following = [playlist[(self._last_index + offset) % len(playlist)] for offset in (1, 2)]
+        self.prefetcher.hint(following, owner="música")
+
     def _emit_duration(self):
         """Emite la duración de la pista actual"""
-        if self.player.get_length() > 0:
+        if self.player and self.player.get_length() > 0:
             self.duration_changed.emit(self.player.get_length())
 
     def _on_end_reached(self, event):
@@ -95,23 +202,34 @@ class MusicPlayer(QObject):
 
     def next_track(self):
         """Reproduce la siguiente pista"""
-        if self.current_playlist:
+        if not self.current_playlist:
+            return
+        if self.shuffle:
+            self._sync_shuffle()
+            next_index = self.shuffle_engine.next(self.current_playlist.__getitem__,
+                                                  self.current_playlist.index_of)
+        else:
             next_index = (self.current_index + 1) % len(self.current_playlist)
-            self.play_track(next_index)
+        self.play_track(next_index)
 
     def previous_track(self):
-        """Reproduce la pista anterior"""
-        if self.current_playlist:
+        """Reproduce la pista anterior; en aleatorio, la anterior del historial"""
+        if not self.current_playlist:
+            return
+        if self.shuffle:
+            self._sync_shuffle()
+            prev_index = self.shuffle_engine.previous(self.current_playlist.index_of)
+            if prev_index is None:
+                prev_index = self.current_index  # sin historial: volver a empezar la pista
+        else:
             prev_index = (self.current_index - 1) % len(self.current_playlist)
-            self.play_track(prev_index)
+        self.play_track(prev_index)
 
-    def seek(self, position):
-        """Busca una posición específica en la pista actual"""
-        if self.player:
-            length = self.player.get_length()
-            if length > 0:
-                self.player.set_position(float(position) / length)
-                self.current_position = position
+    def seek(self, position, precise=True):
+        """Busca una posición (ms) en la pista actual; ``precise=False`` al arrastrar"""
+        if self.player and self.player.get_length() > 0:
+            self.seek_controller.seek(position, precise)
+            self.current_position = position
 
     def set_volume(self, volume):
         """Establece el volumen (0.0 a 1.0)"""
@@ -122,11 +240,14 @@ class MusicPlayer(QObject):
 
     def _update_position(self):
         """Actualiza la posición actual durante la reproducción"""
-        if self.player.is_playing():
+        if self.player and self.player.is_playing() and not self.seek_controller.is_seeking():
             length = self.player.get_length()
             if length > 0:
-                current_pos = int(self.player.get_position() * length)
+                fraction = self.player.get_position()
+                current_pos = int(fraction * length)
                 self.position_changed.emit(current_pos)
+                if self.prefetcher is not None:
+                    self.prefetcher.playhead(self.current_path, fraction)
 
     def format_time(self, ms):
         """Formatea el tiempo en milisegundos a formato MM:SS"""
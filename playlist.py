@@ -0,0 +1,57 @@
+class Playlist:
+    """Lista de reproducción con índice ruta -> posición.
+
+    La comparten el modelo de la lista de música y ``MusicPlayer``: empezar
+    desde una pista o resaltar la actual es una búsqueda en un diccionario,
+    no un recorrido de la lista. Se comporta como una lista de rutas de solo
+    lectura (``len``, índices, iteración); ``version`` cambia con cada
+    modificación.
+    """
+
+    def __init__(self, paths=()):
+        self._paths = []
+        self._positions = {}
+        self.version = 0
+        self.set_paths(paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __getitem__(self, index):
+        return self._paths[index]
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __contains__(self, path):
+        return path in self._positions
+
+    def index_of(self, path):
+        """Posición de ``path`` o -1 si no está"""
+        return self._positions.get(path, -1)
+
+    def set_paths(self, paths):
+        self._paths = list(dict.fromkeys(paths))
+        self._positions = {path: i for i, path in enumerate(self._paths)}
+        self.version += 1
+
+    def append(self, paths):
+        """Agrega al final las rutas que todavía no están"""
+        for path in paths:
+            if path not in self._positions:
+                self._positions[path] = len(self._paths)
+                self._paths.append(path)
+        self.version += 1
+
+    def remove(self, paths):
+        """Quita rutas; solo se renumeran las posiciones a partir de la primera quitada"""
+        removed = [self._positions[path] for path in paths if path in self._positions]
+        if not removed:
+            return
+        first = min(removed)
+        for position in sorted(removed, reverse=True):
+            del self._positions[self._paths[position]]
+            del self._paths[position]
+        for i in range(first, len(self._paths)):
+            self._positions[self._paths[i]] = i
+        self.version += 1
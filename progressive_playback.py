@@ -0,0 +1,239 @@
+"""Reproducción de descargas en curso a través de un proxy HTTP local.
+
+yt-dlp escribe cada descarga en un archivo ``.part`` que crece de forma
+secuencial (también con HLS/DASH, que agregan los fragmentos en orden) y lo
+renombra al terminar. El proxy sirve ese archivo por HTTP a libVLC; cuando el
+reproductor pide bytes que todavía no llegaron, la petición espera a que el
+hook de progreso avise de nuevos datos en lugar de cortar el flujo.
+"""
+import os
+import re
+import uuid
+import threading
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+_STREAM = re.compile(r'^/stream/([0-9a-f]+)$')
+_RANGE = re.compile(r'bytes=(\d*)-(\d*)')
+
+CHUNK_SIZE = 256 * 1024
+# Datos mínimos antes de abrir el reproductor
+PLAYABLE_BYTES = 2 * 1024 * 1024
+# Opciones de yt-dlp para que el archivo se pueda leer mientras crece
+PROGRESSIVE_OPTIONS = {
+    # Un único archivo con audio y video; los formatos separados solo se
+    # pueden ver después de la mezcla final
+    'format': 'best[ext=mp4][acodec!=none][vcodec!=none]/best[acodec!=none][vcodec!=none]/best',
+    # Un remux posterior reemplazaría el archivo que el reproductor está leyendo
+    'fixup': 'warn',
+}
+# libVLC: más búfer de red para absorber las esperas del proxy
+PLAYER_OPTIONS = (':network-caching=3000',)
+
+
+class GrowingFile:
+    """Archivo de una descarga en curso y el estado que informa yt-dlp"""
+
+    def __init__(self, url):
+        self.url = url
+        self.filename = None
+        self.tmpfilename = None
+        self.total_bytes = None
+        self.done = False
+        self.failed = False
+        self.notified_playable = False
+        self.condition = threading.Condition()
+
+    def path(self):
+        """El .part mientras exista; después, el archivo final"""
+        if self.tmpfilename and os.path.exists(self.tmpfilename):
+            return self.tmpfilename
+        return self.filename
+
+    def available(self):
+        path = self.path()
+        try:
+            return os.path.getsize(path) if path else 0
+        except OSError:
+            return 0
+
+    def update(self, d):
+        with self.condition:
+            self.filename = d.get('filename') or self.filename
+            self.tmpfilename = d.get('tmpfilename') or self.tmpfilename
+            # Solo un tamaño exacto permite anunciar Content-Length y saltos
+            self.total_bytes = d.get('total_bytes') or self.total_bytes
+            if d.get('status') == 'finished':
+                self.total_bytes = self.available() or self.total_bytes
+            self.condition.notify_all()
+
+    def finish(self, ok):
+        with self.condition:
+            self.done = True
+            self.failed = not ok
+            self.condition.notify_all()
+
+    def wait_for(self, offset, timeout):
+        """Espera a que haya datos después de ``offset``; devuelve los disponibles"""
+        with self.condition:
+            available = self.available()
+            while available <= offset and not self.done:
+                if not self.condition.wait(timeout):
+                    break
+                available = self.available()
+            return available
+
+    def read(self, offset, size):
+        # Se abre y cierra en cada lectura para no impedir el renombrado final en Windows
+        path = self.path()
+        if not path:
+            return b""
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                return f.read(size)
+        except OSError:
+            return b""
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MediaDownloaderProxy/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        match = _STREAM.match(self.path)
+        stream = self.server.get(match.group(1)) if match else None
+        if stream is None:
+            self.send_error(404)
+            return
+
+        start, end, suffix = 0, None, None
+        range_match = _RANGE.match(self.headers.get('Range', ''))
+        if range_match:
+            first, last = range_match.groups()
+            if first:
+                start = int(first)
+                end = int(last) if last else None
+            elif last:
+                suffix = int(last)  # "bytes=-N": los últimos N bytes
+            else:
+                range_match = None
+
+        total = stream.total_bytes
+        if total and suffix is not None:
+            start, end = max(0, total - suffix), total - 1
+        elif suffix is not None:
+            range_match = None  # sin tamaño no se sabe dónde empiezan los últimos N bytes
+        if total and range_match and (start >= total or (end is not None and end < start) or suffix == 0):
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{total}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if total:
+            end = min(end if end is not None else total - 1, total - 1)
+            self.send_response(206 if range_match else 200)
+            self.send_header("Content-Length", str(end - start + 1))
+            if range_match:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{total}")
+            self.send_header("Accept-Ranges", "bytes")
+        else:
+            # Tamaño desconocido (p. ej. HLS): flujo sin saltos hasta cerrar la conexión
+            self.send_response(200)
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.send_header("Content-Type", "application/octet-stream")
+        self.end_headers()
+
+        offset = start
+        try:
+            while end is None or offset <= end:
+                available = stream.wait_for(offset, self.server.underrun_timeout)
+                if available <= offset:
+                    # Terminó (o se agotó la espera) sin más datos
+                    break
+                limit = available - offset if end is None else min(available, end + 1) - offset
+                data = stream.read(offset, min(CHUNK_SIZE, limit))
+                if not data:
+                    break
+                self.wfile.write(data)
+                offset += len(data)
+        except (ConnectionError, OSError):
+            pass
+
+
+class ProgressivePlaybackServer(ThreadingHTTPServer):
+    """Proxy local que sirve descargas en curso; se inicia al primer uso"""
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, underrun_timeout=30.0, max_streams=20):
+        super().__init__((host, port), StreamHandler)
+        self.underrun_timeout = underrun_timeout
+        self.max_streams = max_streams
+        self._lock = threading.Lock()
+        self._streams = OrderedDict()  # id -> GrowingFile
+        self._by_url = {}
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.serve_forever, name="progressive-proxy", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self.shutdown()
+            self._thread = None
+        self.server_close()
+
+    def get(self, stream_id):
+        with self._lock:
+            return self._streams.get(stream_id)
+
+    def register(self, url):
+        """Registra una descarga que se podrá reproducir mientras avanza"""
+        self.start()
+        with self._lock:
+            stream_id = self._by_url.get(url)
+            if stream_id is None:
+                stream_id = uuid.uuid4().hex
+                self._streams[stream_id] = GrowingFile(url)
+                self._by_url[url] = stream_id
+                while len(self._streams) > self.max_streams:
+                    _, old = self._streams.popitem(last=False)
+                    self._by_url.pop(old.url, None)
+            return self.stream_url(stream_id)
+
+    def stream_url(self, stream_id):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/stream/{stream_id}"
+
+    def url_for(self, url):
+        with self._lock:
+            stream_id = self._by_url.get(url)
+        return self.stream_url(stream_id) if stream_id else None
+
+    def _stream_for(self, url):
+        with self._lock:
+            stream_id = self._by_url.get(url)
+            return self._streams.get(stream_id) if stream_id else None
+
+    def feed(self, url, d):
+        """Actualiza el archivo de la descarga; devuelve True la primera vez que es reproducible"""
+        stream = self._stream_for(url)
+        if stream is None:
+            return False
+        stream.update(d)
+        ready = (d.get('downloaded_bytes') or 0) >= PLAYABLE_BYTES or d.get('status') == 'finished'
+        if not stream.notified_playable and ready:
+            stream.notified_playable = True
+            return True
+        return False
+
+    def finish(self, url, ok):
+        stream = self._stream_for(url)
+        if stream is not None:
+            stream.finish(ok)
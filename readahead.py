@@ -0,0 +1,196 @@
+"""Precarga en la caché de páginas de los archivos que probablemente se reproduzcan.
+
+Con ``posix_fadvise(WILLNEED)`` el kernel lee en segundo plano el rango
+pedido; donde no existe (Windows, macOS) se lee el rango y se descarta. Todo
+lo precargado cuenta contra un presupuesto de memoria: al superarlo se
+liberan (``DONTNEED``) las precargas más viejas, pero nunca las de un archivo
+que se está reproduciendo, y tampoco se piden rangos más grandes que el
+presupuesto, así que la precarga no desplaza las páginas del stream activo.
+
+Varios reproductores comparten una instancia: cada uno se registra con su
+propio ``owner`` y tiene su archivo activo y sus sugerencias, así que abrir
+un video no quita la protección a la pista de música que sigue sonando.
+"""
+import os
+import threading
+from collections import OrderedDict, deque
+import metrics
+
+HEAD_BYTES = 8 * 1024 * 1024       # comienzo de los archivos siguientes
+AHEAD_BYTES = 32 * 1024 * 1024     # ventana por delante del cabezal
+READ_CHUNK = 1024 * 1024
+
+PREFETCH_BYTES = metrics.registry.counter("readahead_bytes_total", "Bytes pedidos al kernel por la precarga")
+
+_FADVISE = hasattr(os, 'posix_fadvise')
+
+
+class ReadaheadPrefetcher:
+    """Precarga el comienzo de los próximos archivos y la zona por delante del cabezal"""
+
+    def __init__(self, budget_bytes=256 * 1024 * 1024, head_bytes=HEAD_BYTES, ahead_bytes=AHEAD_BYTES):
+        self.budget = budget_bytes
+        self.head_bytes = min(head_bytes, budget_bytes)
+        self.ahead_bytes = min(ahead_bytes, budget_bytes // 2)
+        self._active = {}               # dueño -> ruta que está reproduciendo
+        self._hints = {}                # dueño -> rutas sugeridas, de la más a la menos probable
+        self._ahead_until = {}          # ruta activa -> fin de la ventana ya pedida
+        self._advised = OrderedDict()   # (ruta, inicio) -> bytes; del más viejo al más nuevo
+        self._used = 0
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="readahead", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._queue.clear()
+            self._cond.notify_all()
+
+    def active_paths(self):
+        with self._cond:
+            return set(self._active.values())
+
+    def _hinted_locked(self):
+        """Sugerencias de todos los dueños, de la más a la menos probable"""
+        hinted = []
+        for paths in self._hints.values():
+            hinted.extend(path for path in paths if path not in hinted)
+        return hinted
+
+    def set_active(self, path, owner=None):
+        """Indica el archivo que reproduce ``owner`` (None al cerrar); sus páginas no se liberan"""
+        with self._cond:
+            previous = self._active.pop(owner, None)
+            if path:
+                self._active[owner] = path
+            if previous and previous not in self._active.values():
+                self._ahead_until.pop(previous, None)
+        if path:
+            self._submit(path, 0, self.head_bytes)
+
+    def hint(self, paths, owner=None):
+        """Archivos que probablemente ``owner`` reproduzca a continuación, en orden de probabilidad.
+
+        Reemplaza las sugerencias anteriores del mismo dueño; las que no
+        entran en el presupuesto se descartan en lugar de desalojar a las más
+        probables.
+        """
+        with self._cond:
+            active = set(self._active.values())
+            paths = tuple(path for path in paths if path and path not in active)
+            self._hints[owner] = paths
+        for path in paths:
+            self._submit(path, 0, self.head_bytes)
+
+    def playhead(self, path, fraction):
+        """Posición de reproducción (0-1); precarga la ventana siguiente cuando hace falta"""
+        if not path or path not in self.active_paths():
+            return
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        offset = int(size * max(0.0, min(1.0, fraction)))
+        with self._cond:
+            requested = self._ahead_until.get(path, 0)
+            if offset < requested - 2 * self.ahead_bytes:
+                requested = 0  # salto hacia atrás: se empieza otra ventana
+            elif requested - offset >= self.ahead_bytes // 2:
+                return  # todavía queda al menos media ventana precargada
+            # Lo que ya quedó detrás del cabezal lo leyó el reproductor: deja de contar
+            for key in [k for k in self._advised if k[0] == path and k[1] + self._advised[k] <= offset]:
+                self._used -= self._advised.pop(key)
+            start = max(offset, requested)
+            end = min(size, offset + self.ahead_bytes)
+            self._ahead_until[path] = end
+        if end > start:
+            self._submit(path, start, end - start)
+
+    def _submit(self, path, start, length):
+        with self._cond:
+            if self._stopped or (path, start) in self._advised:
+                return
+            if any(queued[:2] == (path, start) for queued in self._queue):
+                return
+            self._queue.append((path, start, length))
+            self._cond.notify()
+        self._start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                path, start, length = self._queue.popleft()
+            try:
+                self._advise(path, start, length)
+            except OSError:
+                pass
+
+    def _advise(self, path, start, length):
+        if not os.path.isfile(path):
+            return
+        with self._cond:
+            is_active = path in self._active.values()
+            if not is_active and path not in self._hinted_locked():
+                return  # la sugerencia ya fue reemplazada
+        # El archivo activo puede desalojar sugerencias; una sugerencia solo a precargas viejas
+        if not self._make_room(length, evict_hints=is_active):
+            return
+        with open(path, 'rb') as f:
+            if _FADVISE:
+                os.posix_fadvise(f.fileno(), start, length, os.POSIX_FADV_WILLNEED)
+            else:
+                f.seek(start)
+                remaining = length
+                while remaining > 0 and f.read(min(READ_CHUNK, remaining)):
+                    remaining -= READ_CHUNK
+        with self._cond:
+            self._advised[(path, start)] = length
+            self._used += length
+        PREFETCH_BYTES.inc(length)
+
+    def _make_room(self, length, evict_hints=False):
+        """Libera precargas hasta que ``length`` quepa en el presupuesto; devuelve si entra.
+
+        Primero las que ya no son sugerencias (de la más vieja a la más nueva)
+        y, si se permite, las sugerencias de la menos a la más probable.
+        """
+        released = []
+        with self._cond:
+            active = set(self._active.values())
+            hinted = self._hinted_locked()
+            candidates = [key for key in self._advised if key[0] not in active and key[0] not in hinted]
+            if evict_hints:
+                candidates += [(path, 0) for path in reversed(hinted)
+                               if path not in active and (path, 0) in self._advised]
+            for key in candidates:
+                if self._used + length <= self.budget:
+                    break
+                size = self._advised.pop(key)
+                self._used -= size
+                released.append((key[0], key[1], size))
+            fits = self._used + length <= self.budget
+        if _FADVISE:
+            self._release(released)
+        return fits
+
+    def _release(self, released):
+        for path, start, size in released:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.posix_fadvise(fd, start, size, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
@@ -0,0 +1,165 @@
+"""Perfilador por muestreo de todos los hilos de Python.
+
+Un hilo aparte lee ``sys._current_frames()`` cada pocos milisegundos y cuenta
+las pilas repetidas, así que el costo no depende de cuántas funciones se
+llamen (a diferencia de cProfile). El resultado se exporta como pilas plegadas
+(flamegraph.pl, speedscope) o como JSON de speedscope con un perfil por hilo.
+
+Uso desde la línea de comandos:
+    python sampling_profiler.py --duration 10 --output perfil.speedscope.json main.py
+"""
+import os
+import sys
+import json
+import time
+import threading
+from collections import Counter
+
+DEFAULT_INTERVAL = 0.005
+
+
+def _frame_label(code, lineno):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{lineno})"
+
+
+class SamplingProfiler:
+    """Toma muestras periódicas de las pilas de todos los hilos"""
+
+    def __init__(self, interval=DEFAULT_INTERVAL, max_depth=128):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = Counter()   # (nombre del hilo, pila de la raíz a la hoja) -> muestras
+        self.sample_count = 0
+        self.started_at = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self.samples.clear()
+        self.sample_count = 0
+        self._stop.clear()
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    stack.append(_frame_label(frame.f_code, frame.f_lineno))
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples[(names.get(thread_id, f"hilo-{thread_id}"), tuple(stack))] += 1
+            self.sample_count += 1
+
+    def top(self, count=20):
+        """Funciones con más muestras propias (la hoja de la pila)"""
+        leaves = Counter()
+        for (_, stack), samples in self.samples.items():
+            if stack:
+                leaves[stack[-1]] += samples
+        return leaves.most_common(count)
+
+    def to_folded(self):
+        """Pilas plegadas: ``hilo;raíz;...;hoja cantidad`` por línea"""
+        lines = []
+        for (thread_name, stack), samples in sorted(self.samples.items()):
+            frames = [thread_name] + [f.replace(";", ":") for f in stack]
+            lines.append(f"{';'.join(frames)} {samples}")
+        return "\n".join(lines) + "\n"
+
+    def to_speedscope(self, name="Media Downloader"):
+        """Documento de speedscope con un perfil 'sampled' por hilo"""
+        frames = []
+        frame_index = {}
+        by_thread = {}
+        for (thread_name, stack), samples in self.samples.items():
+            indices = []
+            for label in stack:
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    frames.append({'name': label})
+                indices.append(frame_index[label])
+            by_thread.setdefault(thread_name, []).append((indices, samples))
+
+        profiles = []
+        for thread_name, stacks in sorted(by_thread.items()):
+            weights = [samples * self.interval for _, samples in stacks]
+            profiles.append({
+                'type': 'sampled',
+                'name': thread_name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': [indices for indices, _ in stacks],
+                'weights': weights,
+            })
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'sampling_profiler.py',
+            'shared': {'frames': frames},
+            'profiles': profiles,
+        }
+
+    def save(self, path):
+        """Guarda en formato speedscope (.json) o pilas plegadas (otra extensión)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.endswith('.json'):
+                json.dump(self.to_speedscope(), f)
+            else:
+                f.write(self.to_folded())
+
+
+def main():
+    import runpy
+    import argparse
+    parser = argparse.ArgumentParser(description="Perfila un script de Python por muestreo")
+    parser.add_argument("--duration", type=float, help="Segundos a muestrear (por defecto hasta que termine)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL)
+    parser.add_argument("--output", default="perfil.speedscope.json")
+    parser.add_argument("script")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    profiler = SamplingProfiler(args.interval)
+    if args.duration:
+        def stop_later():
+            time.sleep(args.duration)
+            profiler.stop()
+            profiler.save(args.output)
+            print(f"Perfil guardado en {args.output}", file=sys.__stderr__)
+        threading.Thread(target=stop_later, daemon=True).start()
+
+    sys.argv = [args.script] + args.args
+    profiler.start()
+    try:
+        runpy.run_path(args.script, run_name="__main__")
+    finally:
+        if profiler.running:
+            profiler.stop()
+            profiler.save(args.output)
+            print(f"Perfil guardado en {args.output}", file=sys.__stderr__)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import re
+import unicodedata
+from collections import defaultdict
+from utils import clean_title
+
+
+def normalize_text(text):
+    """Minúsculas, sin acentos ni signos: la forma en que se comparan títulos y búsquedas"""
+    text = unicodedata.normalize('NFKD', text.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r'[\W_]+', ' ', text).strip()
+
+
+def normalize_title(filename):
+    """Nombre de archivo normalizado, sin extensión ni códigos como [1080p]"""
+    return normalize_text(clean_title(filename))
+
+
+def _trigrams(word):
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+class SearchIndex:
+    """Índice de trigramas y prefijos para filtrar la biblioteca mientras se escribe.
+
+    Cada palabra de la búsqueda debe aparecer en el título (o en una
+    etiqueta). Las de tres letras o más se buscan como subcadena: los
+    trigramas dan los candidatos y una comprobación final descarta los falsos
+    positivos. Las de una o dos letras buscan palabras que empiecen así.
+    Se guarda el resultado de cada palabra de la última búsqueda: al escribir
+    una letra más, las demás palabras no se recalculan y la que cambió se
+    filtra a partir de su resultado anterior en lugar de volver al índice.
+    """
+
+    def __init__(self):
+        self._titles = {}
+        self._tags = {}
+        self._texts = {}                    # id -> título y etiquetas normalizados
+        self._trigrams = defaultdict(set)   # trigrama -> ids
+        self._prefixes = defaultdict(set)   # primeras una y dos letras de cada palabra -> ids
+        self._token_results = {}           # palabra de la última búsqueda -> ids
+
+    def __len__(self):
+        return len(self._texts)
+
+    def clear(self):
+        self.__init__()
+
+    def add(self, doc_id, title, tags=()):
+        if doc_id in self._texts:
+            self.remove(doc_id)
+        self._titles[doc_id] = title
+        self._tags[doc_id] = tuple(tags)
+        text = " ".join([normalize_title(title)] + [normalize_text(tag) for tag in tags])
+        self._texts[doc_id] = text
+        for word in set(text.split()):
+            for trigram in _trigrams(word):
+                self._trigrams[trigram].add(doc_id)
+            self._prefixes[word[:1]].add(doc_id)
+            self._prefixes[word[:2]].add(doc_id)
+        self._token_results = {}
+
+    def set_tags(self, doc_id, tags):
+        """Reemplaza las etiquetas de un elemento ya indexado"""
+        if doc_id in self._titles:
+            self.add(doc_id, self._titles[doc_id], tags)
+
+    def remove(self, doc_id):
+        text = self._texts.pop(doc_id, None)
+        if text is None:
+            return
+        del self._titles[doc_id]
+        del self._tags[doc_id]
+        for word in set(text.split()):
+            for key in _trigrams(word) | {word[:1], word[:2]}:
+                index = self._trigrams if len(key) == 3 else self._prefixes
+                ids = index.get(key)
+                if ids is not None:
+                    ids.discard(doc_id)
+                    if not ids:
+                        del index[key]
+        self._token_results = {}
+
+    def search(self, query):
+        """Ids que coinciden con todas las palabras de ``query``; None si no hay filtro"""
+        tokens = normalize_text(query).split()
+        if not tokens:
+            self._token_results = {}
+            return None
+
+        results = {}
+        for token in set(tokens):
+            matches = self._token_results.get(token)
+            if matches is None:
+                matches = self._match(token, self._narrowed(token))
+            results[token] = matches
+        # Se guarda el resultado de cada palabra: la próxima tecla solo cambia una
+        self._token_results = results
+
+        ordered = sorted(results.values(), key=len)
+        return ordered[0].intersection(*ordered[1:])
+
+    def _narrowed(self, token):
+        """Resultado de la búsqueda anterior que contiene todas las coincidencias de ``token``"""
+        best = None
+        for previous, matches in self._token_results.items():
+            # Una palabra corta (prefijo) que pasa a tres letras (subcadena) amplía los resultados
+            if token.startswith(previous) and (len(previous) >= 3 or len(token) < 3):
+                if best is None or len(matches) < len(best):
+                    best = matches
+        return best
+
+    def _match(self, token, candidates=None):
+        if len(token) < 3:
+            # El índice de prefijos es exacto: no hace falta comprobar
+            ids = self._prefixes.get(token, set())
+            return ids & candidates if candidates is not None else set(ids)
+
+        sets = sorted((self._trigrams.get(t, set()) for t in _trigrams(token)), key=len)
+        if candidates is not None and len(candidates) <= len(sets[0]):
+            pool = candidates
+        else:
+            pool = sets[0].intersection(*sets[1:])
+            if candidates is not None:
+                pool &= candidates
+            if len(token) == 3:
+                # Los trigramas son de una sola palabra: con tres letras coincidir es contenerlo
+                return pool
+        # Con más letras, los trigramas pueden estar en otro orden o en palabras distintas
+        texts = self._texts
+        return {doc_id for doc_id in pool if token in texts[doc_id]}
+
+def build_index(files):
+    """Índice de una lista de archivos; los ids son las posiciones en ``files``"""
+    index = SearchIndex()
+    for doc_id, file in enumerate(files):
+        index.add(doc_id, file['name'], file.get('tags', ()))
+    return index
@@ -0,0 +1,121 @@
+import time
+from collections import deque
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+import metrics
+
+SEEK_SECONDS = metrics.registry.histogram(
+    "playback_seek_seconds", "Tiempo hasta que libVLC alcanza la posición pedida (rapido, preciso)",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+
+# Margen para dar por alcanzado el objetivo: el salto rápido cae en el keyframe anterior.
+# Además la posición tiene que haber cambiado: hasta que libVLC aplica el salto
+# get_time() sigue devolviendo la posición anterior, que puede estar dentro del margen.
+FAST_TOLERANCE_MS = 5000
+PRECISE_TOLERANCE_MS = 300
+
+
+class SeekController(QObject):
+    """Agrupa los saltos del reproductor y mide cuánto tarda cada uno.
+
+    Mientras hay un salto en curso las peticiones nuevas solo reemplazan el
+    objetivo pendiente, así que arrastrar la barra genera un salto por vez en
+    lugar de decenas por segundo. Los saltos al arrastrar son rápidos (al
+    keyframe más cercano, si libVLC lo admite); al soltar se hace uno preciso.
+    """
+    seek_finished = pyqtSignal(float, bool)  # latencia en ms, preciso
+
+    def __init__(self, get_player, poll_ms=20, timeout_ms=1500, history=50, parent=None):
+        super().__init__(parent)
+        self._get_player = get_player  # el reproductor cambia al recrearlo con otro perfil
+        self.timeout = timeout_ms / 1000
+        self.latencies = deque(maxlen=history)
+        self._pending = None   # (ms, preciso)
+        self._inflight = None  # (ms, preciso, inicio, posición antes del salto)
+        self._fast_supported = None
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(poll_ms)
+        self._poll_timer.timeout.connect(self._poll)
+
+    def seek(self, target_ms, precise=False):
+        """Pide un salto a ``target_ms``; reemplaza cualquier objetivo aún no aplicado"""
+        self._pending = (max(0, int(target_ms)), precise)
+        if self._inflight is None:
+            self._issue()
+
+    def seek_fraction(self, fraction, precise=False):
+        player = self._get_player()
+        length = player.get_length() if player else 0
+        if length > 0:
+            self.seek(fraction * length, precise)
+
+    def is_seeking(self):
+        return self._inflight is not None or self._pending is not None
+
+    def cancel(self):
+        self._pending = self._inflight = None
+        self._poll_timer.stop()
+
+    def _issue(self):
+        player = self._get_player()
+        if player is None or self._pending is None:
+            self.cancel()
+            return
+        target_ms, precise = self._pending
+        self._pending = None
+        before_ms = player.get_time()
+        self._set_time(player, target_ms, fast=not precise)
+        self._inflight = (target_ms, precise, time.perf_counter(), before_ms)
+        self._poll_timer.start()
+
+    def _set_time(self, player, target_ms, fast):
+        # libVLC 4 acepta el argumento "fast"; con libVLC 3 todos los saltos son precisos
+        if fast and self._fast_supported is not False:
+            try:
+                player.set_time(target_ms, True)
+                self._fast_supported = True
+                return
+            except TypeError:
+                self._fast_supported = False
+        player.set_time(target_ms)
+
+    def _poll(self):
+        if self._inflight is None:
+            self._poll_timer.stop()
+            return
+        target_ms, precise, started, before_ms = self._inflight
+        player = self._get_player()
+        elapsed = time.perf_counter() - started
+        tolerance = PRECISE_TOLERANCE_MS if precise else FAST_TOLERANCE_MS
+        landed = False
+        if player is not None:
+            current_ms = player.get_time()
+            landed = current_ms != before_ms and abs(current_ms - target_ms) <= tolerance
+        if not landed and elapsed < self.timeout:
+            return
+
+        if landed:
+            kind = 'preciso' if precise else 'rapido'
+            SEEK_SECONDS.observe(elapsed, kind=kind)
+            self.latencies.append((elapsed * 1000, precise))
+            self.seek_finished.emit(elapsed * 1000, precise)
+        self._inflight = None
+        if self._pending is not None:
+            self._issue()
+        else:
+            self._poll_timer.stop()
+
+    def last_latency(self):
+        return self.latencies[-1][0] if self.latencies else None
+
+    def summary(self):
+        """Latencia media y máxima (ms) de los últimos saltos, por tipo"""
+        result = {}
+        for precise in (False, True):
+            values = [ms for ms, p in self.latencies if p == precise]
+            if values:
+                result['preciso' if precise else 'rapido'] = {
+                    'count': len(values),
+                    'avg_ms': sum(values) / len(values),
+                    'max_ms': max(values),
+                }
+        return result
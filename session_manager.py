@@ -0,0 +1,259 @@
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from url_router import default_router
+
+# Segundos entre líneas de progreso impresas: con logger yt-dlp manda cada actualización como una línea
+PROGRESS_LOG_INTERVAL = 2.0
+
+
+def _chrome_cookie_databases():
+    """Rutas candidatas a la base de cookies de Chrome según el sistema"""
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        root = os.path.join(os.environ.get("LOCALAPPDATA", ""), "Google", "Chrome", "User Data")
+    elif sys.platform == "darwin":
+        root = os.path.join(home, "Library", "Application Support", "Google", "Chrome")
+    else:
+        root = os.path.join(home, ".config", "google-chrome")
+    return (glob.glob(os.path.join(root, "*", "Cookies"))
+            + glob.glob(os.path.join(root, "*", "Network", "Cookies")))
+
+
+BROWSER_COOKIE_DATABASES = {
+    'chrome': _chrome_cookie_databases,
+}
+
+
+class _PooledYoutubeDL:
+    """Instancia de YoutubeDL reutilizable con hooks redirigibles por trabajo.
+
+    La instancia hace de logger de yt-dlp: imprime los mensajes como lo haría
+    yt-dlp y además los pasa al trabajo actual (para contar reintentos).
+    """
+
+    def __init__(self, key, opts, cookies=None, cookie_generation=None):
+        import yt_dlp
+        self.key = key
+        self.cookie_generation = cookie_generation
+        self.progress_callback = None
+        self.postprocessor_callback = None
+        self.log_callback = None
+        self._last_progress_log = 0.0
+        opts = dict(opts)
+        opts['progress_hooks'] = [self._progress]
+        opts['postprocessor_hooks'] = [self._postprocess]
+        opts['logger'] = self
+        self.ydl = yt_dlp.YoutubeDL(opts)
+        # Sin cookiefile el jar vive solo en memoria y close() no lo guarda en disco
+        for cookie in cookies or ():
+            self.ydl.cookiejar.set_cookie(cookie)
+
+    def _progress(self, d):
+        callback = self.progress_callback
+        if callback:
+            callback(d)
+
+    def _postprocess(self, d):
+        callback = self.postprocessor_callback
+        if callback:
+            callback(d)
+
+    def _is_throttled_progress(self, msg):
+        """Las líneas de progreso se imprimen de a una cada PROGRESS_LOG_INTERVAL (y siempre la del 100%)"""
+        msg = msg.lstrip('\r')
+        if not msg.startswith('[download]') or '%' not in msg or '100%' in msg:
+            return False
+        now = time.monotonic()
+        if now - self._last_progress_log < PROGRESS_LOG_INTERVAL:
+            return True
+        self._last_progress_log = now
+        return False
+
+    def _log(self, level, msg, stream):
+        if level == 'debug' and self._is_throttled_progress(msg):
+            return
+        print(msg.lstrip('\r'), file=stream)
+        callback = self.log_callback
+        if callback:
+            callback(level, msg)
+
+    def debug(self, msg):
+        self._log('debug', msg, sys.stdout)
+
+    def info(self, msg):
+        self._log('info', msg, sys.stdout)
+
+    def warning(self, msg):
+        self._log('warning', msg, sys.stderr)
+
+    def error(self, msg):
+        self._log('error', msg, sys.stderr)
+
+    def detach(self):
+        self.progress_callback = None
+        self.postprocessor_callback = None
+        self.log_callback = None
+
+    def close(self):
+        try:
+            self.ydl.close()
+        except Exception as e:
+            print(f"Error cerrando sesión de yt-dlp: {str(e)}")
+
+
+class SessionManager:
+    """Comparte cookies e instancias de YoutubeDL entre trabajos.
+
+    Las cookies del navegador se descifran una sola vez y quedan en memoria
+    hasta que vence el TTL o cambia la base de datos del navegador. Cada
+    instancia recibe una copia propia con solo las cookies de los dominios de
+    su plataforma; nada se escribe en disco. Las instancias de YoutubeDL se
+    agrupan por perfil de opciones y se devuelven al pool al terminar cada
+    trabajo, de modo que su sesión HTTP (y las conexiones keep-alive) se
+    reutiliza.
+    """
+
+    def __init__(self, cache_dir=None, cookie_ttl=30 * 60, max_idle_per_profile=4):
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.expanduser("~"), ".media_downloader_cache", "cookies")
+        # Versiones anteriores guardaban aquí las cookies en texto plano; se borran al cerrar
+        self.cache_dir = cache_dir
+        self.cookie_ttl = cookie_ttl
+        self.max_idle_per_profile = max_idle_per_profile
+        self._cookie_lock = threading.Lock()
+        self._cookies = {}  # navegador -> {'jar', 'generation', 'loaded_at', 'source_mtime', 'platforms'}
+        self._pool_lock = threading.Lock()
+        self._idle = {}     # clave de perfil -> [_PooledYoutubeDL]
+        self._retired_generations = set()  # (navegador, generación) de cookies ya renovadas
+
+    def _source_mtime(self, browser):
+        """Última modificación de la base de cookies del navegador"""
+        finder = BROWSER_COOKIE_DATABASES.get(browser)
+        mtimes = []
+        for path in finder() if finder else []:
+            try:
+                mtimes.append(os.path.getmtime(path))
+            except OSError:
+                pass
+        return max(mtimes) if mtimes else None
+
+    def cookies_for(self, browser, platform):
+        """Devuelve ``(cookies, generación)`` del navegador para los dominios de una plataforma"""
+        retired = None
+        with self._cookie_lock:
+            entry = self._cookies.get(browser)
+            source_mtime = self._source_mtime(browser)
+            if not entry or time.monotonic() - entry['loaded_at'] >= self.cookie_ttl \
+                    or entry['source_mtime'] != source_mtime:
+                from yt_dlp.cookies import extract_cookies_from_browser
+
+                if entry:
+                    retired = (browser, entry['generation'])
+                entry = self._cookies[browser] = {
+                    'jar': extract_cookies_from_browser(browser),
+                    'generation': entry['generation'] + 1 if entry else 1,
+                    'loaded_at': time.monotonic(),
+                    'source_mtime': source_mtime,
+                    'platforms': {},
+                }
+            cookies = entry['platforms'].get(platform)
+            if cookies is None:
+                # Mismo criterio de dominios que el router: las cookies de otros sitios no se prestan
+                cookies = entry['platforms'][platform] = [
+                    cookie for cookie in entry['jar']
+                    if default_router.host_platform(cookie.domain.lstrip('.')) == platform]
+            generation = entry['generation']
+        if retired:
+            self._retire_generation(retired)
+        return cookies, generation
+
+    def _retire_generation(self, generation):
+        """Cierra las instancias inactivas que usan cookies de una generación vieja"""
+        with self._pool_lock:
+            self._retired_generations.add(generation)
+            stale = [p for idle in self._idle.values() for p in idle if p.cookie_generation == generation]
+            for idle in self._idle.values():
+                idle[:] = [p for p in idle if p.cookie_generation != generation]
+        for p in stale:
+            p.close()
+
+    def prepare_options(self, ydl_opts):
+        """Saca cookiesfrombrowser de las opciones; devuelve ``(opts, cookies, generación)``"""
+        opts = dict(ydl_opts)
+        browser_spec = opts.pop('cookiesfrombrowser', None)
+        platform = opts.pop('cookie_platform', None)
+        if browser_spec:
+            try:
+                cookies, generation = self.cookies_for(browser_spec[0], platform)
+                return opts, cookies, (browser_spec[0], generation)
+            except Exception as e:
+                # Si no se pueden leer las cookies se deja que yt-dlp lo intente
+                print(f"Error cargando cookies de {browser_spec[0]}: {str(e)}")
+                opts['cookiesfrombrowser'] = browser_spec
+        return opts, None, None
+
+    def _profile_key(self, opts, cookie_generation=None):
+        serialized = json.dumps([opts, cookie_generation], sort_keys=True, default=repr)
+        return hashlib.md5(serialized.encode()).hexdigest()
+
+    @contextmanager
+    def acquire(self, ydl_opts, progress_hook=None, postprocessor_hook=None, log_hook=None):
+        """Presta una instancia de YoutubeDL para las opciones dadas"""
+        opts, cookies, cookie_generation = self.prepare_options(ydl_opts)
+        opts.pop('progress_hooks', None)
+        opts.pop('postprocessor_hooks', None)
+        opts.pop('logger', None)
+        key = self._profile_key(opts, cookie_generation)
+
+        pooled = None
+        with self._pool_lock:
+            idle = self._idle.get(key)
+            if idle:
+                pooled = idle.pop()
+        if pooled is None:
+            pooled = _PooledYoutubeDL(key, opts, cookies, cookie_generation)
+
+        pooled.progress_callback = progress_hook
+        pooled.postprocessor_callback = postprocessor_hook
+        pooled.log_callback = log_hook
+        try:
+            yield pooled.ydl
+        except BaseException:
+            # Tras un fallo el estado interno de la instancia no es confiable
+            pooled.detach()
+            pooled.close()
+            raise
+        pooled.detach()
+        self._release(pooled)
+
+    def _release(self, pooled):
+        with self._pool_lock:
+            if pooled.cookie_generation in self._retired_generations:
+                idle = None
+            else:
+                idle = self._idle.setdefault(pooled.key, [])
+            if idle is not None and len(idle) < self.max_idle_per_profile:
+                idle.append(pooled)
+                return
+        pooled.close()
+
+    def close_all(self):
+        """Cierra todas las instancias inactivas del pool y olvida las cookies descifradas"""
+        with self._pool_lock:
+            pooled = [p for idle in self._idle.values() for p in idle]
+            self._idle.clear()
+        for p in pooled:
+            p.close()
+        with self._cookie_lock:
+            self._cookies.clear()
+        for path in glob.glob(os.path.join(self.cache_dir, "*.txt")):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,121 @@
+import random
+from collections import deque
+
+
+class ShuffleEngine:
+    """Orden aleatorio de reproducción que se genera de a una pista.
+
+    Es un Fisher–Yates incremental sobre posiciones: cada ``next`` elige al
+    azar entre las que todavía no salieron y guarda solo los intercambios
+    hechos, así que empezar cuesta O(1) aunque la lista tenga 100k pistas y
+    la lista mostrada nunca cambia de orden. Las pistas no se repiten hasta
+    agotar la lista, incluso si la lista se recarga (se recuerdan las claves
+    ya reproducidas). ``previous`` recorre un historial acotado y ``next``
+    vuelve a avanzar por él antes de sortear otra pista.
+
+    ``key(posición)`` identifica una pista entre recargas y
+    ``locate(clave)`` devuelve su posición actual (-1 si ya no está); el
+    historial guarda claves, así que sobrevive a ``reset``. Sin ellas las
+    claves son las posiciones.
+    """
+
+    def __init__(self, size=0, history=200, rng=None):
+        self._rng = rng or random.Random()
+        self._back = deque(maxlen=history)  # claves ya reproducidas, la última al final
+        self._forward = []                  # claves a las que se volvió con previous
+        self._peeked = None                 # clave sorteada por peek y todavía no reproducida
+        self._played = set()                # claves reproducidas en este ciclo
+        self.reset(size)
+
+    def reset(self, size):
+        """Nuevo sorteo para una lista de ``size`` elementos; conserva el historial y lo ya reproducido"""
+        self.size = size
+        self._swaps = {}  # permutación dispersa: posición -> elemento
+        self._drawn = 0
+
+    def _locate(self, key, locate):
+        index = locate(key) if locate else key
+        return index if index is not None and 0 <= index < self.size else None
+
+    def _draw(self, key=None, avoid=None):
+        # Un paso de Fisher–Yates: elemento al azar de [drawn, size) al lugar drawn
+        j = self._rng.randrange(self._drawn, self.size)
+        if avoid is not None and self.size - self._drawn > 1:
+            chosen = self._swaps.get(j, j)
+            if (key(chosen) if key else chosen) == avoid:
+                # Se sortea entre las demás; la evitada sigue disponible para después
+                k = self._rng.randrange(self._drawn, self.size - 1)
+                j = k + 1 if k >= j else k
+        chosen = self._swaps.get(j, j)
+        self._swaps[j] = self._swaps.pop(self._drawn, self._drawn)
+        self._drawn += 1
+        return chosen
+
+    def next(self, key=None, locate=None):
+        """Posición de la próxima pista"""
+        index = None
+        while self._forward and index is None:
+            index = self._locate(self._forward.pop(), locate)
+        if index is None:
+            index = self._pick(key)
+        if index is not None:
+            played = key(index) if key else index
+            if played == self._peeked:
+                self._peeked = None
+            self._played.add(played)
+            self._back.append(played)
+        return index
+
+    def peek(self, key=None, locate=None):
+        """Próxima posición sin avanzar, para precargarla; ``next`` devolverá la misma"""
+        while self._forward:
+            index = self._locate(self._forward[-1], locate)
+            if index is not None:
+                return index
+            self._forward.pop()  # la pista ya no está en la lista
+        index = self._pick(key)
+        if index is None:
+            return None
+        self._peeked = key(index) if key else index
+        self._forward.append(self._peeked)
+        return index
+
+    def _pick(self, key):
+        if self.size == 0:
+            return None
+        avoid = None
+        for _ in range(2):
+            while self._drawn < self.size:
+                index = self._draw(key, avoid)
+                avoid = None
+                if (key(index) if key else index) not in self._played:
+                    return index
+            # Ciclo completo: se vuelve a sortear todo; la última no puede salir primera
+            self._played.clear()
+            self._swaps = {}
+            self._drawn = 0
+            if self._back and self.size > 1:
+                avoid = self._back[-1]
+        return None
+
+    def previous(self, locate=None):
+        """Posición de la pista anterior del historial, o None si no hay"""
+        if not self._back:
+            return None
+        current = self._back.pop()
+        while self._back:
+            index = self._locate(self._back[-1], locate)
+            if index is not None:
+                self._forward.append(current)
+                return index
+            self._back.pop()  # la pista anterior ya no está en la lista
+        self._back.append(current)
+        return None
+
+    def played(self, index, key=None):
+        """Registra una pista elegida a mano para que el orden aleatorio no la repita"""
+        played = key(index) if key else index
+        self._played.add(played)
+        self._back.append(played)
+        # Se descarta el camino hacia adelante del historial, pero no la pista ya sorteada
+        self._forward = [self._peeked] if self._peeked in self._forward and self._peeked != played else []
@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+import threading
+from collections import deque
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+THIS_FILE = os.path.abspath(__file__)
+APP_DIR = os.path.dirname(THIS_FILE)
+# Marcos desde los que se llama a app.exec_(); no son el slot bloqueante
+ENTRY_FUNCTIONS = ('<module>', 'main')
+
+
+def _describe(frame):
+    code = frame.f_code
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class StallWatchdog(QObject):
+    """Detecta bloqueos del bucle de eventos de Qt y a quién culpar.
+
+    Un QTimer del hilo de la UI marca un latido cada ``interval_ms``; un hilo
+    aparte revisa el último latido y, si se atrasa más de ``threshold_ms``,
+    captura la pila del hilo de la UI. El culpable es el primer marco de la
+    aplicación por encima de ``app.exec_()``: el slot que Qt está ejecutando.
+    """
+    stall_detected = pyqtSignal(dict)
+
+    def __init__(self, interval_ms=100, threshold_ms=200, max_stalls=500, parent=None):
+        super().__init__(parent)
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.stalls = deque(maxlen=max_stalls)
+        self._main_ident = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._current = None  # bloqueo en curso: {'slot', 'stack', 'started'}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.heartbeat = QTimer(self)
+        self.heartbeat.setInterval(interval_ms)
+        self.heartbeat.timeout.connect(self._beat)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._last_beat = time.perf_counter()
+        self._stop.clear()
+        self.heartbeat.start()
+        self._thread = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.heartbeat.stop()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _beat(self):
+        now = time.perf_counter()
+        with self._lock:
+            stall, self._current = self._current, None
+            late = now - self._last_beat - self.interval
+            self._last_beat = now
+        if stall is not None:
+            stall['duration'] = late
+            self.stalls.append(stall)
+            self.stall_detected.emit(stall)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            with self._lock:
+                if self._current is not None:
+                    continue
+                if time.perf_counter() - self._last_beat - self.interval < self.threshold:
+                    continue
+                frame = sys._current_frames().get(self._main_ident)
+                if frame is None:
+                    continue
+                self._current = self._capture(frame)
+
+    def _capture(self, frame):
+        stack = []
+        while frame is not None:
+            stack.append(frame)
+            frame = frame.f_back
+        stack.reverse()
+
+        app_frames = [f for f in stack if f.f_code.co_filename.startswith(APP_DIR)
+                      and f.f_code.co_filename != THIS_FILE
+                      and f.f_code.co_name not in ENTRY_FUNCTIONS]
+        slot = app_frames[0] if app_frames else stack[-1]
+        return {
+            'slot': _describe(slot),
+            'stack': [_describe(f) for f in stack[-20:]],
+            'started': time.time(),
+        }
+
+    def report(self):
+        """Resumen por slot: cantidad, duración total y máxima, ordenado por total"""
+        by_slot = {}
+        for stall in list(self.stalls):
+            entry = by_slot.setdefault(stall['slot'], {'slot': stall['slot'], 'count': 0, 'total': 0.0, 'max': 0.0})
+            entry['count'] += 1
+            entry['total'] += stall['duration']
+            entry['max'] = max(entry['max'], stall['duration'])
+        return sorted(by_slot.values(), key=lambda e: e['total'], reverse=True)
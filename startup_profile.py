@@ -0,0 +1,62 @@
+import os
+import re
+import sys
+import time
+import subprocess
+
+# Se toma al importar este módulo, que main.py importa antes que nada
+_START = time.perf_counter()
+_marks = []
+
+_IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def mark(stage):
+    """Registra el instante en que termina una etapa del arranque"""
+    _marks.append((stage, time.perf_counter() - _START))
+
+
+def stage_report():
+    """Devuelve [(etapa, segundos desde el inicio, segundos de la etapa)]"""
+    report = []
+    previous = 0.0
+    for stage, elapsed in _marks:
+        report.append((stage, elapsed, elapsed - previous))
+        previous = elapsed
+    return report
+
+
+def import_report(module="main", top=25):
+    """Desglose estilo ``-X importtime`` de los imports de un módulo.
+
+    Lanza un intérprete aparte para que la medición no dependa de lo que ya
+    está importado en este proceso. Devuelve [(módulo, propio_us, acumulado_us)]
+    ordenado por tiempo acumulado, solo con los imports de primer nivel.
+    """
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, capture_output=True, text=True, timeout=120,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            # La sangría indica la profundidad; solo interesan los de primer nivel
+            if len(indent) <= 1:
+                entries.append((name, int(self_us), int(cumulative_us)))
+    entries.sort(key=lambda e: e[2], reverse=True)
+    return entries[:top]
+
+
+def format_report(imports=None):
+    """Texto legible con las etapas de arranque y, si se dan, los imports"""
+    lines = ["Etapas de arranque:"]
+    for stage, elapsed, duration in stage_report():
+        lines.append(f"  {elapsed * 1000:8.1f} ms  (+{duration * 1000:7.1f} ms)  {stage}")
+    if imports:
+        lines.append("Imports más costosos (acumulado):")
+        for name, self_us, cumulative_us in imports:
+            lines.append(f"  {cumulative_us / 1000:8.1f} ms  (propio {self_us / 1000:6.1f} ms)  {name}")
+    return "\n".join(lines)
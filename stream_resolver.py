@@ -0,0 +1,120 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+from url_router import normalize_url
+import threading
+import time
+
+# Un solo archivo con audio y video: libVLC no mezcla formatos separados
+STREAM_FORMAT = 'best[acodec!=none][vcodec!=none][protocol^=http]/best[acodec!=none][vcodec!=none]/best'
+# Parámetros con los que los CDN suelen indicar el vencimiento de la URL firmada
+EXPIRY_PARAMS = ('expire', 'expires', 'exp', 'Expires', 'e')
+DEFAULT_TTL = 20 * 60
+EXPIRY_MARGIN = 60
+NETWORK_CACHING_MS = 1500
+
+
+def url_expiry(stream_url, default_ttl=DEFAULT_TTL):
+    """Momento (epoch) en que vence una URL firmada, o ``ahora + default_ttl``"""
+    query = parse_qs(urlsplit(stream_url).query)
+    for name in EXPIRY_PARAMS:
+        value = query.get(name, [None])[0]
+        if value and value.isdigit() and int(value) > time.time():
+            return int(value)
+    return time.time() + default_ttl
+
+
+def player_options(stream):
+    """Opciones de medio de libVLC para reproducir un stream resuelto"""
+    headers = stream.get('http_headers') or {}
+    options = [f":network-caching={NETWORK_CACHING_MS}"]
+    referer = headers.get('Referer') or stream.get('referer')
+    if referer:
+        options.append(f":http-referrer={referer}")
+    if headers.get('User-Agent'):
+        options.append(f":http-user-agent={headers['User-Agent']}")
+    return options
+
+
+class StreamResolver(QObject):
+    """Resuelve la URL directa del medio para verlo sin descargarlo.
+
+    Las URLs resueltas se guardan hasta poco antes de que venzan, así que
+    volver a abrir el mismo video no repite la extracción.
+    """
+    resolved = pyqtSignal(str, dict)   # url, {'url', 'http_headers', 'title', 'expires'}
+    failed = pyqtSignal(str, str)      # url, mensaje de error
+
+    def __init__(self, downloader, max_entries=100):
+        super().__init__()
+        self.downloader = downloader
+        self.max_entries = max_entries
+        self._cache = OrderedDict()  # clave -> stream
+        self._inflight = set()
+        self._lock = threading.Lock()
+
+    def cached(self, url):
+        key = normalize_url(url)
+        with self._lock:
+            stream = self._cache.get(key)
+            if stream is None:
+                return None
+            if stream['expires'] - EXPIRY_MARGIN < time.time():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return stream
+
+    def resolve(self, url, media_type="Videos"):
+        """Emite ``resolved`` con la URL del medio; usa la caché si sigue vigente"""
+        stream = self.cached(url)
+        if stream is not None:
+            self.resolved.emit(url, stream)
+            return
+
+        key = normalize_url(url)
+        with self._lock:
+            if key in self._inflight:
+                return
+            self._inflight.add(key)
+        thread = threading.Thread(target=self._resolve, args=(key, url, media_type))
+        thread.daemon = True
+        thread.start()
+
+    def _resolve(self, key, url, media_type):
+        try:
+            platform = self.downloader.detect_platform(url)
+            ydl_opts = self.downloader.get_platform_options(platform, media_type)
+            ydl_opts['format'] = STREAM_FORMAT
+            with self.downloader.sessions.acquire(ydl_opts) as ydl:
+                info = ydl.extract_info(url, download=False)
+
+            if not info:
+                self.failed.emit(url, "No se pudo obtener información")
+                return
+            if info.get('_type') == 'playlist' or info.get('entries') is not None:
+                self.failed.emit(url, "Las listas de reproducción no se pueden ver sin descargar")
+                return
+            stream_url = info.get('url')
+            if not stream_url:
+                self.failed.emit(url, "No hay un formato que se pueda reproducir directamente")
+                return
+
+            stream = {
+                'url': stream_url,
+                'http_headers': dict(info.get('http_headers') or {}),
+                'referer': ydl_opts.get('referer'),
+                'title': info.get('title'),
+                'expires': url_expiry(stream_url),
+            }
+            with self._lock:
+                self._cache[key] = stream
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+            self.resolved.emit(url, stream)
+        except Exception as e:
+            self.failed.emit(url, str(e))
+        finally:
+            with self._lock:
+                self._inflight.discard(key)
@@ -121,7 +121,7 @@ QProgressBar::chunk {
     background-color: #007ACC;
 }
 
-QListWidget {
+QListView {
     background: #2b2b2b;
     border: 1px solid #3d3d3d;
     outline: none;
@@ -129,35 +129,37 @@ QListWidget {
     border-radius: 8px;
 }
 
-QListWidget::item {
+QListView::item {
+    color: #E0E0E0;
+    min-height: 28px;
     padding: 0;
     margin: 1px 2px;
     background: transparent;
     border-radius: 6px;
 }
 
-QListWidget::item:selected {
+QListView::item:selected {
+    color: white;
     background: #0078d4;
     border-radius: 6px;
 }
 
-QListWidget::item:hover:!selected {
+QListView::item:hover:!selected {
     background: rgba(255, 255, 255, 0.1);
     border-radius: 6px;
 }
 
-QWidget#ListItemWidget {
+QListView::indicator {
+    width: 16px;
+    height: 16px;
+    border-radius: 4px;
+    border: 1px solid #666;
     background: transparent;
-    margin: 0;
-    padding: 0;
-    border-radius: 6px;
 }
 
-QLabel#ListItemLabel {
-    background: transparent;
-    color: white;
-    padding: 0;
-    margin: 0;
+QListView::indicator:checked {
+    background: #0078d4;
+    border: 1px solid #0078d4;
 }
 
 QCheckBox {
@@ -181,16 +183,6 @@ QCheckBox::indicator:checked {
 }
 
 
-/* Estilos para los widgets dentro de los items */
-#ListItemLabel {
-    color: #ffffff;
-    background: transparent;
-}
-
-QListWidget::item:selected #ListItemLabel {
-    color: white;
-}
-
 /* Checkbox dentro de los items */
 QCheckBox {
     background: transparent;
@@ -208,21 +200,6 @@ QCheckBox::indicator:checked {
     border: 1px solid #0078d4;
 }
 
-/* Widget contenedor del item */
-QWidget#ListItemWidget {
-    background: transparent;
-}
-
-QWidget#ListItemWidget:selected {
-    background: #0078d4;
-}
-
-/* Estilo específico para el label dentro del item */
-QLabel#ListItemLabel {
-    background-color: transparent;
-    color: #E0E0E0;
-}
-
 QSlider::groove:horizontal {
     border: 1px solid #3D3D3D;
     height: 8px;
@@ -277,7 +254,7 @@ QScrollArea {
     background-color: #1E1E1E;
 }
 
-QTextEdit {
+QTextEdit, QPlainTextEdit {
     background-color: #1E1E1E;
     color: #E0E0E0;
     font-family: 'Courier New', monospace;
@@ -301,23 +278,11 @@ QTextEdit {
 }
 
 /* Estilos específicos para el área de descargas */
-#downloads_list {
-    background-color: #2D2D2D;
-}
-
-#downloads_list QWidget {
-    background-color: #2D2D2D;
-}
-
-#DownloadsScrollArea {
+#DownloadsView {
     background-color: #2D2D2D;
     border: 1px solid #3D3D3D;
 }
 
-#DownloadsScrollArea QWidget {
-    background-color: #2D2D2D;
-}
-
 /* Ajuste del marco de canciones activas */
 QFrame#MusicPlayerFrame {
     background-color: #2D2D2D;
@@ -326,4 +291,11 @@ QFrame#MusicPlayerFrame {
     margin: 5px;
     padding: 5px;
 }
-"""
\ No newline at end of file
+
+/* Panel de estadísticas de reproducción */
+#PlaybackStats {
+    color: #A0A0A0;
+    font-family: monospace;
+    font-size: 11px;
+}
+"""
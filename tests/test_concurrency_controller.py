@@ -0,0 +1,47 @@
+from concurrency_controller import ConcurrencyController
+
+
+def open_circuit(controller, platform):
+    for _ in range(controller.failure_threshold):
+        assert controller.can_start(platform)
+        controller.started(platform)
+        pause = controller.failed(platform, 'throttle')
+    return pause
+
+
+def test_circuit_opens_after_repeated_throttling():
+    controller = ConcurrencyController(initial_limit=6, max_limit=6, failure_threshold=3, open_seconds=60)
+    assert open_circuit(controller, "YouTube") == 60
+    assert not controller.can_start("YouTube")
+    assert controller.paused_for("YouTube") > 0
+
+
+def test_content_error_does_not_close_half_open_circuit():
+    controller = ConcurrencyController(initial_limit=6, max_limit=6, failure_threshold=3, open_seconds=0.001)
+    open_circuit(controller, "YouTube")
+    while controller.paused_for("YouTube"):
+        pass
+    assert controller.can_start("YouTube")  # trabajo de prueba
+    controller.started("YouTube")
+    assert not controller.can_start("YouTube")
+
+    assert controller.failed("YouTube", None) == 0.001
+    while controller.paused_for("YouTube"):
+        pass
+    # Sigue a prueba: pasa un solo trabajo, no todo el límite
+    assert controller.can_start("YouTube")
+    controller.started("YouTube")
+    assert not controller.can_start("YouTube")
+
+    controller.succeeded("YouTube")
+    assert controller.can_start("YouTube")
+    assert controller.paused_for("YouTube") == 0
+
+
+def test_content_error_outside_probe_changes_nothing():
+    controller = ConcurrencyController()
+    assert controller.can_start("Vimeo")
+    controller.started("Vimeo")
+    assert controller.failed("Vimeo", None) == 0
+    assert controller.paused_for("Vimeo") == 0
+    assert controller.can_start("Vimeo")
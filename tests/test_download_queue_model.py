@@ -0,0 +1,33 @@
+import sys
+
+import pytest
+
+pytest.importorskip("PyQt5")
+
+
+@pytest.fixture
+def app():
+    from PyQt5.QtCore import QCoreApplication
+    return QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+
+
+def test_trimmed_session_rows_are_paged_back(app, tmp_path):
+    from download_history import DownloadHistory
+    from download_queue_model import DownloadQueueModel, UrlRole
+
+    history = DownloadHistory(str(tmp_path / "history.jsonl"))
+    history.record("https://example.com/old", "Videos")
+    model = DownloadQueueModel(history, max_finished=5, page_size=10)
+
+    urls = [f"https://example.com/{i}" for i in range(8)]
+    model.add_jobs(urls, "Videos")
+    for url in urls:
+        history.record(url, "Videos")
+        model.finish(url, 'completed', "Completado")
+    # Las tres más viejas de la sesión se descartaron de memoria
+    assert model.rowCount() == 5
+
+    assert model.canFetchMore()
+    model.fetchMore()
+    shown = [model.data(model.index(i), UrlRole) for i in range(model.rowCount())]
+    assert shown == list(reversed(urls)) + ["https://example.com/old"]
@@ -0,0 +1,105 @@
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+pytest.importorskip("PyQt5")
+pytest.importorskip("yt_dlp")
+
+
+class ThrottledYoutubeDL:
+    """Imita yt-dlp con ignoreerrors: registra el error y devuelve None"""
+
+    def __init__(self, log_hook):
+        self.log_hook = log_hook
+
+    def extract_info(self, url, download=False, process=False):
+        self.log_hook('error', "ERROR: [generic] abc: HTTP Error 429: Too Many Requests")
+        return None
+
+
+class FakeSessions:
+    @contextmanager
+    def acquire(self, ydl_opts, progress_hook=None, postprocessor_hook=None, log_hook=None):
+        yield ThrottledYoutubeDL(log_hook)
+
+    def close_all(self):
+        pass
+
+
+@pytest.fixture
+def downloader(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    timers = []
+
+    class RecordingTimer:
+        def __init__(self, interval, function, args=()):
+            timers.append((interval, function, args))
+            self.daemon = True
+
+        def start(self):
+            pass
+
+    monkeypatch.setattr(threading, "Timer", RecordingTimer)
+    from downloader import Downloader
+    downloader = Downloader()
+    downloader.sessions = FakeSessions()
+    downloader.prefetcher.take = lambda url: None
+    downloader.timers = timers
+    yield downloader
+    downloader.close()
+
+
+def start_job(downloader, url):
+    job = downloader.jobs.add(url, "/tmp", "Videos", "YouTube")
+    downloader._active += 1
+    downloader.controller.started(job.platform)
+    return job
+
+
+def test_throttled_extraction_is_retried(downloader):
+    url = "https://www.youtube.com/watch?v=abc"
+    errors = []
+    downloader.error_signal.connect(lambda u, message: errors.append(message))
+    job = start_job(downloader, url)
+    downloader._download_worker(job)
+
+    assert job.status == 'pending'
+    assert job.attempts == 1
+    assert errors == []
+    assert downloader.jobs.get(url) is job
+    # El límite inicial (2) se redujo a la mitad: con una descarga en curso no entra otra
+    downloader.controller.started("YouTube")
+    assert not downloader.controller.can_start("YouTube")
+    assert [function for _, function, _ in downloader.timers] == [downloader._requeue]
+
+
+def test_throttled_extraction_fails_after_max_retries(downloader):
+    url = "https://www.youtube.com/watch?v=def"
+    errors = []
+    downloader.error_signal.connect(lambda u, message: errors.append(message))
+
+    job = start_job(downloader, url)
+    job.attempts = downloader.controller.max_retries
+    downloader._download_worker(job)
+
+    assert job.status == 'error'
+    assert "429" in errors[0]
+    assert downloader.jobs.get(url) is None
+
+
+def test_cancelled_then_readded_url_starts_once(downloader):
+    url = "https://www.youtube.com/watch?v=ghi"
+    launched = []
+    downloader._launch_locked = launched.append
+    downloader.max_concurrent_downloads = 0  # que todo quede en la cola
+
+    downloader.add_to_queue(url, "/tmp", "Videos")
+    downloader.cancel_download(url)
+    downloader.add_to_queue(url, "/tmp", "Videos")
+    job = downloader.jobs.get(url)
+
+    downloader.max_concurrent_downloads = 8
+    downloader._wake_scheduler()
+
+    assert launched == [job]
@@ -0,0 +1,28 @@
+import sys
+
+import pytest
+
+pytest.importorskip("PyQt5")
+pytest.importorskip("vlc")
+pytest.importorskip("yt_dlp")
+
+
+def test_main_window_builds(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("USERPROFILE", str(tmp_path))
+    monkeypatch.setenv("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    from main import MainWindow
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    stdout, stderr = sys.stdout, sys.stderr
+    window = MainWindow()
+    sys.stdout, sys.stderr = stdout, stderr
+    try:
+        assert window.music_list.model() is not None
+        assert window.video_list.model() is not None
+        assert window.movies_list.model() is not None
+    finally:
+        window.downloader.close()
+        window.deleteLater()
+        app.processEvents()
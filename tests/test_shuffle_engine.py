@@ -0,0 +1,83 @@
+import random
+
+from playlist import Playlist
+from shuffle_engine import ShuffleEngine
+
+
+def test_cycle_plays_every_track_once():
+    engine = ShuffleEngine(10, rng=random.Random(1))
+    assert sorted(engine.next() for _ in range(10)) == list(range(10))
+
+
+def test_every_cycle_is_complete_and_does_not_repeat_the_last_track():
+    for seed in range(50):
+        engine = ShuffleEngine(10, rng=random.Random(seed))
+        previous_last = None
+        for _ in range(4):
+            cycle = [engine.next() for _ in range(10)]
+            assert sorted(cycle) == list(range(10))
+            assert cycle[0] != previous_last
+            previous_last = cycle[-1]
+
+
+def test_peek_returns_what_next_plays():
+    engine = ShuffleEngine(20, rng=random.Random(2))
+    for _ in range(30):
+        upcoming = engine.peek()
+        assert engine.next() == upcoming
+
+
+def test_manual_pick_keeps_peeked_track_and_is_not_repeated():
+    engine = ShuffleEngine(5, rng=random.Random(3))
+    upcoming = engine.peek()
+    manual = (upcoming + 1) % 5
+    engine.played(manual)
+    assert engine.next() == upcoming
+    rest = [engine.next() for _ in range(3)]
+    assert manual not in rest
+    assert sorted(rest + [manual, upcoming]) == list(range(5))
+
+
+def test_previous_walks_history_and_next_walks_back():
+    engine = ShuffleEngine(10, rng=random.Random(4))
+    played = [engine.next() for _ in range(4)]
+    assert engine.previous() == played[2]
+    assert engine.previous() == played[1]
+    assert engine.next() == played[2]
+    assert engine.next() == played[3]
+
+
+def test_history_survives_playlist_changes():
+    playlist = Playlist(f"/m/{i}.mp3" for i in range(10))
+    engine = ShuffleEngine(len(playlist), rng=random.Random(5))
+    played = [playlist[engine.next(playlist.__getitem__, playlist.index_of)] for _ in range(4)]
+
+    # Se borra una pista que no está en el historial: las posiciones cambian
+    removed = next(path for path in playlist if path not in played)
+    playlist.remove([removed])
+    engine.reset(len(playlist))
+
+    assert playlist[engine.previous(playlist.index_of)] == played[2]
+    assert playlist[engine.previous(playlist.index_of)] == played[1]
+
+
+def test_previous_skips_removed_tracks():
+    playlist = Playlist(f"/m/{i}.mp3" for i in range(10))
+    engine = ShuffleEngine(len(playlist), rng=random.Random(6))
+    played = [playlist[engine.next(playlist.__getitem__, playlist.index_of)] for _ in range(3)]
+
+    playlist.remove([played[1]])
+    engine.reset(len(playlist))
+
+    assert playlist[engine.previous(playlist.index_of)] == played[0]
+
+
+def test_reload_does_not_repeat_played_tracks():
+    playlist = Playlist(f"/m/{i}.mp3" for i in range(6))
+    engine = ShuffleEngine(len(playlist), rng=random.Random(7))
+    played = {playlist[engine.next(playlist.__getitem__, playlist.index_of)] for _ in range(3)}
+
+    playlist.set_paths(reversed(list(playlist)))
+    engine.reset(len(playlist))
+    rest = {playlist[engine.next(playlist.__getitem__, playlist.index_of)] for _ in range(3)}
+    assert rest == set(playlist) - played
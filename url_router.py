@@ -0,0 +1,269 @@
+import re
+import time
+from collections import namedtuple
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+Route = namedtuple('Route', ['platform', 'url', 'video_id'])
+
+# Parámetros de seguimiento que no cambian el contenido de la URL
+TRACKING_PARAMS = {'fbclid', 'gclid', 'igshid', 'igsh', 'si', 'feature', 'ref_src'}
+
+_YOUTUBE_PATH_ID = re.compile(r'^/(?:shorts|embed|live|v)/([\w-]{11})')
+_YOUTUBE_ID = re.compile(r'^[\w-]{11}$')
+_TIKTOK_VIDEO = re.compile(r'^/(@[^/]+)/video/(\d+)')
+_INSTAGRAM_POST = re.compile(r'^/(?:[\w.]+/)?(p|reel|reels|tv)/([\w-]+)')
+_TWITTER_STATUS = re.compile(r'^/(?:[^/]+|i/web)/status(?:es)?/(\d+)')
+_FACEBOOK_VIDEO = re.compile(r'^/[^/]+/videos/(?:[^/]+/)?(\d+)')
+_STREAMER_ID = re.compile(r'^/(?:[a-z]/|embed-|e/|v/|d/|f/)?([A-Za-z0-9]{6,})')
+
+
+def _youtube(host, path, query):
+    params = dict(query)
+    video_id = None
+    if host == 'youtu.be':
+        candidate = path.strip('/').split('/')[0]
+        video_id = candidate if _YOUTUBE_ID.match(candidate) else None
+    elif path == '/watch':
+        candidate = params.get('v', '')
+        video_id = candidate if _YOUTUBE_ID.match(candidate) else None
+    else:
+        match = _YOUTUBE_PATH_ID.match(path)
+        video_id = match.group(1) if match else None
+
+    playlist_id = params.get('list')
+    if video_id:
+        # Se conserva la lista porque cambia lo que descarga yt-dlp
+        canonical = f"https://www.youtube.com/watch?v={video_id}"
+        if playlist_id:
+            canonical += f"&list={playlist_id}"
+        return canonical, video_id
+    if path == '/playlist' and playlist_id:
+        return f"https://www.youtube.com/playlist?list={playlist_id}", playlist_id
+    return None, None
+
+
+def _tiktok(host, path, query):
+    match = _TIKTOK_VIDEO.match(path)
+    if match:
+        return f"https://www.tiktok.com/{match.group(1)}/video/{match.group(2)}", match.group(2)
+    return None, None
+
+
+def _instagram(host, path, query):
+    match = _INSTAGRAM_POST.match(path)
+    if match:
+        kind = 'reel' if match.group(1) in ('reel', 'reels') else match.group(1)
+        return f"https://www.instagram.com/{kind}/{match.group(2)}/", match.group(2)
+    return None, None
+
+
+def _twitter(host, path, query):
+    match = _TWITTER_STATUS.match(path)
+    if match:
+        return f"https://x.com/i/status/{match.group(1)}", match.group(1)
+    return None, None
+
+
+def _facebook(host, path, query):
+    if host == 'fb.watch':
+        code = path.strip('/').split('/')[0]
+        return (f"https://fb.watch/{code}/", code) if code else (None, None)
+    params = dict(query)
+    if path.rstrip('/') == '/watch' and params.get('v', '').isdigit():
+        return f"https://www.facebook.com/watch/?v={params['v']}", params['v']
+    if path.startswith('/reel/'):
+        reel_id = path.split('/')[2]
+        if reel_id.isdigit():
+            return f"https://www.facebook.com/reel/{reel_id}", reel_id
+    match = _FACEBOOK_VIDEO.match(path)
+    if match:
+        return f"https://www.facebook.com/watch/?v={match.group(1)}", match.group(1)
+    return None, None
+
+
+def _streamer(host, path, query):
+    match = _STREAMER_ID.match(path)
+    if match:
+        return None, match.group(1)
+    return None, None
+
+
+class URLRouter:
+    """Clasifica URLs por plataforma a partir del nombre de host.
+
+    El host se obtiene una sola vez con ``urlsplit`` y se busca sufijo a sufijo
+    (``a.b.example.com`` -> ``b.example.com`` -> ``example.com``) en un índice
+    hash de dominios registrados, de modo que ``netflix.com`` ya no se confunde
+    con ``x.com``. Los dominios que cambian de TLD con frecuencia (``dood.*``,
+    ``cuevana*``) se registran por etiqueta.
+    """
+
+    def __init__(self, cache_size=4096):
+        self._domains = {}         # dominio -> plataforma
+        self._labels = {}          # etiqueta exacta -> plataforma
+        self._label_prefixes = []  # (prefijo, plataforma)
+        self._canonicalizers = {}  # plataforma -> función(host, path, query)
+        self.route = lru_cache(maxsize=cache_size)(self._route)
+
+    def register(self, platform, domains=(), labels=(), label_prefixes=(), canonicalizer=None):
+        """Registra los dominios y la función de normalización de una plataforma"""
+        for domain in domains:
+            self._domains[domain.lower()] = platform
+        for label in labels:
+            self._labels[label.lower()] = platform
+        for prefix in label_prefixes:
+            self._label_prefixes.append((prefix.lower(), platform))
+        if canonicalizer:
+            self._canonicalizers[platform] = canonicalizer
+        self.route.cache_clear()
+
+    def _match_host(self, host):
+        labels = host.split('.')
+        for i in range(len(labels) - 1):
+            platform = self._domains.get('.'.join(labels[i:]))
+            if platform:
+                return platform
+        # La última etiqueta es el TLD y no identifica a ningún sitio
+        for label in labels[:-1]:
+            platform = self._labels.get(label)
+            if platform:
+                return platform
+            for prefix, prefix_platform in self._label_prefixes:
+                if label.startswith(prefix):
+                    return prefix_platform
+        return 'Unknown'
+
+    def host_platform(self, host):
+        """Plataforma a la que pertenece un nombre de host ('Unknown' si ninguna)"""
+        host = host.lower()
+        if '.' not in host:
+            return 'Unknown'
+        return self._match_host(host)
+
+    def _route(self, url):
+        text = url.strip()
+        if '://' not in text:
+            text = 'https://' + text
+        try:
+            parts = urlsplit(text)
+            host = parts.hostname
+            port = parts.port
+        except ValueError:
+            return Route('Unknown', url.strip(), None)
+        if not host or '.' not in host:
+            return Route('Unknown', url.strip(), None)
+
+        scheme = parts.scheme.lower()
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                 if k not in TRACKING_PARAMS and not k.startswith('utm_')]
+
+        platform = self._match_host(host)
+        video_id = None
+        canonicalizer = self._canonicalizers.get(platform)
+        if canonicalizer:
+            canonical, video_id = canonicalizer(host, parts.path, query)
+            if canonical:
+                return Route(platform, canonical, video_id)
+
+        netloc = host if port in (None, 80, 443) else f"{host}:{port}"
+        canonical = urlunsplit((scheme, netloc, parts.path or '/', urlencode(query), ''))
+        return Route(platform, canonical, video_id)
+
+    def route_many(self, urls):
+        """Clasifica un lote de URLs resolviendo cada URL distinta una sola vez"""
+        resolved = {}
+        route = self.route
+        return [resolved[u] if u in resolved else resolved.setdefault(u, route(u)) for u in urls]
+
+
+def build_default_router():
+    """Crea el router con las plataformas soportadas por el downloader"""
+    router = URLRouter()
+    router.register('Streamwish', domains=['streamwish.to'], canonicalizer=_streamer)
+    router.register('Filemoon', domains=['filemoon.sx'], canonicalizer=_streamer)
+    router.register('Streamtape', domains=['streamtape.com'], canonicalizer=_streamer)
+    router.register('Doodstream', domains=['doodstream.com', 'dooodster.com'], labels=['dood'],
+                    canonicalizer=_streamer)
+    router.register('Streamlare', domains=['streamlare.com'], canonicalizer=_streamer)
+    router.register('Uqload', domains=['uqload.com'], canonicalizer=_streamer)
+    router.register('Voe', domains=['voe.sx'], canonicalizer=_streamer)
+    router.register('Upstream', domains=['upstream.to'], canonicalizer=_streamer)
+    router.register('TikTok', domains=['tiktok.com'], canonicalizer=_tiktok)
+    router.register('Instagram', domains=['instagram.com'], canonicalizer=_instagram)
+    router.register('Facebook', domains=['facebook.com', 'fb.watch'], canonicalizer=_facebook)
+    router.register('Twitter', domains=['twitter.com', 'x.com'], canonicalizer=_twitter)
+    router.register('Cuevana', label_prefixes=['cuevana'])
+    router.register('YouTube', domains=['youtube.com', 'youtu.be'], canonicalizer=_youtube)
+    return router
+
+
+default_router = build_default_router()
+
+
+def route_url(url):
+    """Devuelve (plataforma, URL canónica, id del video) de una URL"""
+    return default_router.route(url)
+
+
+def route_urls(urls):
+    """Versión por lotes de route_url"""
+    return default_router.route_many(urls)
+
+
+def normalize_url(url):
+    """Normaliza una URL para usarla como clave de caché o para detectar duplicados"""
+    return default_router.route(url).url
+
+
+def is_valid_url(url):
+    """Indica si el texto parece una URL http(s) completa"""
+    parts = urlsplit(url.strip())
+    return parts.scheme in ('http', 'https') and '.' in parts.netloc
+
+
+BENCHMARK_URLS = [
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQ&feature=share',
+    'https://youtu.be/dQw4w9WgXcQ?si=abc',
+    'https://www.tiktok.com/@user/video/7234567890123456789',
+    'https://www.instagram.com/reel/Cabcdef1234/?igshid=xyz',
+    'https://x.com/user/status/1234567890123456789',
+    'https://www.netflix.com/title/80100172',
+    'https://dood.la/e/abcdef123456',
+    'https://streamtape.com/v/AbCdEf123456/file.mp4',
+    'https://ww1.cuevana3.me/pelicula/algo',
+    'https://example.org/video.mp4',
+]
+
+
+def benchmark(count=200000, unique_ratio=0.5):
+    """Micro-benchmark: URLs por segundo en frío (sin caché) y por lotes"""
+    unique = max(1, int(count * unique_ratio))
+    urls = []
+    for i in range(count):
+        base = BENCHMARK_URLS[i % len(BENCHMARK_URLS)]
+        separator = '&' if '?' in base else '?'
+        urls.append(f"{base}{separator}n={i % unique}")
+
+    router = build_default_router()
+    start = time.perf_counter()
+    for url in urls[:unique]:
+        router._route(url)
+    cold = time.perf_counter() - start
+
+    router = build_default_router()
+    start = time.perf_counter()
+    router.route_many(urls)
+    batch = time.perf_counter() - start
+
+    return {
+        'urls': count,
+        'unique_urls': unique,
+        'cold_urls_per_second': unique / cold if cold else 0.0,
+        'batch_urls_per_second': count / batch if batch else 0.0,
+    }
+
+
+if __name__ == '__main__':
+    for name, value in benchmark().items():
+        print(f"{name}: {value:,.0f}" if isinstance(value, float) else f"{name}: {value}")
@@ -1,4 +1,5 @@
 import os
+import re
 from datetime import datetime
 import random
 
@@ -17,6 +18,17 @@ def create_download_folders(base_path):
     except Exception as e:
         print(f"Error creando carpetas: {str(e)}")
 
+def clean_title(filename):
+    """Nombre del archivo sin extensión, códigos como [1080p] ni caracteres especiales"""
+    # Quitar extensión
+    name = os.path.splitext(filename)[0]
+    # Quitar códigos típicos como [1080p], (720p), etc.
+    name = re.sub(r'\[.*?\]|\(.*?\)|\{.*?\}', '', name)
+    # Quitar caracteres especiales y espacios múltiples
+    name = re.sub(r'[^\w\s-]', ' ', name)
+    name = re.sub(r'\s+', ' ', name).strip()
+    return name
+
 def get_media_files(directory, sort_by="Alfabético"):
     """Obtiene la lista de archivos multimedia ordenados según el criterio especificado"""
     if not os.path.exists(directory):
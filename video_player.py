@@ -1,12 +1,16 @@
+import os
 import sys
 from PyQt5.QtWidgets import (QDialog, QWidget, QVBoxLayout, QHBoxLayout, 
                            QLabel, QPushButton, QSlider, QSizePolicy,
                            QFrame, QComboBox, QApplication)
 from PyQt5.QtCore import Qt, QTimer, QTime, QPoint
 import vlc
+from playback_profiles import PROFILES, DEFAULT_PROFILE, StatsMonitor, create_instance, format_stats
+from seek_controller import SeekController
 
 class VideoPlayerWindow(QDialog):
-    def __init__(self, video_path, parent=None):
+    def __init__(self, video_path, parent=None, media_options=(), profile=DEFAULT_PROFILE,
+                 prefetcher=None, next_paths=()):
         super().__init__(parent)
         self.setWindowTitle("Reproductor de Video")
         self.resize(800, 600)
@@ -31,16 +35,15 @@ class VideoPlayerWindow(QDialog):
         self.video_container.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.video_container.setMouseTracking(True)
 
-        # Inicializar reproductor
-        self.instance = vlc.Instance()
-        self.player = self.instance.media_player_new()
-
-        if sys.platform == "linux":
-            self.player.set_xwindow(self.video_container.winId())
-        elif sys.platform == "win32":
-            self.player.set_hwnd(self.video_container.winId())
-        elif sys.platform == "darwin":
-            self.player.set_nsobject(int(self.video_container.winId()))
+        # Inicializar reproductor con el perfil elegido
+        self.video_path = video_path
+        self.media_options = tuple(media_options)
+        self.profile = profile if profile in PROFILES else DEFAULT_PROFILE
+        # Solo los archivos locales se precargan; los streams van por la red
+        self.prefetcher = prefetcher if os.path.isfile(video_path) else None
+        self.instance = None
+        self.player = None
+        self._create_player()
 
         # Panel de controles
         self.controls_frame = QFrame()
@@ -51,7 +54,9 @@ class VideoPlayerWindow(QDialog):
         self.progress_slider = QSlider(Qt.Horizontal)
         self.progress_slider.setObjectName("ProgressSlider")
         self.progress_slider.setRange(0, 1000)
+        self.seek_controller = SeekController(lambda: self.player, parent=self)
         self.progress_slider.sliderMoved.connect(self._seek)
+        self.progress_slider.sliderReleased.connect(self._seek_released)
 
         # Controles principales
         main_controls = QHBoxLayout()
@@ -72,6 +77,21 @@ class VideoPlayerWindow(QDialog):
         self.speed_combo.setCurrentText("1.0x")
         self.speed_combo.currentTextChanged.connect(self._change_speed)
 
+        # Perfil de libVLC
+        self.profile_combo = QComboBox()
+        self.profile_combo.setObjectName("ProfileCombo")
+        self.profile_combo.setToolTip("Perfil de reproducción")
+        self.profile_combo.addItems(list(PROFILES))
+        self.profile_combo.setCurrentText(self.profile)
+        self.profile_combo.currentTextChanged.connect(self.set_profile)
+
+        # Estadísticas sobre el video
+        self.stats_button = QPushButton("📊")
+        self.stats_button.setObjectName("StatsButton")
+        self.stats_button.setToolTip("Estadísticas de reproducción")
+        self.stats_button.setCheckable(True)
+        self.stats_button.toggled.connect(self._toggle_stats)
+
         # Volumen
         volume_layout = QHBoxLayout()
         self.volume_label = QLabel("🔈")
@@ -98,6 +118,12 @@ class VideoPlayerWindow(QDialog):
         self.update_timer.timeout.connect(self._update_progress)
         self.update_timer.start()
 
+        # Timer del panel de estadísticas
+        self.stats_monitor = StatsMonitor()
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setInterval(1000)
+        self.stats_timer.timeout.connect(self._update_stats)
+
         # Variables de estado
         self.is_pip_mode = False
         self.original_geometry = None
@@ -107,6 +133,8 @@ class VideoPlayerWindow(QDialog):
         main_controls.addWidget(self.stop_button)
         main_controls.addWidget(self.pip_button)
         main_controls.addWidget(self.speed_combo)
+        main_controls.addWidget(self.profile_combo)
+        main_controls.addWidget(self.stats_button)
         main_controls.addWidget(self.time_label)
         main_controls.addStretch()
         main_controls.addWidget(self.volume_label)
@@ -122,8 +150,10 @@ class VideoPlayerWindow(QDialog):
         self.setLayout(layout)
 
         # Reproducir video
-        media = self.instance.media_new(video_path)
-        self.player.set_media(media)
+        if self.prefetcher is not None:
+            self.prefetcher.set_active(video_path, owner="video")
+            self.prefetcher.hint(next_paths, owner="video")
+        self._load_media()
         self.player.play()
 
         # Conectar eventos del mouse
@@ -134,6 +164,71 @@ class VideoPlayerWindow(QDialog):
         self.hide_controls_timer.start()
 
 
+    def _create_player(self):
+        self.instance = create_instance(self.profile)
+        self.player = self.instance.media_player_new()
+
+        if sys.platform == "linux":
+            self.player.set_xwindow(self.video_container.winId())
+        elif sys.platform == "win32":
+            self.player.set_hwnd(self.video_container.winId())
+        elif sys.platform == "darwin":
+            self.player.set_nsobject(int(self.video_container.winId()))
+
+    def _load_media(self, start_ms=0):
+        media = self.instance.media_new(self.video_path)
+        for option in self.media_options:
+            media.add_option(option)
+        if start_ms > 0:
+            media.add_option(f":start-time={start_ms / 1000:.3f}")
+        self.player.set_media(media)
+
+    def set_profile(self, profile):
+        """Recrea el reproductor con otro perfil y retoma desde el mismo punto"""
+        if profile == self.profile or profile not in PROFILES:
+            return
+        position = self.player.get_time()
+        was_playing = self.player.is_playing()
+        self.seek_controller.cancel()
+        self.player.stop()
+        self.player.release()
+        self.instance.release()
+
+        self.profile = profile
+        self._create_player()
+        self._load_media(position)
+        self.player.audio_set_volume(self.volume_slider.value())
+        self.player.play()
+        self.player.set_rate(float(self.speed_combo.currentText().replace('x', '')))
+        if not was_playing:
+            # La pausa solo se aplica cuando el medio ya está abierto
+            QTimer.singleShot(300, lambda: self.player.set_pause(1))
+        self.stats_monitor.reset()
+        if self.stats_button.isChecked():
+            self._toggle_stats(True)
+
+    def _toggle_stats(self, visible):
+        """Muestra u oculta el panel de estadísticas dibujado por libVLC sobre el video"""
+        self.player.video_set_marquee_int(vlc.VideoMarqueeOption.Enable, 1 if visible else 0)
+        if visible:
+            self.player.video_set_marquee_int(vlc.VideoMarqueeOption.Position, 5)  # arriba a la izquierda
+            self.player.video_set_marquee_int(vlc.VideoMarqueeOption.Size, 16)
+            self.player.video_set_marquee_int(vlc.VideoMarqueeOption.Timeout, 0)
+            self.stats_monitor.reset()
+            self._update_stats()
+            self.stats_timer.start()
+        else:
+            self.stats_timer.stop()
+
+    def _update_stats(self):
+        stats = self.stats_monitor.sample(self.player.get_media(), self.stats_timer.interval() / 1000.0)
+        text = format_stats(stats, self.profile)
+        latency = self.seek_controller.last_latency()
+        if latency is not None:
+            text += f"\nÚltimo salto: {latency:.0f} ms"
+        self.player.video_set_marquee_string(vlc.VideoMarqueeOption.Text, text)
+        self.stats_button.setToolTip(text)
+
     def toggle_pip(self):
         """Alternar modo Picture in Picture"""
         if not self.is_pip_mode:
@@ -173,10 +268,12 @@ class VideoPlayerWindow(QDialog):
         self.play_button.setText("▶")
 
     def _seek(self, position):
-        """Buscar posición en el video"""
-        if self.player.get_length() > 0:
-            pos = position / 1000.0
-            self.player.set_position(pos)
+        """Salto rápido mientras se arrastra la barra"""
+        self.seek_controller.seek_fraction(position / 1000.0)
+
+    def _seek_released(self):
+        """Salto preciso al soltar la barra"""
+        self.seek_controller.seek_fraction(self.progress_slider.value() / 1000.0, precise=True)
 
     def _update_progress(self):
         """Actualizar barra de progreso y tiempo"""
@@ -186,7 +283,11 @@ class VideoPlayerWindow(QDialog):
         length = self.player.get_length()
         if length > 0:
             position = self.player.get_position()
-            self.progress_slider.setValue(int(position * 1000))
+            # No pelear con el usuario ni con un salto que todavía no terminó
+            if not self.progress_slider.isSliderDown() and not self.seek_controller.is_seeking():
+                self.progress_slider.setValue(int(position * 1000))
+            if self.prefetcher is not None:
+                self.prefetcher.playhead(self.video_path, position)
 
             # Actualizar etiqueta de tiempo
             current_ms = int(position * length)
@@ -204,8 +305,13 @@ class VideoPlayerWindow(QDialog):
 
     def closeEvent(self, event):
         self.update_timer.stop()
+        self.stats_timer.stop()
+        self.seek_controller.cancel()
         self.hide_controls_timer.stop()
         self.player.stop()
+        if self.prefetcher is not None:
+            self.prefetcher.set_active(None, owner="video")
+            self.prefetcher.hint((), owner="video")
         event.accept()
 
     def resizeEvent(self, event):